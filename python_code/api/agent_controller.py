@@ -4,8 +4,15 @@ from agents import (  # importação dos agentes
     DetailsAgent,
     AgentProtocol,
     RecommendationAgent,
-    OrderTakingAgent)
+    OrderTakingAgent,
+    RouterAgent)
+from agents.llm_client import create_llm_client, warm_up_llm_client
+from agents.semantic_cache import SemanticRoutingCache
+from agents.embedding_batcher import EmbeddingBatcher
+from agents.utils import get_env_flag, cancel_task, json_repair_stats, structured_output_stats
+import asyncio
 import os
+import time
 from typing import Dict  # tipagem
 import pathlib
 import sys
@@ -17,46 +24,396 @@ sys.path.append(os.path.join(folder_path, "../.."))
 
 class AgentController():
     # Método construtor
-    def __init__(self):
+    def __init__(self, parallel_routing=None, speculative_execution=None, routing_mode=None, semantic_cache=None):
+        # Modo de roteamento (padrão: variável de ambiente ROUTING_MODE)
+        # "separate": Guard Agent + Classification Agent (duas chamadas ao LLM)
+        # "fused": RouterAgent (guard e classificação em uma única chamada ao LLM)
+        if routing_mode is None:
+            routing_mode = os.getenv("ROUTING_MODE", "separate")
+        if routing_mode not in ("separate", "fused"):
+            raise ValueError(
+                f"ROUTING_MODE inválido: {routing_mode} (use 'separate' ou 'fused')")
+        self.routing_mode = routing_mode
+
+        # Roteamento paralelo: executar Guard Agent e Classification Agent ao mesmo tempo
+        # (padrão: variável de ambiente PARALLEL_ROUTING, ativado se não definida)
+        if parallel_routing is None:
+            parallel_routing = get_env_flag("PARALLEL_ROUTING", True)
+        self.parallel_routing = parallel_routing
+
+        # Execução especulativa: iniciar o agente provável enquanto o roteamento ainda está em andamento
+        # (padrão: variável de ambiente SPECULATIVE_EXECUTION, desativado se não definida)
+        if speculative_execution is None:
+            speculative_execution = get_env_flag(
+                "SPECULATIVE_EXECUTION", False)
+        self.speculative_execution = speculative_execution
+        # Contadores da execução especulativa (acerto x custo)
+        self.speculation_stats = {
+            "speculations": 0,  # execuções especulativas iniciadas
+            "hits": 0,  # previsão confirmada pelo classificador (resultado aproveitado)
+            "misses": 0,  # previsão diferente da classificação
+            "guard_rejections": 0,  # mensagem bloqueada pelo Guard Agent
+            "wasted_calls": 0,  # execuções especulativas descartadas (misses + guard_rejections)
+        }
+
+        # Estado do warm-up (informado pelo endpoint /health/ready)
+        # "not_loaded" -> "loading" -> "ready" (ou "failed", se algum componente não carregar)
+        self.load_state = {
+            "status": "not_loaded",
+            "components": {},  # componente -> {"status", "seconds", "error"}
+            "seconds": None,  # duração total do warm-up
+        }
+
+        # Cliente LLM compartilhado: um único pool de conexões para todos os agentes
+        self.llm_client = create_llm_client()
+
         # Instanciar agentes
-        self.guard_agent = GuardAgent()
-        self.classification_agent = ClassificationAgent()
+        self.guard_agent = GuardAgent(client=self.llm_client)
+        self.classification_agent = ClassificationAgent(client=self.llm_client)
+        self.router_agent = RouterAgent(client=self.llm_client)
         self.recommendation_agent = RecommendationAgent(
             os.path.join(
                 folder_path, "recommendation_objects/apriori_recommendation.json"),
             os.path.join(
-                folder_path, "recommendation_objects/popularity_recommendation.csv")
+                folder_path, "recommendation_objects/popularity_recommendation.csv"),
+            client=self.llm_client
         )
         # Dicionário com os agentes pós-classificação
         self.agent_dict: Dict[str, AgentProtocol] = {
-            "details_agent": DetailsAgent(),
+            "details_agent": DetailsAgent(client=self.llm_client),
             "recommendation_agent": self.recommendation_agent,
-            "order_taking_agent": OrderTakingAgent(self.recommendation_agent)
+            "order_taking_agent": OrderTakingAgent(self.recommendation_agent, client=self.llm_client)
         }
 
+        # Cache semântico de roteamento: reaproveita decisões de mensagens parecidas (usa os embeddings do Details Agent)
+        # (padrão: variável de ambiente SEMANTIC_CACHE_ENABLED, desativado se não definida)
+        if semantic_cache is None:
+            semantic_cache = get_env_flag("SEMANTIC_CACHE_ENABLED", False)
+        self.semantic_cache = None
+        if semantic_cache:
+            self.semantic_cache = SemanticRoutingCache(
+                self.agent_dict["details_agent"].embedding_client,
+                threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+                capacity=int(os.getenv("SEMANTIC_CACHE_CAPACITY", "2048")),
+                embedding_cache=self.agent_dict["details_agent"].embedding_cache
+            )
+
+    # Método de warm-up (chamado na inicialização da API): pré-aquece as conexões com o LLM e carrega
+    # o modelo de embeddings e o armazenamento vetorial do Details Agent, em paralelo
+    # `load_models=False`: os modelos ficam para o primeiro uso (a API fica pronta logo após as conexões)
+    async def warm_up(self, load_models=True):
+        self.load_state["status"] = "loading"
+        start = time.perf_counter()
+
+        components = {"llm_client": warm_up_llm_client(self.llm_client)}
+        details_agent = self.agent_dict.get("details_agent")
+        if hasattr(details_agent, "load"):
+            if load_models:
+                components["details_agent"] = asyncio.to_thread(
+                    details_agent.load)
+            else:
+                self.load_state["components"]["details_agent"] = {
+                    "status": "deferred", "seconds": None, "error": None}
+        results = await asyncio.gather(*(self.warm_up_component(name, coroutine)
+                                         for name, coroutine in components.items()))
+
+        self.load_state["seconds"] = time.perf_counter() - start
+        self.load_state["status"] = "ready" if all(results) else "failed"
+
+    # Método para executar o warm-up de um componente, registrando o estado e a duração
+    # Retorna False se o componente falhar (o erro fica no estado, a API continua no ar)
+    async def warm_up_component(self, name, coroutine):
+        component = {"status": "loading", "seconds": None, "error": None}
+        self.load_state["components"][name] = component
+        start = time.perf_counter()
+        try:
+            await coroutine
+            component["status"] = "ready"
+        except Exception as e:
+            print(f"Erro no warm-up de {name}: {e}")
+            component["status"] = "failed"
+            component["error"] = str(e)
+        component["seconds"] = time.perf_counter() - start
+        return component["status"] == "ready"
+
+    # Método para obter o estado do carregamento (usado pelo endpoint /health/ready)
+    def get_load_state(self):
+        state = dict(self.load_state)
+        state["components"] = {name: dict(component)
+                               for name, component in self.load_state["components"].items()}
+        state["ready"] = state["status"] == "ready"
+        return state
+
+    # Método para liberar os recursos do controlador (pool de conexões, cache de embeddings em disco e thread do micro-batching)
+    async def close(self):
+        await self.llm_client.close()
+        details_agent = self.agent_dict.get("details_agent")
+        if getattr(details_agent, "embedding_cache", None) is not None:
+            details_agent.embedding_cache.close()
+        if isinstance(getattr(details_agent, "embedding_client", None), EmbeddingBatcher):
+            details_agent.embedding_client.close()
+
+    # Método para somar novos recibos às recomendações (atualização incremental) e publicar uma nova versão
+    # `rows`: linhas no esquema de "201904 sales reciepts.csv"; o estado vem de RECOMMENDATION_STATE_PATH
+    # (criado com `python recommendation_updater.py init`). Bloqueante: executado em uma thread
+    async def ingest_receipts(self, rows):
+        return await asyncio.to_thread(self.ingest_receipts_sync, rows)
+
+    def ingest_receipts_sync(self, rows):
+        # Importação adiada: o atualizador só é carregado quando a ingestão é usada
+        from recommendation_updater import DEFAULT_STATE_PATH, update_state
+
+        state_path = os.getenv("RECOMMENDATION_STATE_PATH") or DEFAULT_STATE_PATH
+        # Estado relido do disco a cada lote, com lock de arquivo: atualizações de outros workers e da linha de
+        # comando não são sobrescritas
+        _, stats, version = update_state(lambda counters: counters.ingest_rows(rows),
+                                         state_path, self.recommendation_agent.snapshot_path)
+        stats["version"] = version
+        # O Recommendation Agent passa a usar a nova versão (sem esperar a próxima verificação)
+        self.recommendation_agent.refresh()
+        return stats
+
+    # Método para verificar periodicamente se uma nova versão das recomendações foi publicada (treinamento,
+    # atualização incremental ou outro worker) e ativá-la: a carga e a validação rodam em uma thread, fora das
+    # requisições. Roda até ser cancelado (encerramento da API)
+    async def watch_recommendations(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.recommendation_agent.refresh)
+            except Exception as e:
+                print(f"Erro na verificação das recomendações: {e}")
+
+    # Método para obter a versão ativa das recomendações e o estado das recargas
+    def get_recommendation_snapshot_stats(self):
+        return self.recommendation_agent.snapshot_stats()
+
+    # Método para rotear a mensagem: executa o Guard Agent e o Classification Agent
+    # Retorna a resposta do Guard Agent e a do Classification Agent (None se a mensagem não for permitida)
+    async def route(self, messages):
+        # Cache semântico: buscar uma mensagem parecida já roteada depois do mesmo agente (resposta anterior do assistente)
+        # Respostas curtas ("sim", "esse") dependem da conversa: a mesma mensagem após agentes diferentes não é reaproveitada
+        # Não é usado com um pedido em andamento, pois a decisão depende do contexto da conversa (ex.: "sim", "mais um")
+        embedding = None
+        context = self.get_last_agent(messages)
+        if self.semantic_cache is not None and not self.has_open_order(messages):
+            embedding = await asyncio.to_thread(
+                self.semantic_cache.embed, messages[-1]['content'])
+            cached = self.semantic_cache.lookup(embedding, context)
+            if cached is not None:
+                (guard_agent_response, classification_agent_response), _ = cached
+                return guard_agent_response, classification_agent_response
+
+        guard_agent_response, classification_agent_response = await self.route_with_llm(
+            messages)
+        if embedding is not None:
+            self.semantic_cache.add(
+                embedding, (guard_agent_response, classification_agent_response), context)
+        return guard_agent_response, classification_agent_response
+
+    # Método para rotear a mensagem com o LLM (modo fundido, sequencial ou paralelo)
+    async def route_with_llm(self, messages):
+        if self.routing_mode == "fused":
+            # Modo fundido: uma única resposta contém as duas decisões
+            router_agent_response = await self.router_agent.get_response(messages)
+            if router_agent_response['memory']['guard_decision'] == 'not allowed':
+                return router_agent_response, None
+            return router_agent_response, router_agent_response
+
+        if not self.parallel_routing:
+            # Modo sequencial: Guard Agent -> Classification Agent
+            guard_agent_response = await self.guard_agent.get_response(messages)
+            if guard_agent_response['memory']['guard_decision'] == 'not allowed':
+                return guard_agent_response, None
+            classification_agent_response = await self.classification_agent.get_response(
+                messages)
+            return guard_agent_response, classification_agent_response
+
+        # Modo paralelo: os dois agentes usam as mesmas mensagens e não dependem um do outro,
+        # então a classificação começa junto com o guard e é cancelada se a mensagem for bloqueada
+        classification_task = asyncio.create_task(
+            self.classification_agent.get_response(messages))
+        try:
+            guard_agent_response = await self.guard_agent.get_response(messages)
+        except BaseException:
+            await cancel_task(classification_task)
+            raise
+
+        if guard_agent_response['memory']['guard_decision'] == 'not allowed':
+            # Descartar a classificação (cancela a chamada ao LLM se ainda estiver em andamento)
+            await cancel_task(classification_task)
+            return guard_agent_response, None
+
+        classification_agent_response = await classification_task
+        return guard_agent_response, classification_agent_response
+
+    # Método para verificar se há um pedido em andamento (memória do Order Taking Agent com itens no pedido)
+    def has_open_order(self, messages):
+        for message in reversed(messages):
+            memory = message.get('memory') or {}
+            if message.get('role') == 'assistant' and memory.get('agent') == 'order_taking_agent':
+                return len(memory.get('order') or []) > 0
+        return False
+
+    # Método para obter o agente que respondeu a última mensagem do assistente (campo `memory.agent`; None se não houver)
+    def get_last_agent(self, messages):
+        for message in reversed(messages):
+            agent_name = (message.get('memory') or {}).get('agent', '')
+            if message.get('role') == 'assistant' and agent_name:
+                return agent_name
+        return None
+
+    # Método para prever o agente provável a partir de sinais baratos do histórico (sem chamar o LLM)
+    # 1- Agente que respondeu a última mensagem do assistente (campo `memory.agent`)
+    # 2- Pedido em andamento (memória do Order Taking Agent com itens no pedido)
+    def predict_agent(self, messages):
+        last_agent = self.get_last_agent(messages)
+        if last_agent in self.agent_dict:
+            return last_agent
+        if self.has_open_order(messages):
+            return 'order_taking_agent'
+        return None
+
+    # Método para obter as métricas do controlador
+    def get_metrics(self):
+        stats = dict(self.speculation_stats)
+        # Taxa de acerto: previsões confirmadas / especulações iniciadas
+        stats["hit_rate"] = (stats["hits"] / stats["speculations"]
+                             if stats["speculations"] else 0.0)
+        # Taxa de fallback do reparo de JSON: saídas que precisaram do LLM para serem corrigidas
+        json_stats = dict(json_repair_stats)
+        total = sum(json_stats.values())
+        json_stats["llm_fallback_rate"] = (json_stats["llm_fallback"] / total
+                                           if total else 0.0)
+        return {
+            "speculative_execution": stats,
+            "json_repair": json_stats,
+            "structured_output": dict(structured_output_stats),
+            "decision_cache": {
+                agent_name: (agent.decision_cache.stats()
+                             if agent.decision_cache is not None else None)
+                for agent_name, agent in [("guard_agent", self.guard_agent),
+                                          ("classification_agent", self.classification_agent),
+                                          ("router_agent", self.router_agent)]
+            },
+            "semantic_cache": (self.semantic_cache.stats()
+                               if self.semantic_cache is not None else None),
+            "embedding_cache": self.get_embedding_cache_stats(),
+            "embedding_batcher": self.get_embedding_batcher_stats(),
+            "product_fast_path": self.get_product_fast_path_stats(),
+            "retrieval_cache": self.get_retrieval_cache_stats(),
+            "details_context": self.get_details_context_stats(),
+            "faq": self.get_faq_stats(),
+            "recommendations": self.get_recommendation_snapshot_stats(),
+            "startup": self.get_load_state(),
+        }
+
+    # Método para obter as estatísticas do cache de embeddings do Details Agent (None se desativado)
+    def get_embedding_cache_stats(self):
+        details_agent = self.agent_dict.get("details_agent")
+        embedding_cache = getattr(details_agent, "embedding_cache", None)
+        return embedding_cache.stats() if embedding_cache is not None else None
+
+    # Método para obter as estatísticas do micro-batching de embeddings (None se desativado)
+    def get_embedding_batcher_stats(self):
+        details_agent = self.agent_dict.get("details_agent")
+        embedding_client = getattr(details_agent, "embedding_client", None)
+        return embedding_client.stats() if isinstance(embedding_client, EmbeddingBatcher) else None
+
+    # Método para obter as estatísticas do caminho rápido de produtos do Details Agent (None se desativado)
+    def get_product_fast_path_stats(self):
+        details_agent = self.agent_dict.get("details_agent")
+        product_matcher = getattr(details_agent, "product_matcher", None)
+        return product_matcher.stats() if product_matcher is not None else None
+
+    # Método para obter as estatísticas do cache de resultados da busca do Details Agent (None se desativado)
+    def get_retrieval_cache_stats(self):
+        details_agent = self.agent_dict.get("details_agent")
+        retrieval_cache = getattr(details_agent, "retrieval_cache", None)
+        return retrieval_cache.stats() if retrieval_cache is not None else None
+
+    # Método para obter as estatísticas de tokens do contexto do Details Agent
+    def get_details_context_stats(self):
+        details_agent = self.agent_dict.get("details_agent")
+        context_assembler = getattr(details_agent, "context_assembler", None)
+        return context_assembler.stats() if context_assembler is not None else None
+
+    # Método para obter as estatísticas das respostas prontas (FAQ) do Details Agent (None se desativadas)
+    def get_faq_stats(self):
+        details_agent = self.agent_dict.get("details_agent")
+        faq_store = getattr(details_agent, "faq_store", None)
+        return faq_store.stats() if faq_store is not None else None
+
     # Método para obter uma resposta do LLM
-    # Executa os agentes em sequência (Guard Agent -> Classification Agent -> Agente escolhido (Details, Recommendation ou Order Taking))
-    def get_response(self, input):
+    # Executa os agentes em sequência (roteamento: Guard Agent + Classification Agent -> Agente escolhido (Details, Recommendation ou Order Taking))
+    # Método assíncrono: enquanto um agente aguarda o LLM, o event loop atende outras requisições
+    async def get_response(self, input):
         # Extrair input do usuário para ser usado com serverless
         job_input = input['input']
         messages = job_input['messages']
 
-        # Executar Guard Agent
-        guard_agent_response = self.guard_agent.get_response(messages)
+        # Execução especulativa: iniciar o agente previsto junto com o roteamento
+        predicted_agent = None
+        speculative_task = None
+        if self.speculative_execution:
+            predicted_agent = self.predict_agent(messages)
+            if predicted_agent is not None:
+                speculative_task = asyncio.create_task(
+                    self.agent_dict[predicted_agent].get_response(messages))
+                self.speculation_stats["speculations"] += 1
+
+        # Executar Guard Agent e Classification Agent
+        try:
+            guard_agent_response, classification_agent_response = await self.route(
+                messages)
+        except BaseException:
+            if speculative_task is not None:
+                await cancel_task(speculative_task)
+            raise
         # Se o Guard Agent decidir que mensagem não é relevante pro contexto do negócio, retorna sua resposta ao usuário e encerra o método
         if guard_agent_response['memory']['guard_decision'] == 'not allowed':
+            if speculative_task is not None:
+                await cancel_task(speculative_task)
+                self.speculation_stats["guard_rejections"] += 1
+                self.speculation_stats["wasted_calls"] += 1
             return  # encerrar método
 
-        # Executar Classification Agent
-        classification_agent_response = self.classification_agent.get_response(
-            messages)
         # Agente escolhido pelo classificador
         chosen_agent = classification_agent_response["memory"]["classification_decision"]
 
+        if speculative_task is not None:
+            # Previsão confirmada: aproveitar o resultado especulativo
+            if chosen_agent == predicted_agent:
+                self.speculation_stats["hits"] += 1
+                return await speculative_task
+            # Previsão errada: descartar a execução especulativa e seguir o fluxo normal
+            await cancel_task(speculative_task)
+            self.speculation_stats["misses"] += 1
+            self.speculation_stats["wasted_calls"] += 1
+
         # Executar o agente escolhido (Details, Recommendation ou Order Taking)
         agent = self.agent_dict[chosen_agent]
         # Resposta do agente escolhido: acessar seu método `get_response`
-        response = agent.get_response(messages)
+        response = await agent.get_response(messages)
 
         # Retornar mensagem ao usuário
         return response
+
+    # Método para obter a resposta em streaming (usado pelo endpoint /chat/stream)
+    # O roteamento (Guard Agent + Classification Agent) termina antes; depois, os pedaços de texto do agente escolhido
+    # são repassados à medida que o LLM os gera. Produz ("token", texto) e, por último, ("final", resposta completa)
+    # ("final", None) indica que a mensagem não foi permitida pelo Guard Agent
+    # A execução especulativa não é usada: o agente só começa a gerar texto depois da decisão do classificador
+    async def stream_response(self, input):
+        messages = input['input']['messages']
+
+        guard_agent_response, classification_agent_response = await self.route(
+            messages)
+        if guard_agent_response['memory']['guard_decision'] == 'not allowed':
+            yield "final", None
+            return
+
+        chosen_agent = classification_agent_response["memory"]["classification_decision"]
+        agent = self.agent_dict[chosen_agent]
+        async for event in agent.stream_response(messages):
+            yield event
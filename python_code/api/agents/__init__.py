@@ -1,6 +1,29 @@
-from .guard_agent import GuardAgent
-from .classification_agent import ClassificationAgent
-from .details_agent import DetailsAgent
-from .agent_protocol import AgentProtocol
-from .recommendation_agent import RecommendationAgent
-from .order_taking_agent import OrderTakingAgent
\ No newline at end of file
+# Importação preguiçosa dos agentes (PEP 562): cada módulo só é carregado quando a classe é acessada
+# Assim, `from agents.embedding_model import ...` (scripts, benchmarks, testes) não carrega todos os agentes
+# e suas dependências (openai, pandas, ...), e `from agents import GuardAgent` continua funcionando
+import importlib
+
+# Classe -> módulo do pacote que a define
+_AGENT_MODULES = {
+    "GuardAgent": ".guard_agent",
+    "ClassificationAgent": ".classification_agent",
+    "DetailsAgent": ".details_agent",
+    "AgentProtocol": ".agent_protocol",
+    "RecommendationAgent": ".recommendation_agent",
+    "OrderTakingAgent": ".order_taking_agent",
+    "RouterAgent": ".router_agent",
+}
+
+__all__ = list(_AGENT_MODULES)
+
+
+def __getattr__(name):
+    if name not in _AGENT_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_AGENT_MODULES[name], __name__), name)
+    globals()[name] = value  # próximos acessos não passam por __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
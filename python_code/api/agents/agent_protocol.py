@@ -1,16 +1,30 @@
 # permite usar tipagem opcional (igual ao TypeScript)
-from typing import Protocol, List, Dict, Any
+from typing import Protocol, List, Dict, Any, AsyncIterator, Tuple
 
 
 class AgentProtocol(Protocol):
     #
-    def get_response(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def get_response(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
         # Docstring
         '''
-        Função para obter uma resposta do chatbot.
+        Função assíncrona para obter uma resposta do chatbot.
 
         Parameters:
         self (Any): ...
         messages (List[Dict[str, Any]]): Lista de mensagens enviadas para o LLM. Cada mensagem é um dicionário com as chaves "role" e "content".
         '''
         ...
+
+    def stream_response(self, messages: List[Dict[str, Any]]) -> AsyncIterator[Tuple[str, Any]]:
+        # Docstring
+        '''
+        Gerador assíncrono para obter a resposta do chatbot em streaming.
+
+        Parameters:
+        self (Any): ...
+        messages (List[Dict[str, Any]]): Lista de mensagens enviadas para o LLM.
+
+        Yields:
+        Tuple[str, Any]: ("token", texto) a cada pedaço gerado pelo LLM e, por último, ("final", resposta completa).
+        '''
+        ...
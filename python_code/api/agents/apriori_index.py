@@ -0,0 +1,126 @@
+# Índice das recomendações Apriori (regras "quem compra X também compra Y") usado pelo Recommendation Agent
+# As regras de apriori_recommendation.json são compiladas uma vez, na carga, em arrays com ids inteiros:
+# - produtos e categorias viram ids (posição nas listas `products` e `categories`); os arrays (módulo `array`) guardam
+#   os valores de forma compacta e devolvem ints/floats do Python sem conversão na consulta
+# - as regras de cada produto (antecedente) ficam contíguas e já ordenadas pela confiança (formato CSR:
+#   `rule_offsets[id]:rule_offsets[id + 1]` são as regras do produto `id`)
+# Na consulta, as listas dos produtos da cesta são intercaladas com um heap (só as primeiras regras de cada uma são
+# lidas), com conjuntos para ignorar produtos repetidos e um contador por categoria (máximo por categoria)
+import heapq
+import json
+from array import array
+
+
+class AprioriIndex():
+    # Método construtor: compilar as regras
+    # `rules`: produto -> [{"product", "product_category", "confidence"}, ...] (formato de apriori_recommendation.json)
+    def __init__(self, rules):
+        self.products = []  # id -> nome do produto
+        self.product_ids = {}  # nome do produto -> id
+        self.categories = []  # id -> nome da categoria
+        category_ids = {}
+        product_categories = {}  # id do produto -> id da categoria
+
+        def get_product_id(product):
+            if product not in self.product_ids:
+                self.product_ids[product] = len(self.products)
+                self.products.append(product)
+            return self.product_ids[product]
+
+        for antecedent in rules:
+            get_product_id(antecedent)
+        # Regras de cada antecedente ordenadas pela confiança (ordenação estável: empates mantêm a ordem do arquivo)
+        sorted_rules = {}
+        for antecedent, antecedent_rules in rules.items():
+            sorted_rules[self.product_ids[antecedent]] = sorted(
+                antecedent_rules, key=lambda rule: rule["confidence"], reverse=True)
+            for rule in antecedent_rules:
+                product_id = get_product_id(rule["product"])
+                if rule["product_category"] not in category_ids:
+                    category_ids[rule["product_category"]] = len(self.categories)
+                    self.categories.append(rule["product_category"])
+                product_categories[product_id] = category_ids[rule["product_category"]]
+
+        # Categoria de cada produto (-1: produto que só aparece como antecedente)
+        self.product_categories = array("i", [-1]) * len(self.products)
+        for product_id, category_id in product_categories.items():
+            self.product_categories[product_id] = category_id
+
+        # Regras no formato CSR
+        self.rule_offsets = array("q", [0])
+        self.rule_products = array("i")
+        self.rule_confidences = array("d")
+        for product_id in range(len(self.products)):
+            for rule in sorted_rules.get(product_id, []):
+                self.rule_products.append(self.product_ids[rule["product"]])
+                self.rule_confidences.append(rule["confidence"])
+            self.rule_offsets.append(len(self.rule_products))
+
+    # Método para criar o índice a partir de um arquivo apriori_recommendation.json
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r") as file:
+            return cls(json.load(file))
+
+    # Método para obter as recomendações para os produtos de uma cesta
+    # Mesmo resultado da ordenação de todas as regras da cesta pela confiança: maior confiança primeiro, e em empates,
+    # a ordem dos produtos da cesta e das regras no arquivo; produtos repetidos são ignorados;
+    # no máximo `max_per_category` produtos por categoria
+    def recommend(self, products, top_k=5, max_per_category=2):
+        recommendations = []
+        if top_k <= 0:
+            return recommendations
+        rule_products = self.rule_products
+        product_categories = self.product_categories
+        seen = set()  # produtos já considerados (recomendados ou descartados pelo limite da categoria)
+        category_counts = {}
+        for position in self.iter_rules(products):
+            product_id = rule_products[position]
+            if product_id in seen:
+                continue
+            seen.add(product_id)
+            # Limitar `max_per_category` recomendações por categoria
+            category_id = product_categories[product_id]
+            count = category_counts.get(category_id, 0)
+            if count >= max_per_category:
+                continue
+            category_counts[category_id] = count + 1
+            recommendations.append(self.products[product_id])
+            if len(recommendations) >= top_k:
+                break
+        return recommendations
+
+    # Método para percorrer as regras dos produtos de uma cesta (posições nos arrays), da maior confiança à menor
+    # As listas (já ordenadas) são intercaladas sob demanda com um heap; quando sobra uma lista, ela é lida direto
+    def iter_rules(self, products):
+        rule_offsets = self.rule_offsets
+        rule_confidences = self.rule_confidences
+
+        # Heap com a próxima regra de cada antecedente: (-confiança, posição do antecedente na cesta, posição da regra, fim)
+        heap = []
+        antecedents = set()
+        for product in products:
+            product_id = self.product_ids.get(product)
+            if product_id is None or product_id in antecedents:
+                continue
+            antecedents.add(product_id)
+            start, end = rule_offsets[product_id], rule_offsets[product_id + 1]
+            if start < end:
+                heap.append((-rule_confidences[start], len(antecedents), start, end))
+        heapq.heapify(heap)
+
+        while len(heap) > 1:
+            _, order, position, end = heap[0]
+            # Avançar a lista deste antecedente
+            if position + 1 < end:
+                heapq.heapreplace(
+                    heap, (-rule_confidences[position + 1], order, position + 1, end))
+            else:
+                heapq.heappop(heap)
+            yield position
+        if heap:
+            yield from range(heap[0][2], heap[0][3])
+
+    # Número de regras compiladas
+    def __len__(self):
+        return len(self.rule_products)
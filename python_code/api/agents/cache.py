@@ -0,0 +1,105 @@
+# Caches em memória (processo) usados pelos agentes
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .utils import get_env_flag
+
+
+# Cache LRU com tamanho limitado, tempo de vida (TTL) opcional e contadores de acertos/falhas
+class LRUCache():
+    # Método construtor
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max_size  # número máximo de entradas
+        self.ttl = ttl  # tempo de vida de cada entrada em segundos (None: sem expiração)
+        self.entries = OrderedDict()  # chave -> (instante de expiração, valor)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Lock: o cache pode ser usado a partir de threads (ex.: asyncio.to_thread)
+        self.lock = threading.Lock()
+
+    # Método para obter um valor do cache (retorna `default` se não existir ou tiver expirado)
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                # Entrada expirada: remover
+                del self.entries[key]
+                self.misses += 1
+                return default
+            # Marcar como usada recentemente
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    # Método para armazenar um valor no cache (remove a entrada menos usada se estiver cheio)
+    def set(self, key, value):
+        with self.lock:
+            expires_at = time.monotonic() + self.ttl if self.ttl else None
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    # Método para limpar o cache
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    # Método para obter as estatísticas do cache
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# Função para normalizar o texto de uma mensagem (minúsculas e espaços colapsados)
+def normalize_text(text):
+    return " ".join(str(text).lower().split())
+
+
+# Função para gerar a chave do cache de decisões a partir das mensagens enviadas ao LLM
+# As mensagens incluem o system prompt: se o prompt (ou o modelo) mudar, a chave muda e o cache antigo deixa de ser usado
+def build_decision_cache_key(model_name, input_messages):
+    normalized = [(message["role"], normalize_text(message["content"]))
+                  for message in input_messages]
+    payload = json.dumps([model_name, normalized], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Função para criar o cache de decisões de um agente (Guard, Classification ou Router)
+# Configuração por variáveis de ambiente:
+# - DECISION_CACHE_ENABLED: ativa/desativa para todos os agentes (padrão: desativado)
+# - <PREFIXO>_CACHE_ENABLED: ativa/desativa para um agente (ex.: GUARD_CACHE_ENABLED)
+# - DECISION_CACHE_SIZE: número máximo de entradas por agente (padrão: 1024)
+# - DECISION_CACHE_TTL: tempo de vida das entradas em segundos (padrão: 3600)
+# Retorna None se o cache estiver desativado
+def create_decision_cache(agent_prefix, enabled=None):
+    if enabled is None:
+        enabled = get_env_flag(f"{agent_prefix}_CACHE_ENABLED",
+                               get_env_flag("DECISION_CACHE_ENABLED", False))
+    if not enabled:
+        return None
+    return LRUCache(
+        max_size=int(os.getenv("DECISION_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("DECISION_CACHE_TTL", "3600"))
+    )
@@ -0,0 +1,178 @@
+# Montagem do contexto do Details Agent com orçamento de tokens
+# - Na construção do índice (vector_index_builder.py), textos longos (seção "About Us", menu) são divididos em
+#   trechos de até INDEX_CHUNK_TOKENS tokens, com uma frase/linha de sobreposição entre trechos vizinhos
+# - Na resposta, os trechos encontrados (do mais parecido ao menos parecido) entram no prompt até o orçamento
+#   de tokens (DETAILS_CONTEXT_MAX_TOKENS); frases/linhas repetidas (sobreposição entre trechos) entram uma única vez
+# Os tokens são contados localmente: com o tokenizador do modelo de embeddings exportado (biblioteca `tokenizers`)
+# ou, sem ele, com uma estimativa (sem rede)
+import math
+import os
+import re
+import threading
+
+import dotenv
+
+from .embedding_model import DEFAULT_ONNX_PATH, TOKENIZER_FILE
+
+dotenv.load_dotenv()  # Carregar variáveis de ambiente
+
+# Separadores de unidades de texto: fim de frase ou quebra de linha
+UNIT_SEPARATOR = re.compile(r"((?<=[.!?])[ \t]+|\n+)")
+
+
+# Função para dividir um texto em unidades (frases ou linhas)
+# Retorna [(unidade, separador que vem depois dela), ...]
+def split_units(text):
+    parts = UNIT_SEPARATOR.split(text)
+    units = []
+    for index in range(0, len(parts), 2):
+        separator = parts[index + 1] if index + 1 < len(parts) else ""
+        if parts[index].strip():
+            units.append((parts[index], separator))
+        elif units and separator:
+            units[-1] = (units[-1][0], units[-1][1] + separator)
+    return units
+
+
+# Função para normalizar uma unidade de texto (comparação de conteúdo repetido)
+def normalize_unit(unit):
+    return " ".join(unit.lower().split())
+
+
+# Contador de tokens local
+class TokenCounter():
+    # Método construtor
+    # `tokenizer`: tokenizers.Tokenizer (None: estimativa de ~4 caracteres por token em cada palavra)
+    def __init__(self, tokenizer=None):
+        self.tokenizer = tokenizer
+        if tokenizer is not None:
+            # Contar o texto inteiro (sem truncar nem completar com padding)
+            tokenizer.no_truncation()
+            tokenizer.no_padding()
+
+    # Método para contar os tokens de um texto
+    def count(self, text):
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+        return sum(math.ceil(len(word) / 4) if word[0].isalnum() else 1
+                   for word in re.findall(r"\w+|[^\w\s]", text))
+
+    # Método para contar os tokens de uma lista de mensagens (conteúdo de cada mensagem)
+    def count_messages(self, messages):
+        return sum(self.count(message["content"]) for message in messages)
+
+
+# Função para criar o contador de tokens
+# - CONTEXT_TOKENIZER_PATH: tokenizer.json (biblioteca `tokenizers`); padrão: o do modelo ONNX exportado, se existir
+# Sem tokenizador (ou sem a biblioteca), usa a estimativa
+def create_token_counter(path=None):
+    if path is None:
+        path = os.getenv("CONTEXT_TOKENIZER_PATH") or os.path.join(
+            os.getenv("EMBEDDING_ONNX_PATH") or DEFAULT_ONNX_PATH, TOKENIZER_FILE)
+    if os.path.exists(path):
+        try:
+            from tokenizers import Tokenizer
+            return TokenCounter(Tokenizer.from_file(path))
+        except Exception as e:
+            print(f"Aviso: tokenizador {path} indisponível ({e}); usando a estimativa de tokens")
+    return TokenCounter()
+
+
+# Função para dividir um texto em trechos de até `max_tokens` tokens, sem cortar frases/linhas
+# Trechos vizinhos repetem a última unidade do anterior (`overlap` unidades), para não separar informações relacionadas
+def chunk_text(text, token_counter, max_tokens=128, overlap=1):
+    units = split_units(text)
+    counts = [token_counter.count(unit) for unit, _ in units]
+    chunks = []
+    start = 0
+    while start < len(units):
+        end = start
+        tokens = 0
+        # Pelo menos uma unidade por trecho (mesmo que passe do limite)
+        while end < len(units) and (end == start or tokens + counts[end] <= max_tokens):
+            tokens += counts[end]
+            end += 1
+        chunks.append("".join(unit + separator for unit, separator in units[start:end]).strip())
+        if end >= len(units):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+class ContextAssembler():
+    # Método construtor
+    # `max_tokens`: orçamento de tokens do contexto (trechos do armazenamento vetorial) no prompt
+    def __init__(self, token_counter, max_tokens=512):
+        self.token_counter = token_counter
+        self.max_tokens = max_tokens
+        # Estatísticas acumuladas (economia de tokens)
+        self.requests = 0
+        self.prompt_tokens = 0  # tokens das mensagens enviadas ao LLM
+        self.context_tokens = 0  # tokens do contexto montado
+        self.candidate_tokens = 0  # tokens dos trechos encontrados, antes do orçamento e da remoção de repetições
+        self.lock = threading.Lock()
+
+    # Método para montar o contexto a partir dos documentos encontrados (do mais parecido ao menos parecido)
+    # Retorna (contexto, número de tokens do contexto)
+    def assemble(self, documents):
+        seen = set()
+        parts = []
+        tokens = 0
+        candidate_tokens = sum(self.token_counter.count(document)
+                               for document in documents)
+        for document in documents:
+            # Unidades ainda não incluídas (a sobreposição entre trechos entra uma única vez)
+            units = []
+            for unit, separator in split_units(document.strip()):
+                key = normalize_unit(unit)
+                if key not in seen:
+                    seen.add(key)
+                    units.append((unit, separator))
+            # Preencher o orçamento unidade por unidade (o último documento pode entrar pela metade)
+            text = ""
+            for unit, separator in units:
+                unit_tokens = self.token_counter.count(unit)
+                if tokens + unit_tokens > self.max_tokens:
+                    break
+                text += unit + separator
+                tokens += unit_tokens
+            if text.strip():
+                parts.append(text.strip())
+            if tokens >= self.max_tokens or len(text) < sum(len(unit) + len(separator) for unit, separator in units):
+                break
+        with self.lock:
+            self.candidate_tokens += candidate_tokens
+        return "\n\n".join(parts), tokens
+
+    # Método para registrar os tokens de um prompt (um por requisição) e exibi-los no log
+    def record(self, prompt_tokens, context_tokens):
+        with self.lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.context_tokens += context_tokens
+        print(f"Details Agent: prompt com {prompt_tokens} tokens "
+              f"(contexto: {context_tokens}/{self.max_tokens})")
+
+    # Método para obter as estatísticas (médias por requisição)
+    def stats(self):
+        with self.lock:
+            requests = self.requests
+            return {
+                "requests": requests,
+                "max_context_tokens": self.max_tokens,
+                "tokenizer": "local" if self.token_counter.tokenizer is not None else "estimate",
+                "average_prompt_tokens": self.prompt_tokens / requests if requests else 0.0,
+                "average_context_tokens": self.context_tokens / requests if requests else 0.0,
+                "average_candidate_tokens": self.candidate_tokens / requests if requests else 0.0,
+            }
+
+
+# Função para criar o montador de contexto configurado nas variáveis de ambiente
+# - DETAILS_CONTEXT_MAX_TOKENS: orçamento de tokens do contexto (padrão: 512)
+def create_context_assembler(token_counter=None):
+    return ContextAssembler(
+        token_counter if token_counter is not None else create_token_counter(),
+        max_tokens=int(os.getenv("DETAILS_CONTEXT_MAX_TOKENS", "512")),
+    )
@@ -1,14 +1,21 @@
+import asyncio
 import json
 import numpy as np
 import os
+import threading
 from copy import deepcopy
 import dotenv
-from openai import OpenAI
+from .llm_client import create_llm_client
 # Importar funções utilitárias
-from .utils import get_chatbot_response, get_embedding
-from pinecone import Pinecone  # Importar o cliente Pinecone
-# Importar SentenceTransformer para embeddings locais
-from sentence_transformers import SentenceTransformer
+from .utils import get_chatbot_response, get_embedding, stream_chatbot_response
+from .vector_store import create_vector_store
+from .embedding_cache import create_embedding_cache
+from .embedding_batcher import create_embedding_batcher
+from .embedding_model import LazyEmbeddingModel
+from .product_matcher import create_product_matcher
+from .retrieval_cache import create_retrieval_cache
+from .context_assembler import create_context_assembler
+from .faq_store import create_faq_store
 
 dotenv.load_dotenv()  # Carregar variáveis de ambiente
 
@@ -17,62 +24,119 @@ dotenv.load_dotenv()  # Carregar variáveis de ambiente
 
 class DetailsAgent():
     # Método construtor
-    def __init__(self):
-        # Inicializar o cliente OpenAI com a chave de API e a URL base
-        self.client = OpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url=os.getenv("CHATBOT_URL")
-        )
+    def __init__(self, client=None):
+        # Cliente LLM: compartilhado (injetado pelo AgentController) ou próprio, se não for informado
+        self.client = client if client is not None else create_llm_client()
         # Carregar o modelo a partir das variáveis de ambiente
         self.model_name = os.getenv("MODEL_NAME")
 
-        # Cliente de embeddings usando SentenceTransformer (processamento local)
+        # Cliente de embeddings (processamento local): SentenceTransformer ou ONNX, conforme EMBEDDING_BACKEND
+        # Carregamento adiado: o modelo é carregado no warm-up da API (método `load`) ou no primeiro uso
         self.embedding_model_name = os.getenv("EMBEDDING_MODEL_NAME")
-        self.embedding_client = SentenceTransformer(self.embedding_model_name)
-
-        # Cliente Pinecone
-        self.pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-        self.index_name = os.getenv("PINECONE_INDEX_NAME")
+        self.embedding_model = LazyEmbeddingModel(self.embedding_model_name)
+        # Micro-batching (se ativado): junta os embeddings de requisições concorrentes em um único lote
+        self.embedding_client = create_embedding_batcher(self.embedding_model)
+        # Cache dos embeddings das perguntas (perguntas repetidas não são recalculadas)
+        self.embedding_cache = create_embedding_cache(
+            self.embedding_model_name)
+
+        # Armazenamento vetorial (local ou Pinecone, conforme VECTOR_STORE_BACKEND): também criado no warm-up ou no primeiro uso
+        self.vector_store = None
+        self.vector_store_lock = threading.Lock()
+        # Cache dos resultados da busca (chave: embedding quantizado + versão do índice)
+        self.retrieval_cache = create_retrieval_cache()
+
+        # Caminho rápido: perguntas que citam um produto pelo nome usam o registro do produto, sem busca vetorial
+        self.product_matcher = create_product_matcher()
+
+        # Montagem do contexto: trechos encontrados (até DETAILS_RETRIEVAL_TOP_K) entram no prompt até o orçamento de tokens
+        self.retrieval_top_k = int(os.getenv("DETAILS_RETRIEVAL_TOP_K", "4"))
+        self.context_assembler = create_context_assembler()
+
+        # Respostas prontas (FAQ): horários, localização e entregas respondidos sem o LLM (índice do faq_builder.py)
+        self.faq_store = create_faq_store(self.embedding_model_name)
+
+    # Método para carregar o modelo de embeddings e o armazenamento vetorial (warm-up)
+    # Bloqueante: em código assíncrono, chamar via `asyncio.to_thread`
+    def load(self):
+        self.embedding_model.load()
+        self.get_vector_store()
+
+    # Verifica se o modelo de embeddings e o armazenamento vetorial já foram carregados
+    @property
+    def loaded(self):
+        return self.embedding_model.loaded and self.vector_store is not None
+
+    # Método para obter o armazenamento vetorial
+    # Criado no primeiro uso e recriado quando o índice em disco muda (nova versão gravada pelo vector_index_builder.py)
+    def get_vector_store(self):
+        vector_store = self.vector_store
+        if vector_store is None or vector_store.is_stale():
+            with self.vector_store_lock:
+                if self.vector_store is None or self.vector_store.is_stale():
+                    self.vector_store = create_vector_store()
+                vector_store = self.vector_store
+        return vector_store
 
     # Método para obter o resultado mais próximo segundo o embedding
-    def get_closest_result(self, index_name, input_embeddings: list, top_k=2):
-        # Certificar-se de que os embeddings estão no formato de lista
-        if isinstance(input_embeddings, np.ndarray):
-            input_embeddings = input_embeddings.tolist()
-
-        # Obter o índice do Pinecone
-        index = self.pc.Index(index_name)
-
-        # Resultados: consulta no índice do Pinecone
-        results = index.query(
-            namespace="ns1",  # namespace do Pinecone
-            vector=input_embeddings,  # embeddings de entrada
-            top_k=top_k,  # número de resultados mais próximos
-            # não incluir valores na resposta (os embeddings em si)
-            include_values=False,
-            # incluir metadados (texto legível para humanos)
-            include_metadata=True,
-        )
-        return results
+    # Resultados de buscas repetidas vêm do cache, enquanto a versão do índice for a mesma
+    # (versão desconhecida, ex.: registro de versão ausente no Pinecone: sem cache, pois uma atualização não seria percebida)
+    def get_closest_result(self, input_embeddings, top_k=2):
+        vector_store = self.get_vector_store()
+        version = vector_store.version
+        if self.retrieval_cache is None or version is None:
+            return vector_store.query(input_embeddings, top_k=top_k)
+
+        result = self.retrieval_cache.get(input_embeddings, top_k, version)
+        if result is None:
+            result = vector_store.query(input_embeddings, top_k=top_k)
+            self.retrieval_cache.set(input_embeddings, top_k, version, result)
+        return result
+
+    # Método para obter a resposta pronta (FAQ) da última mensagem do usuário, sem chamar o LLM
+    # Retorna None se não houver índice de FAQ ou se a pergunta não for parecida o bastante com uma pergunta canônica
+    async def get_faq_response(self, messages):
+        if self.faq_store is None:
+            return None
+        user_message = messages[-1]['content']
+        # Mesmo embedding (e cache) da busca no armazenamento vetorial: não é recalculado se a pergunta seguir o fluxo normal
+        embeddings = (await asyncio.to_thread(
+            get_embedding, self.embedding_client, user_message, self.embedding_cache))[0]
+        match = self.faq_store.match(embeddings, user_message)
+        if match is None:
+            return None
+        entry, _ = match
+        output = self.postprocess(entry['answer'])
+        output['memory']['faq'] = entry['id']
+        return output
 
-    # Método para obter a resposta do modelo
-    def get_response(self, messages):
+    # Método para montar as mensagens enviadas ao LLM (busca do contexto no armazenamento vetorial + system prompt)
+    async def build_input_messages(self, messages):
         # Deepcopy para evitar mutações indesejadas
         messages = deepcopy(messages)
 
         # Mensagem do usuário
         user_message = messages[-1]['content']
-        # Obter embeddings da mensagem do usuário
-        embeddings = get_embedding(self.embedding_client, user_message)[0]
-        # Resultado mais próximo do Pinecone
-        result = self.get_closest_result(self.index_name, embeddings)
-        # Fonte de conhecimento: resultado mais próximo do Pinecone usado para alimentar o prompt do agente
-        # Obter o texto legível para humanos (metadados) do resultado mais próximo
-        source_knowledge = "\n".join(
-            [x['metadata']['text'].strip()+"\n" for x in result['matches']])
+        # Caminho rápido: registro dos produtos citados pelo nome (None para perguntas abertas)
+        documents = None
+        if self.product_matcher is not None:
+            documents = self.product_matcher.lookup(user_message)
+        if documents is None:
+            # Obter embeddings da mensagem do usuário
+            # (CPU-bound: executado em uma thread para não bloquear o event loop)
+            embeddings = (await asyncio.to_thread(
+                get_embedding, self.embedding_client, user_message, self.embedding_cache))[0]
+            # Resultado mais próximo no armazenamento vetorial (cliente síncrono: também executado em uma thread)
+            result = await asyncio.to_thread(
+                self.get_closest_result, embeddings, self.retrieval_top_k)
+            # Obter o texto legível para humanos (metadados) dos resultados mais próximos
+            documents = [x['metadata']['text'] for x in result['matches']]
+        # Fonte de conhecimento: documentos (do mais parecido ao menos parecido) até o orçamento de tokens, sem repetições
+        source_knowledge, context_tokens = self.context_assembler.assemble(
+            documents)
 
         # Prompt enviado ao agente de detalhes
-        # O prompt é a pergunta do usuário e o contexto (resultado mais próximo do Pinecone)
+        # O prompt é a pergunta do usuário e o contexto (resultado mais próximo no armazenamento vetorial)
         prompt = f"""
             Usando os contextos abaixo, responda a pergunta:
             Contextos:
@@ -89,14 +153,45 @@ class DetailsAgent():
         messages[-1]['content'] = prompt
         input_messages = [
             {'role': 'system', 'content': system_prompt}] + messages[-3:]
+        # Registrar os tokens do prompt (log e métricas)
+        self.context_assembler.record(
+            self.context_assembler.token_counter.count_messages(input_messages), context_tokens)
+        return input_messages
+
+    # Método para obter a resposta do modelo
+    # Perguntas frequentes (FAQ) são respondidas sem o LLM: só depois do roteamento (Guard Agent + classificação),
+    # então mensagens bloqueadas ou de outros agentes não calculam o embedding da FAQ
+    async def get_response(self, messages):
+        faq_response = await self.get_faq_response(messages)
+        if faq_response is not None:
+            return faq_response
+        input_messages = await self.build_input_messages(messages)
 
         # Resposta do chatbot
-        chatbot_output = get_chatbot_response(
+        chatbot_output = await get_chatbot_response(
             self.client, self.model_name, input_messages)
         # Processa a saída do chatbot e a retorna
         output = self.postprocess(chatbot_output)
         return output
 
+    # Método para obter a resposta do modelo em streaming
+    # Produz ("token", texto) a cada pedaço gerado pelo LLM e, por último, ("final", resposta completa)
+    # Respostas prontas (FAQ): a resposta inteira é enviada em um único pedaço
+    async def stream_response(self, messages):
+        faq_response = await self.get_faq_response(messages)
+        if faq_response is not None:
+            yield "token", faq_response['content']
+            yield "final", faq_response
+            return
+        input_messages = await self.build_input_messages(messages)
+
+        chunks = []
+        async for delta in stream_chatbot_response(
+                self.client, self.model_name, input_messages):
+            chunks.append(delta)
+            yield "token", delta
+        yield "final", self.postprocess("".join(chunks))
+
     # Método para processar a saída do chatbot
     def postprocess(self, output):
         output = {
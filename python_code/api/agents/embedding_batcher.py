@@ -0,0 +1,124 @@
+# Micro-batching dos embeddings entre requisições concorrentes
+# Cada requisição do Details Agent calcula o embedding de uma única pergunta; com várias requisições ao mesmo tempo,
+# o EmbeddingBatcher junta as chamadas recebidas em uma janela curta (ou até o tamanho máximo do lote),
+# calcula todas em um único `encode` em uma thread dedicada e devolve a cada chamador as suas linhas
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from .utils import get_env_flag
+
+
+class EmbeddingBatcher():
+    # Método construtor
+    # `embedding_client`: modelo de embeddings (SentenceTransformer)
+    # `max_batch_size`: número máximo de textos por lote
+    # `max_wait`: tempo máximo (segundos) que o primeiro texto de um lote espera por outros
+    def __init__(self, embedding_client, max_batch_size=32, max_wait=0.005):
+        self.embedding_client = embedding_client
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = queue.Queue()  # (textos, Future)
+        self.batches = 0
+        self.texts = 0
+        self.lock = threading.Lock()
+        self.closed = False
+        # Thread dedicada: só ela chama o modelo (sem disputa de CPU entre requisições)
+        self.worker = threading.Thread(
+            target=self.run, name="embedding-batcher", daemon=True)
+        self.worker.start()
+
+    # Método com a mesma interface do SentenceTransformer.encode (usado por get_embedding)
+    # Bloqueia até o lote com os textos ser calculado: em código assíncrono, chamar via `asyncio.to_thread`
+    def encode(self, text_input, convert_to_numpy=True, **kwargs):
+        if isinstance(text_input, str):
+            text_input = [text_input]
+        if self.closed:
+            raise RuntimeError("EmbeddingBatcher encerrado")
+        future = Future()
+        self.requests.put((list(text_input), future))
+        return future.result()
+
+    # Loop da thread dedicada: montar lotes e calcular os embeddings
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            batch = [request]
+            size = len(request[0])
+            deadline = time.monotonic() + self.max_wait
+            # Juntar outras chamadas até encher o lote ou acabar a janela
+            while size < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self.requests.put(None)  # encerrar depois deste lote
+                    break
+                batch.append(request)
+                size += len(request[0])
+            self.encode_batch(batch)
+
+    # Método para calcular os embeddings de um lote e devolver a cada chamador as suas linhas
+    def encode_batch(self, batch):
+        texts = [text for request_texts, _ in batch for text in request_texts]
+        try:
+            embeddings = np.asarray(self.embedding_client.encode(
+                texts, batch_size=len(texts), convert_to_numpy=True))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self.lock:
+            self.batches += 1
+            self.texts += len(texts)
+        start = 0
+        for request_texts, future in batch:
+            future.set_result(embeddings[start:start + len(request_texts)])
+            start += len(request_texts)
+
+    # Método para encerrar a thread dedicada (as chamadas já na fila são concluídas)
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.requests.put(None)
+            self.worker.join()
+
+    # Método para obter as estatísticas do batcher
+    def stats(self):
+        with self.lock:
+            return {
+                "batches": self.batches,
+                "texts": self.texts,
+                "average_batch_size": self.texts / self.batches if self.batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "window_ms": self.max_wait * 1000,
+            }
+
+
+# Função para envolver o modelo de embeddings com o micro-batching (se ativado)
+# Configuração por variáveis de ambiente:
+# - EMBEDDING_BATCHING_ENABLED: ativa o micro-batching (padrão: desativado)
+# - EMBEDDING_BATCH_WINDOW_MS: janela de espera por outras chamadas em milissegundos (padrão: 5)
+# - EMBEDDING_MAX_BATCH_SIZE: número máximo de textos por lote (padrão: 32)
+# Retorna o próprio modelo se o micro-batching estiver desativado
+def create_embedding_batcher(embedding_client, enabled=None):
+    if enabled is None:
+        enabled = get_env_flag("EMBEDDING_BATCHING_ENABLED", False)
+    if not enabled:
+        return embedding_client
+    return EmbeddingBatcher(
+        embedding_client,
+        max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32")),
+        max_wait=float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5")) / 1000,
+    )
@@ -0,0 +1,136 @@
+# Cache dos embeddings das perguntas dos usuários (get_embedding)
+# Camada em memória (LRU) + camada persistente opcional em disco (SQLite), para que um worker reiniciado
+# não precise recalcular os embeddings das perguntas mais frequentes
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from .cache import LRUCache, normalize_text
+from .utils import get_env_flag
+
+
+class EmbeddingCache():
+    # Método construtor
+    # `model_name`: modelo de embeddings (faz parte da chave: trocar o modelo invalida o cache)
+    # `persistent_path`: arquivo SQLite da camada persistente (None: apenas memória)
+    # `persistent_size`: número máximo de embeddings na camada persistente
+    def __init__(self, model_name, max_size=4096, persistent_path=None, persistent_size=100_000):
+        self.model_name = model_name
+        self.memory = LRUCache(max_size=max_size)
+        self.persistent_path = persistent_path
+        self.persistent_size = persistent_size
+        self.persistent_hits = 0
+        self.persistent_misses = 0
+        self.connection = None
+        # Lock: a conexão SQLite é compartilhada entre threads (get_embedding roda via asyncio.to_thread)
+        self.lock = threading.Lock()
+        if persistent_path:
+            os.makedirs(os.path.dirname(
+                os.path.abspath(persistent_path)), exist_ok=True)
+            self.connection = sqlite3.connect(
+                persistent_path, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, embedding BLOB NOT NULL, dimension INTEGER NOT NULL, last_used REAL NOT NULL)")
+            self.connection.commit()
+
+    # Método para gerar a chave de um texto (texto normalizado + modelo)
+    def build_key(self, text):
+        payload = f"{self.model_name}\0{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # Método para obter o embedding de um texto (None se não estiver no cache)
+    def get(self, text):
+        key = self.build_key(text)
+        embedding = self.memory.get(key)
+        if embedding is not None or self.connection is None:
+            return embedding
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT embedding FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.persistent_misses += 1
+                return None
+            self.persistent_hits += 1
+            self.connection.execute(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.connection.commit()
+        embedding = np.frombuffer(row[0], dtype=np.float32)
+        # Promover para a camada em memória
+        self.memory.set(key, embedding)
+        return embedding
+
+    # Método para armazenar o embedding de um texto nas duas camadas
+    def set(self, text, embedding):
+        key = self.build_key(text)
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)  # o mesmo array é devolvido a vários chamadores
+        self.memory.set(key, embedding)
+        if self.connection is None:
+            return
+
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO embeddings (key, embedding, dimension, last_used) VALUES (?, ?, ?, ?)",
+                (key, embedding.tobytes(), embedding.shape[0], time.time()))
+            # Limitar o tamanho: remover os embeddings usados há mais tempo
+            self.connection.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.persistent_size,))
+            self.connection.commit()
+
+    # Método para limpar o cache (as duas camadas)
+    def clear(self):
+        self.memory.clear()
+        if self.connection is not None:
+            with self.lock:
+                self.connection.execute("DELETE FROM embeddings")
+                self.connection.commit()
+
+    # Método para fechar a conexão com a camada persistente
+    def close(self):
+        if self.connection is not None:
+            with self.lock:
+                self.connection.close()
+                self.connection = None
+
+    # Método para obter as estatísticas do cache
+    def stats(self):
+        stats = self.memory.stats()
+        if self.connection is not None:
+            with self.lock:
+                persistent_total = self.persistent_hits + self.persistent_misses
+                stats["persistent"] = {
+                    "size": self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0],
+                    "max_size": self.persistent_size,
+                    "hits": self.persistent_hits,
+                    "misses": self.persistent_misses,
+                    "hit_rate": self.persistent_hits / persistent_total if persistent_total else 0.0,
+                }
+        return stats
+
+
+# Função para criar o cache de embeddings de um modelo
+# Configuração por variáveis de ambiente:
+# - EMBEDDING_CACHE_ENABLED: ativa/desativa o cache (padrão: ativado)
+# - EMBEDDING_CACHE_SIZE: número máximo de embeddings em memória (padrão: 4096)
+# - EMBEDDING_CACHE_PATH: arquivo SQLite da camada persistente (padrão: vazio, sem camada persistente)
+# - EMBEDDING_CACHE_PERSISTENT_SIZE: número máximo de embeddings em disco (padrão: 100000)
+# Retorna None se o cache estiver desativado
+def create_embedding_cache(model_name, enabled=None):
+    if enabled is None:
+        enabled = get_env_flag("EMBEDDING_CACHE_ENABLED", True)
+    if not enabled:
+        return None
+    return EmbeddingCache(
+        model_name,
+        max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "4096")),
+        persistent_path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+        persistent_size=int(
+            os.getenv("EMBEDDING_CACHE_PERSISTENT_SIZE", "100000")),
+    )
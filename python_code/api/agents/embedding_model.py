@@ -0,0 +1,148 @@
+# Modelos de embeddings usados pelo Details Agent (e pelo cache semântico de roteamento)
+# Backends (variável de ambiente EMBEDDING_BACKEND):
+# - "torch": SentenceTransformer (PyTorch)
+# - "onnx": versão do mesmo modelo exportada para ONNX e quantizada em int8 (export_onnx_embedding.py),
+#   executada com o ONNX Runtime na CPU; não importa o PyTorch (menos memória e inicialização mais rápida)
+import json
+import os
+import threading
+import time
+
+import dotenv
+import numpy as np
+
+dotenv.load_dotenv()  # Carregar variáveis de ambiente
+
+# Arquivos do modelo ONNX exportado
+ONNX_MODEL_FILE = "model_quantized.onnx"  # modelo quantizado (int8)
+ONNX_FULL_MODEL_FILE = "model.onnx"  # modelo sem quantização (float32)
+TOKENIZER_FILE = "tokenizer.json"  # tokenizador (biblioteca `tokenizers`)
+EMBEDDING_CONFIG_FILE = "embedding_config.json"  # pooling, normalização e tamanho máximo da sequência
+# Diretório padrão do modelo ONNX exportado
+DEFAULT_ONNX_PATH = os.path.join(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))), "onnx_embedding_model")
+
+
+# Modelo de embeddings ONNX (mesma interface do SentenceTransformer.encode)
+# Reproduz o pipeline do SentenceTransformer: tokenização -> transformer -> pooling -> normalização (se houver)
+class OnnxEmbeddingModel():
+    # Método construtor
+    # `quantized`: usar o modelo int8 (padrão) ou o float32
+    def __init__(self, path=DEFAULT_ONNX_PATH, quantized=True, num_threads=None):
+        import onnxruntime  # dependência usada só por este backend
+        from tokenizers import Tokenizer
+
+        self.path = path
+        with open(os.path.join(path, EMBEDDING_CONFIG_FILE), "r", encoding="utf-8") as file:
+            self.config = json.load(file)
+        self.pooling_mode = self.config["pooling_mode"]  # "cls", "mean" ou "max"
+        self.normalize = self.config["normalize"]
+        self.dimension = self.config["dimension"]
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(path, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(
+            max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(
+            pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        options = onnxruntime.SessionOptions()
+        if num_threads is None and os.getenv("EMBEDDING_ONNX_THREADS"):
+            num_threads = int(os.getenv("EMBEDDING_ONNX_THREADS"))
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        model_file = ONNX_MODEL_FILE if quantized else ONNX_FULL_MODEL_FILE
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(path, model_file), sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    # Método para calcular os embeddings de uma lista de textos (ou de um único texto)
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, **kwargs):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        embeddings = np.zeros((len(sentences), self.dimension), dtype=np.float32)
+
+        # Ordenar por tamanho (como o SentenceTransformer): menos padding em cada lote
+        order = np.argsort([-len(sentence) for sentence in sentences], kind="stable")
+        for start in range(0, len(sentences), batch_size):
+            indexes = order[start:start + batch_size]
+            embeddings[indexes] = self.encode_batch(
+                [sentences[index] for index in indexes])
+        return embeddings[0] if single else embeddings
+
+    # Método para calcular os embeddings de um lote
+    def encode_batch(self, sentences):
+        encodings = self.tokenizer.encode_batch(sentences)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array(
+            [encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.array(
+                [encoding.type_ids for encoding in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Pooling
+        if self.pooling_mode == "cls":
+            embeddings = token_embeddings[:, 0]
+        elif self.pooling_mode == "max":
+            masked = np.where(attention_mask[..., None] == 1, token_embeddings, -1e9)
+            embeddings = masked.max(axis=1)
+        else:
+            mask = attention_mask[..., None].astype(np.float32)
+            embeddings = (token_embeddings * mask).sum(axis=1) / \
+                np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            embeddings = embeddings / np.clip(
+                np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+
+# Função para criar o modelo de embeddings configurado nas variáveis de ambiente
+# - EMBEDDING_BACKEND: "torch" ou "onnx" (padrão: "torch")
+# - EMBEDDING_ONNX_PATH: diretório do modelo ONNX exportado (padrão: api/onnx_embedding_model)
+# - EMBEDDING_ONNX_THREADS: threads do ONNX Runtime (padrão: definido pelo ONNX Runtime)
+def create_embedding_model(model_name=None, backend=None):
+    if backend is None:
+        backend = os.getenv("EMBEDDING_BACKEND", "torch")
+    if backend == "torch":
+        # Importação local: o PyTorch só é carregado se este backend for usado
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name or os.getenv("EMBEDDING_MODEL_NAME"))
+    if backend == "onnx":
+        return OnnxEmbeddingModel(os.getenv("EMBEDDING_ONNX_PATH") or DEFAULT_ONNX_PATH)
+    raise ValueError(
+        f"EMBEDDING_BACKEND inválido: {backend} (use 'torch' ou 'onnx')")
+
+
+# Modelo de embeddings com carregamento adiado: o modelo só é criado no primeiro `encode` ou no `load()`
+# (warm-up da API). Com isso, construir o Details Agent não importa o PyTorch nem lê o modelo do disco
+class LazyEmbeddingModel():
+    # Método construtor
+    def __init__(self, model_name=None, backend=None):
+        self.model_name = model_name
+        self.backend = backend
+        self.model = None
+        self.load_time = None  # segundos gastos para carregar o modelo
+        self.lock = threading.Lock()
+
+    # Método para carregar o modelo (uma única vez, mesmo com várias threads chamando ao mesmo tempo)
+    def load(self):
+        if self.model is None:
+            with self.lock:
+                if self.model is None:
+                    start = time.perf_counter()
+                    self.model = create_embedding_model(
+                        self.model_name, self.backend)
+                    self.load_time = time.perf_counter() - start
+        return self.model
+
+    @property
+    def loaded(self):
+        return self.model is not None
+
+    # Método com a mesma interface do SentenceTransformer.encode (carrega o modelo, se preciso)
+    def encode(self, *args, **kwargs):
+        return self.load().encode(*args, **kwargs)
@@ -0,0 +1,132 @@
+# Respostas prontas para perguntas frequentes sobre a cafeteria (horários, localização, entregas)
+# Construídas offline pelo faq_builder.py a partir do texto "About Us" e de dataset/sales_outlet.csv:
+# cada resposta (modelo preenchido com os dados) tem perguntas canônicas, cujos embeddings ficam em uma matriz.
+# Se a pergunta do usuário for parecida o bastante com uma pergunta canônica (FAQ_CONFIDENCE_THRESHOLD),
+# a resposta é devolvida pelo Details Agent (depois do Guard Agent e da classificação) sem chamar o LLM; abaixo do
+# limiar, o Details Agent segue o fluxo normal (busca no armazenamento vetorial + LLM)
+import json
+import os
+import threading
+
+import dotenv
+import numpy as np
+
+from .product_matcher import normalize_text
+from .utils import get_env_flag
+from .vector_store import normalize_embeddings
+
+dotenv.load_dotenv()  # Carregar variáveis de ambiente
+
+# Arquivos do índice de FAQ
+FAQ_EMBEDDINGS_FILE = "questions.npy"  # matriz (perguntas canônicas, dimensão) com os embeddings normalizados
+FAQ_ENTRIES_FILE = "faq.json"  # modelo de embeddings, respostas e pergunta -> resposta
+# Diretório padrão do índice de FAQ
+DEFAULT_FAQ_PATH = os.path.join(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))), "faq_index")
+
+
+class FaqStore():
+    # Método construtor: carregar o índice salvo em `path`
+    # `threshold`: similaridade de cosseno mínima para responder sem o LLM
+    def __init__(self, path=DEFAULT_FAQ_PATH, threshold=0.9):
+        self.path = path
+        self.threshold = threshold
+        with open(os.path.join(path, FAQ_ENTRIES_FILE), "r", encoding="utf-8") as file:
+            data = json.load(file)
+        self.model_name = data["model_name"]
+        self.entries = data["entries"]
+        # Resposta de cada linha da matriz (cada resposta tem várias perguntas canônicas)
+        self.question_entries = np.array(data["question_entries"], dtype=np.int32)
+        self.embeddings = np.load(os.path.join(path, FAQ_EMBEDDINGS_FILE))
+        if self.embeddings.shape[0] != len(self.question_entries):
+            raise ValueError(
+                f"Índice de FAQ inconsistente em {path}: {len(self.question_entries)} perguntas para {self.embeddings.shape[0]} embeddings")
+
+        self.hits = 0
+        self.misses = 0
+        self.entry_hits = {}  # id da resposta -> acertos
+        self.lock = threading.Lock()
+
+    # Método para buscar a resposta de uma pergunta
+    # `embedding`: embedding da pergunta do usuário; `text`: pergunta (para os termos obrigatórios)
+    # Retorna (resposta, similaridade) ou None se nenhuma pergunta canônica passar do limiar
+    def match(self, embedding, text):
+        scores = self.embeddings @ normalize_embeddings(np.ravel(embedding))
+        normalized = f" {normalize_text(text)} "
+        result = None
+        # Perguntas acima do limiar, da mais parecida à menos parecida
+        candidates = np.flatnonzero(scores >= self.threshold)
+        for index in candidates[np.argsort(-scores[candidates], kind="stable")]:
+            entry = self.entries[self.question_entries[index]]
+            # Respostas que dependem de um termo (ex.: bairro) exigem o termo na pergunta
+            required_terms = entry.get("required_terms") or []
+            if required_terms and not any(f" {term} " in normalized for term in required_terms):
+                continue
+            result = (entry, float(scores[index]))
+            break
+
+        with self.lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entry_hits[result[0]["id"]] = self.entry_hits.get(result[0]["id"], 0) + 1
+        return result
+
+    # Método para salvar um índice de FAQ em `path` (arquivos temporários + renomear) e carregá-lo
+    # `entries`: respostas ({"id", "questions", "answer", ...}); `embeddings`: um embedding por pergunta, na ordem
+    @classmethod
+    def save(cls, path, entries, embeddings, model_name, **kwargs):
+        question_entries = [position for position, entry in enumerate(entries)
+                            for _ in entry["questions"]]
+        embeddings = normalize_embeddings(embeddings)
+        if embeddings.shape[0] != len(question_entries):
+            raise ValueError("É preciso um embedding por pergunta canônica")
+        os.makedirs(path, exist_ok=True)
+
+        embeddings_path = os.path.join(path, FAQ_EMBEDDINGS_FILE)
+        with open(embeddings_path + ".tmp", "wb") as file:
+            np.save(file, embeddings)
+        entries_path = os.path.join(path, FAQ_ENTRIES_FILE)
+        with open(entries_path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump({"model_name": model_name, "entries": entries,
+                       "question_entries": question_entries}, file, ensure_ascii=False, indent=2)
+        os.replace(embeddings_path + ".tmp", embeddings_path)
+        os.replace(entries_path + ".tmp", entries_path)
+        return cls(path, **kwargs)
+
+    # Método para obter as estatísticas das respostas prontas
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "questions": len(self.question_entries),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entry_hits": dict(self.entry_hits),
+            }
+
+
+# Função para criar o índice de FAQ configurado nas variáveis de ambiente (None se desativado ou não construído)
+# - FAQ_ENABLED: ativa as respostas prontas (padrão: true)
+# - FAQ_INDEX_PATH: diretório do índice gerado pelo faq_builder.py (padrão: api/faq_index)
+# - FAQ_CONFIDENCE_THRESHOLD: similaridade mínima para responder sem o LLM (padrão: 0.9)
+# O índice só é usado se tiver sido construído com o mesmo modelo de embeddings (`model_name`)
+def create_faq_store(model_name, enabled=None):
+    if enabled is None:
+        enabled = get_env_flag("FAQ_ENABLED", True)
+    if not enabled:
+        return None
+    path = os.getenv("FAQ_INDEX_PATH") or DEFAULT_FAQ_PATH
+    if not os.path.exists(os.path.join(path, FAQ_ENTRIES_FILE)):
+        return None
+    faq_store = FaqStore(path, threshold=float(
+        os.getenv("FAQ_CONFIDENCE_THRESHOLD", "0.9")))
+    if faq_store.model_name != model_name:
+        print(f"Aviso: índice de FAQ construído com outro modelo de embeddings "
+              f"({faq_store.model_name}); respostas prontas desativadas")
+        return None
+    return faq_store
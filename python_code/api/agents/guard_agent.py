@@ -1,7 +1,9 @@
-from openai import OpenAI
+from .llm_client import create_llm_client
 import os
 import dotenv
-from .utils import get_chatbot_response, double_check_json_output  # utilitários
+from .utils import get_chatbot_response, double_check_json_output, get_structured_chatbot_response, get_env_flag, get_routing_timeout  # utilitários
+from .cache import create_decision_cache, build_decision_cache_key
+from .schemas import GUARD_RESPONSE_FORMAT
 import json
 from copy import deepcopy
 
@@ -10,17 +12,20 @@ dotenv.load_dotenv()  # Carregar variáveis de ambiente
 
 class GuardAgent():
     # Método construtor
-    def __init__(self):
-        # Inicializar o cliente OpenAI com a chave de API e a URL base
-        self.client = OpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url=os.getenv("CHATBOT_URL")
-        )
+    def __init__(self, use_cache=None, client=None):
+        # Cliente LLM: compartilhado (injetado pelo AgentController) ou próprio, se não for informado
+        self.client = client if client is not None else create_llm_client()
         # Carregar o modelo a partir das variáveis de ambiente
         self.model_name = os.getenv("MODEL_NAME")
+        # Modo de saída estruturada (response_format com JSON schema)
+        self.structured_output = get_env_flag("STRUCTURED_OUTPUT", False)
+        # Timeout das chamadas de decisão (LLM_ROUTING_TIMEOUT): menor que o da geração das respostas
+        self.routing_timeout = get_routing_timeout()
+        # Cache de decisões (LRU + TTL); None se desativado (variável GUARD_CACHE_ENABLED ou `use_cache`)
+        self.decision_cache = create_decision_cache("GUARD", use_cache)
 
     # Método para obter a resposta do modelo
-    def get_response(self, messages):
+    async def get_response(self, messages):
         # Deepcopy das mensagens para evitar mutações indesejadas
         messages = deepcopy(messages)
 
@@ -51,13 +56,30 @@ class GuardAgent():
         input_messages = [
             {"role": "system", "content": system_prompt}] + messages[-3:]
 
-        # Resposta do chatbot
-        chatbot_output = get_chatbot_response(
-            self.client, self.model_name, input_messages)
-        chatbot_output = double_check_json_output(
-            self.client, self.model_name, chatbot_output)
+        # Cache de decisões: mesma janela de mensagens (e mesmo system prompt) -> mesma decisão, sem chamar o LLM
+        cache_key = None
+        if self.decision_cache is not None:
+            cache_key = build_decision_cache_key(
+                self.model_name, input_messages)
+            cached_output = self.decision_cache.get(cache_key)
+            if cached_output is not None:
+                return deepcopy(cached_output)
+
+        # Resposta do chatbot: saída estruturada (se ativada) ou resposta livre + verificação do JSON
+        chatbot_output = None
+        if self.structured_output:
+            chatbot_output = await get_structured_chatbot_response(
+                self.client, self.model_name, input_messages, GUARD_RESPONSE_FORMAT,
+                timeout=self.routing_timeout)
+        if chatbot_output is None:
+            chatbot_output = await get_chatbot_response(
+                self.client, self.model_name, input_messages, timeout=self.routing_timeout)
+            chatbot_output = await double_check_json_output(
+                self.client, self.model_name, chatbot_output)
         # Resposta ao usuário:
         output = self.postprocess(chatbot_output)
+        if cache_key is not None:
+            self.decision_cache.set(cache_key, deepcopy(output))
 
         return output
 
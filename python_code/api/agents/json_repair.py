@@ -0,0 +1,231 @@
+# Reparo local (determinístico) das saídas JSON dos agentes
+# Corrige os erros mais comuns do LLM sem uma nova chamada à API:
+# code fences, texto antes/depois do objeto, chaves sem aspas, vírgulas sobrando, quebras de linha dentro das strings
+# e listas em formato Python
+import ast
+import json
+import re
+
+# Chaves conhecidas das saídas JSON dos agentes (Guard, Classification, Router, Recommendation e Order Taking)
+KNOWN_JSON_KEYS = [
+    "chain of thought",
+    "decision",
+    "message",
+    "guard_decision",
+    "classification_decision",
+    "recommendation_type",
+    "parameters",
+    "step number",
+    "order",
+    "response",
+]
+
+# Campos que devem ser listas (o LLM às vezes devolve uma string com uma lista em Python/JSON)
+LIST_FIELDS = ["order", "parameters"]
+
+# Code fences: ```json ... ``` ou ``` ... ```
+CODE_FENCE_PATTERN = re.compile(r"```(?:json|JSON|python)?\s*(.*?)\s*```", re.DOTALL)
+# Chaves conhecidas sem aspas ou com aspas simples, logo após "{", "," ou quebra de linha
+KEY_PATTERN = re.compile(
+    r"([{,\n]\s*)['\"]?(" + "|".join(re.escape(key) for key in KNOWN_JSON_KEYS) + r")['\"]?\s*:")
+# Strings (aspas duplas ou simples) ou vírgula sobrando antes de "}" ou "]" (só fora das strings)
+TRAILING_COMMA_PATTERN = re.compile(
+    r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|,\s*([}\]])')
+# Strings (aspas duplas ou simples) ou literais JSON (true/false/null) fora de strings
+JSON_LITERAL_PATTERN = re.compile(
+    r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|\b(true|false|null)\b')
+PYTHON_LITERALS = {"true": "True", "false": "False", "null": "None"}
+# Sequências de escape simples das strings JSON
+JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b",
+                "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+# Função para converter uma string em lista (JSON ou literal Python). Retorna None se não for possível
+def parse_list_literal(value):
+    for parser in (json.loads, ast.literal_eval):
+        try:
+            parsed = parser(value)
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            continue
+        if isinstance(parsed, (list, tuple)):
+            return list(parsed)
+    return None
+
+
+# Função para remover as vírgulas sobrando antes de "}" ou "]", sem alterar o conteúdo das strings
+def remove_trailing_commas(text):
+    return TRAILING_COMMA_PATTERN.sub(
+        lambda match: match.group(1) if match.group(1) else match.group(0), text)
+
+
+# Função para interpretar o texto como objeto: primeiro JSON, depois literal Python (aspas simples, True/False/None)
+# Quebras de linha literais dentro das strings são aceitas (strict=False)
+def parse_object(text):
+    try:
+        parsed = json.loads(text, strict=False)
+    except json.JSONDecodeError:
+        # Converter true/false/null (fora das strings) para a sintaxe Python
+        python_text = JSON_LITERAL_PATTERN.sub(
+            lambda match: PYTHON_LITERALS[match.group(1)] if match.group(1) else match.group(0), text)
+        try:
+            parsed = ast.literal_eval(python_text)
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+# Função para normalizar os campos que devem ser listas
+def normalize_list_fields(output):
+    for key in LIST_FIELDS:
+        if isinstance(output.get(key), str):
+            parsed = parse_list_literal(output[key])
+            if parsed is not None:
+                output[key] = parsed
+    return output
+
+
+def repair_json_output(json_string):
+    # Docstring
+    '''
+    Função para reparar localmente a saída JSON de um agente.
+
+    Parameters:
+    json_string (str): Saída do LLM que deveria ser um objeto JSON.
+
+    Returns:
+    tuple: (JSON válido como string ou None se o reparo local falhar, True se o texto original já era um JSON válido)
+    '''
+    if not json_string or json_string.strip() == "":
+        return None, False
+
+    # 1- Tentar o JSON original
+    try:
+        parsed = json.loads(json_string)
+        if isinstance(parsed, dict):
+            normalized = normalize_list_fields(dict(parsed))
+            if normalized == parsed:
+                return json_string, True
+            return json.dumps(normalized, ensure_ascii=False), False
+    except json.JSONDecodeError:
+        pass
+
+    text = json_string.strip()
+    # 2- Remover code fences
+    fence_match = CODE_FENCE_PATTERN.search(text)
+    if fence_match:
+        text = fence_match.group(1)
+    text = text.replace("`", "")
+
+    # 3- Remover texto antes da primeira "{" e depois da última "}"
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end <= start:
+        return None, False
+    text = text[start:end + 1]
+
+    # 4- Interpretar como JSON ou literal Python; se falhar, remover as vírgulas sobrando (fora das strings)
+    parsed = parse_object(text)
+    if parsed is None:
+        text = remove_trailing_commas(text)
+        parsed = parse_object(text)
+
+    # 5- Se ainda falhar, colocar as chaves conhecidas entre aspas duplas
+    # (feito por último, pois o padrão também poderia alterar o conteúdo das strings)
+    if parsed is None:
+        text = KEY_PATTERN.sub(
+            lambda match: f'{match.group(1)}"{match.group(2)}":', text)
+        parsed = parse_object(text)
+    if parsed is None:
+        return None, False
+
+    return json.dumps(normalize_list_fields(parsed), ensure_ascii=False), False
+
+
+# Extrator incremental do valor de um campo string de primeiro nível de um objeto JSON
+# Recebe o JSON em pedaços (streaming do LLM) e devolve apenas o texto novo do campo (ex.: "response"),
+# já com as sequências de escape decodificadas, sem esperar o JSON completo
+class JsonFieldStreamer():
+    # Método construtor
+    def __init__(self, field):
+        self.field = field  # nome do campo a ser extraído
+        self.depth = 0  # profundidade de objetos/listas
+        self.in_string = False
+        self.string_is_key = False
+        self.streaming = False  # dentro do valor do campo procurado
+        self.done = False  # valor do campo já terminou
+        self.escape = ""  # sequência de escape incompleta (ex.: "\u00e")
+        self.buffer = []  # conteúdo da string atual (chaves)
+        self.last_key = None
+        self.last_token = ""  # último caractere significativo fora de strings
+
+    # Método para processar um pedaço do JSON e retornar o texto novo do campo
+    def feed(self, chunk):
+        output = []
+        for char in chunk:
+            if self.done:
+                break
+            if self.in_string:
+                if self.escape:
+                    self.escape += char
+                    decoded = self.decode_escape()
+                    if decoded is not None:
+                        self.escape = ""
+                        self.append(decoded, output)
+                elif char == "\\":
+                    self.escape = char
+                elif char == '"':
+                    self.close_string()
+                else:
+                    self.append(char, output)
+            elif char == '"':
+                self.in_string = True
+                self.buffer = []
+                # Chave: string logo após "{" ou "," no primeiro nível do objeto
+                self.string_is_key = self.depth == 1 and self.last_token in ("{", ",")
+                self.streaming = (not self.string_is_key and self.depth == 1
+                                  and self.last_token == ":" and self.last_key == self.field)
+            elif not char.isspace():
+                if char in "{[":
+                    self.depth += 1
+                elif char in "}]":
+                    self.depth -= 1
+                self.last_token = char
+        return "".join(output)
+
+    # Método para adicionar um caractere decodificado à string atual
+    def append(self, text, output):
+        if self.streaming:
+            output.append(text)
+        elif self.string_is_key:
+            self.buffer.append(text)
+
+    # Método para finalizar a string atual (chave ou valor)
+    def close_string(self):
+        self.in_string = False
+        self.last_token = '"'
+        if self.string_is_key:
+            self.last_key = "".join(self.buffer)
+        elif self.streaming:
+            self.streaming = False
+            self.done = True
+
+    # Método para decodificar a sequência de escape atual (None se ainda estiver incompleta)
+    # Escapes inválidos são descartados: a resposta final (JSON completo) continua sendo a referência
+    def decode_escape(self):
+        if self.escape[1] != "u":
+            return JSON_ESCAPES.get(self.escape[1], self.escape[1])
+        if len(self.escape) < 6:
+            return None
+        try:
+            code = int(self.escape[2:6], 16)
+        except ValueError:
+            return ""
+        # Par de surrogates (ex.: emojis): aguardar a segunda metade "\uXXXX"
+        if 0xD800 <= code <= 0xDBFF:
+            if len(self.escape) < 12 and "\\u".startswith(self.escape[6:8]):
+                return None
+            try:
+                return json.loads(f'"{self.escape}"')
+            except (json.JSONDecodeError, ValueError):
+                return ""
+        return chr(code)
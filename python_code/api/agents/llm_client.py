@@ -0,0 +1,78 @@
+# Cliente LLM compartilhado entre os agentes
+# Um único AsyncOpenAI (e um único pool de conexões HTTP) para todas as chamadas ao CHATBOT_URL
+import asyncio
+import os
+
+import dotenv
+import httpx
+from openai import AsyncOpenAI
+
+from .utils import get_env_flag
+
+dotenv.load_dotenv()  # Carregar variáveis de ambiente
+
+
+def create_llm_client():
+    # Docstring
+    '''
+    Função para criar o cliente LLM compartilhado (AsyncOpenAI com pool de conexões configurável).
+
+    Variáveis de ambiente:
+    LLM_MAX_CONNECTIONS (int): Número máximo de conexões simultâneas (padrão: 100).
+    LLM_MAX_KEEPALIVE_CONNECTIONS (int): Conexões mantidas abertas no pool (padrão: 20).
+    LLM_KEEPALIVE_EXPIRY (float): Tempo em segundos que uma conexão ociosa fica aberta (padrão: 60).
+    LLM_TIMEOUT (float): Timeout padrão de cada chamada em segundos (padrão: 60).
+    LLM_CONNECT_TIMEOUT (float): Timeout para abrir uma conexão em segundos (padrão: 5).
+    LLM_ROUTING_TIMEOUT (float): Timeout das chamadas de decisão em segundos, passado por chamada (padrão: 15).
+    LLM_MAX_RETRIES (int): Número de novas tentativas em erros temporários (padrão: 2).
+    LLM_HTTP2 (bool): Usar HTTP/2 (requer o pacote `h2`; padrão: false).
+
+    Returns:
+    AsyncOpenAI: Cliente assíncrono apontando para CHATBOT_URL.
+    '''
+    # Timeout padrão das chamadas + timeout de conexão (usado pelo pool e pelo AsyncOpenAI)
+    timeout = httpx.Timeout(float(os.getenv("LLM_TIMEOUT", "60")),
+                            connect=float(os.getenv("LLM_CONNECT_TIMEOUT", "5")))
+
+    # HTTP/2 é opcional: só ativa se o pacote `h2` estiver instalado
+    http2 = get_env_flag("LLM_HTTP2", False)
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("Aviso: LLM_HTTP2 ativado, mas o pacote `h2` não está instalado (pip install httpx[http2]). Usando HTTP/1.1.")
+            http2 = False
+
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(
+                os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60")),
+        ),
+        timeout=timeout,
+        http2=http2,
+    )
+
+    return AsyncOpenAI(
+        api_key=os.getenv("OPENROUTER_API_KEY"),
+        base_url=os.getenv("CHATBOT_URL"),
+        http_client=http_client,
+        timeout=timeout,
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+    )
+
+
+# Função para pré-aquecer o pool de conexões (DNS, TCP e TLS) antes da primeira requisição
+# Faz `connections` requisições leves (GET /models) em paralelo; erros são ignorados, pois a conexão já fica aberta
+async def warm_up_llm_client(client, connections=None):
+    if connections is None:
+        connections = int(os.getenv("LLM_WARMUP_CONNECTIONS", "4"))
+
+    async def open_connection():
+        try:
+            await client.models.list()
+        except Exception as e:
+            print(f"Aviso: falha ao pré-aquecer a conexão com o LLM: {e}")
+
+    await asyncio.gather(*(open_connection() for _ in range(connections)))
@@ -1,7 +1,9 @@
 import os
 import json
-from .utils import get_chatbot_response, double_check_json_output  # utilitários
-from openai import OpenAI
+from .utils import get_chatbot_response, double_check_json_output, get_structured_chatbot_response, get_env_flag, stream_chatbot_response  # utilitários
+from .json_repair import JsonFieldStreamer
+from .schemas import ORDER_TAKING_RESPONSE_FORMAT
+from .llm_client import create_llm_client
 from copy import deepcopy
 from dotenv import load_dotenv
 
@@ -10,20 +12,20 @@ load_dotenv()  # variáveis de ambiente
 
 class OrderTakingAgent():
     # Método construtor
-    def __init__(self, recommendation_agent):
-        # Inicializar o cliente OpenAI com a chave de API e a URL base
-        self.client = OpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url=os.getenv("CHATBOT_URL")
-        )
+    def __init__(self, recommendation_agent, client=None):
+        # Cliente LLM: compartilhado (injetado pelo AgentController) ou próprio, se não for informado
+        self.client = client if client is not None else create_llm_client()
         # Carregar o modelo a partir das variáveis de ambiente
         self.model_name = os.getenv("MODEL_NAME")
+        # Modo de saída estruturada (response_format com JSON schema)
+        self.structured_output = get_env_flag("STRUCTURED_OUTPUT", False)
 
         # Agende de Recomendação
         self.recommendation_agent = recommendation_agent
 
-    # Método para obter a resposta do agente
-    def get_response(self, messages):
+    # Método para montar as mensagens enviadas ao LLM (system prompt + histórico com o status do pedido)
+    # Retorna (mensagens, asked_recommendation_before)
+    def build_input_messages(self, messages):
         messages = deepcopy(messages)  # evitar mutações
 
         # System prompt com instruções de comportamento e itens do menu
@@ -118,9 +120,23 @@ class OrderTakingAgent():
         input_messages = [
             {'role': 'system', 'content': system_prompt}
         ] + messages
+        return input_messages, asked_recommendation_before
+
+    # Método para obter a resposta do agente
+    async def get_response(self, messages):
+        input_messages, asked_recommendation_before = self.build_input_messages(
+            messages)
 
-        try:        # Obter resposta do chatbot
-            chatbot_response = get_chatbot_response(
+        try:
+            # Saída estruturada (se ativada): JSON já validado pelo schema, sem verificação extra
+            if self.structured_output:
+                chatbot_response = await get_structured_chatbot_response(
+                    self.client, self.model_name, input_messages, ORDER_TAKING_RESPONSE_FORMAT)
+                if chatbot_response is not None:
+                    return self.postprocess(chatbot_response, asked_recommendation_before)
+
+            # Obter resposta do chatbot
+            chatbot_response = await get_chatbot_response(
                 self.client, self.model_name, input_messages)
 
             if not chatbot_response or chatbot_response.strip() == "":
@@ -128,7 +144,7 @@ class OrderTakingAgent():
                 return self.create_default_output("Desculpe, não consegui processar seu pedido no momento.")
 
             # Verificação do JSON
-            chatbot_response = double_check_json_output(
+            chatbot_response = await double_check_json_output(
                 self.client, self.model_name, chatbot_response)
 
             # Pós-processamento da resposta
@@ -138,7 +154,49 @@ class OrderTakingAgent():
             print(f"Erro ao processar resposta do chatbot: {e}")
             return self.create_default_output("Desculpe, ocorreu um erro ao processar seu pedido.")
 
-        return output    # Método para criar uma saída padrão em caso de erro
+        return output
+
+    # Método para obter a resposta do agente em streaming
+    # O LLM gera um JSON: apenas o campo "response" é enviado ao usuário, à medida que é gerado
+    # Produz ("token", texto) e, por último, ("final", resposta completa com a memória do pedido)
+    async def stream_response(self, messages):
+        input_messages, asked_recommendation_before = self.build_input_messages(
+            messages)
+
+        response_streamer = JsonFieldStreamer("response")
+        chunks = []
+        streamed = False  # algum texto do campo "response" já foi enviado
+        async for delta in stream_chatbot_response(
+                self.client, self.model_name, input_messages):
+            chunks.append(delta)
+            text = response_streamer.feed(delta)
+            if text:
+                streamed = True
+                yield "token", text
+        chatbot_response = "".join(chunks)
+
+        try:
+            if not chatbot_response.strip():
+                print("Aviso: Resposta vazia do chatbot")
+                output = self.create_default_output(
+                    "Desculpe, não consegui processar seu pedido no momento.")
+            else:
+                # Verificação do JSON completo (o texto enviado em streaming não substitui a memória)
+                chatbot_response = await double_check_json_output(
+                    self.client, self.model_name, chatbot_response)
+                output = self.postprocess(
+                    chatbot_response, asked_recommendation_before)
+        except Exception as e:
+            print(f"Erro ao processar resposta do chatbot: {e}")
+            output = self.create_default_output(
+                "Desculpe, ocorreu um erro ao processar seu pedido.")
+
+        # Campo "response" não encontrado durante o streaming (ex.: JSON malformado): enviar a resposta final
+        if not streamed:
+            yield "token", output['content']
+        yield "final", output
+
+    # Método para criar uma saída padrão em caso de erro
 
     def create_default_output(self, message):
         dict_output = {
@@ -0,0 +1,54 @@
+# Rankings de popularidade usados pelo Recommendation Agent (recomendações "popular" e "popular by category")
+# popularity_recommendation.csv é lido uma vez, na carga, sem pandas, e ordenado pelo número de transações:
+# um ranking geral e um por categoria (tuplas imutáveis). Na consulta não há filtro nem ordenação:
+# - sem categorias: primeiros itens do ranking geral
+# - uma categoria: primeiros itens do ranking da categoria
+# - várias categorias: intercalação (k-way merge) dos rankings das categorias, só até `top_k`
+# Empates mantêm a ordem do arquivo (mesmo resultado de filtrar e ordenar a tabela a cada consulta)
+import csv
+import heapq
+from itertools import islice
+
+
+class PopularityIndex():
+    # Método construtor
+    # `rows`: [(produto, categoria, número de transações), ...] na ordem do arquivo
+    def __init__(self, rows):
+        rows = list(rows)
+        # Produtos e categorias na ordem do arquivo (um produto pode aparecer em mais de uma categoria)
+        self.products = [product for product, _, _ in rows]
+        self.categories = list(dict.fromkeys(category for _, category, _ in rows))
+
+        # Entradas (-transações, posição no arquivo, produto): a ordem natural das tuplas é a ordem do ranking
+        entries = sorted((-transactions, position, product)
+                         for position, (product, _, transactions) in enumerate(rows))
+        self.ranking = tuple(product for _, _, product in entries)
+        self.category_entries = {category: [] for category in self.categories}
+        for entry in entries:
+            self.category_entries[rows[entry[1]][1]].append(entry)
+        self.category_entries = {category: tuple(category_entries)
+                                 for category, category_entries in self.category_entries.items()}
+        self.category_rankings = {category: tuple(product for _, _, product in category_entries)
+                                  for category, category_entries in self.category_entries.items()}
+
+    # Método para criar os rankings a partir de um arquivo popularity_recommendation.csv
+    # Colunas: product, product_category, number_of_transactions
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r", encoding="utf-8", newline="") as file:
+            return cls([(row["product"], row["product_category"], int(row["number_of_transactions"]))
+                        for row in csv.DictReader(file)])
+
+    # Método para obter os `top_k` produtos mais populares (de todas as categorias ou das categorias informadas)
+    def recommend(self, product_categories=None, top_k=5):
+        if product_categories is None:
+            return list(self.ranking[:top_k])
+        # Categorias conhecidas, sem repetições
+        categories = [category for category in dict.fromkeys(product_categories)
+                      if category in self.category_rankings]
+        if not categories:
+            return []
+        if len(categories) == 1:
+            return list(self.category_rankings[categories[0]][:top_k])
+        merged = heapq.merge(*(self.category_entries[category] for category in categories))
+        return [product for _, _, product in islice(merged, max(top_k, 0))]
@@ -0,0 +1,155 @@
+# Caminho rápido do Details Agent para perguntas que citam um produto pelo nome
+# Um único padrão (expressão regular pré-compilada) com os nomes dos produtos de products.json e variações comuns
+# (plural, hífen, acentos, apelidos). Se a mensagem cita um produto, o registro dele vem direto de um dicionário
+# em memória, sem calcular o embedding nem consultar o armazenamento vetorial
+# O plural de um nome que também aparece em outros nomes ("croissants": Croissant, Almond Croissant, Chocolate
+# Croissant) é tratado como uma categoria: leva a todos esses produtos, não só ao de nome exato
+import json
+import os
+import re
+import unicodedata
+
+import dotenv
+
+from .utils import get_env_flag
+
+dotenv.load_dotenv()  # Carregar variáveis de ambiente
+
+# Arquivo de produtos padrão (pasta products/ na raiz do repositório; JSON lines)
+DEFAULT_PRODUCTS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     "..", "..", "products", "products.json")
+
+# Apelidos e grafias comuns -> nome do produto (além das variações geradas a partir do nome)
+PRODUCT_ALIASES = {
+    "caramel syrup": "Carmel syrup",
+    "vanilla syrup": "Sugar Free Vanilla syrup",
+    "sugar free vanilla": "Sugar Free Vanilla syrup",
+    "hot chocolate": "Dark chocolate",
+    "drinking chocolate": "Dark chocolate",
+    "espresso shot": "Espresso shot",
+}
+
+
+# Função para remover acentos e converter o texto para ASCII puro (mesmo tratamento do índice vetorial)
+def to_ascii(text):
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8')
+
+
+# Função para normalizar um texto para a busca: ASCII, minúsculas e pontuação/hífens trocados por espaços
+def normalize_text(text):
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", to_ascii(text).lower()).split())
+
+
+# Função para montar o texto de um produto (mesmo documento indexado no armazenamento vetorial)
+def format_product_document(product):
+    return (f"{product['name']} : {product['description']}"
+            f"-- Ingredients: {product['ingredients']}"
+            f"-- Price: {product['price']}"
+            f"-- Rating: {product['rating']}")
+
+
+# Função para gerar as variações de um nome: o próprio nome e o plural da última palavra
+def name_variants(name):
+    name = normalize_text(name)
+    if re.search(r"(s|x|z|ch|sh)$", name):
+        plural = name + "es"
+    elif name.endswith("i"):  # "biscotti" já é plural
+        return [name]
+    else:
+        plural = name + "s"
+    return [name, plural]
+
+
+class ProductMatcher():
+    # Método construtor
+    # `products`: lista de produtos (dicionários de products.json)
+    # `max_products`: mais produtos citados do que isso indica uma pergunta aberta (ex.: comparações), que usa a busca vetorial
+    def __init__(self, products, aliases=PRODUCT_ALIASES, max_products=2):
+        self.max_products = max_products
+        # Nome do produto -> documento (texto em ASCII, como no índice)
+        self.documents = {product['name']: to_ascii(format_product_document(product))
+                          for product in products}
+
+        # Variação normalizada -> nomes dos produtos (um só, exceto no plural de um nome contido em outros nomes)
+        self.variants = {}
+        normalized_names = {name: normalize_text(name) for name in self.documents}
+        for name in self.documents:
+            variants = name_variants(name)
+            for variant in variants:
+                self.variants.setdefault(variant, [name])
+            if len(variants) > 1 and self.variants[variants[1]] == [name]:
+                term = re.compile(r"\b" + re.escape(variants[0]) + r"\b")
+                self.variants[variants[1]] = [name] + [other for other, normalized in normalized_names.items()
+                                                       if other != name and term.search(normalized)]
+        for alias, name in aliases.items():
+            if name in self.documents:
+                for variant in name_variants(alias):
+                    self.variants.setdefault(variant, [name])
+
+        # Padrão único com todas as variações, das mais longas para as mais curtas:
+        # "almond croissant" é encontrado antes de "croissant" na mesma posição
+        alternatives = sorted(self.variants, key=len, reverse=True)
+        self.pattern = re.compile(
+            r"\b(?:" + "|".join(re.escape(variant) for variant in alternatives) + r")\b")
+
+        self.hits = 0  # perguntas respondidas pelo caminho rápido
+        self.misses = 0  # perguntas sem produto citado (ou com muitos): busca vetorial
+        self.product_hits = {}  # produto -> vezes em que foi encontrado pelo caminho rápido
+
+    # Método para criar o matcher a partir de products.json (JSON lines)
+    @classmethod
+    def from_file(cls, path=DEFAULT_PRODUCTS_PATH, **kwargs):
+        with open(path, "r", encoding="utf-8") as file:
+            products = [json.loads(line) for line in file if line.strip()]
+        return cls(products, **kwargs)
+
+    # Método para encontrar os produtos citados em um texto (sem repetição, na ordem em que aparecem)
+    # Um plural de categoria conta como todos os produtos da categoria (acima de `max_products`: busca vetorial)
+    def match(self, text):
+        names = []
+        for found in self.pattern.finditer(normalize_text(text)):
+            for name in self.variants[found.group(0)]:
+                if name not in names:
+                    names.append(name)
+        return names
+
+    # Método do caminho rápido: documentos dos produtos citados na mensagem
+    # Retorna None (pergunta aberta: usar a busca vetorial) se nenhum produto, ou mais de `max_products`, for citado
+    def lookup(self, text):
+        names = self.match(text)
+        if not names or len(names) > self.max_products:
+            self.misses += 1
+            return None
+        self.hits += 1
+        for name in names:
+            self.product_hits[name] = self.product_hits.get(name, 0) + 1
+        return [self.documents[name] for name in names]
+
+    # Método para obter as estatísticas do caminho rápido
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "products": len(self.documents),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "product_hits": dict(self.product_hits),
+        }
+
+
+# Função para criar o matcher configurado nas variáveis de ambiente (None se desativado ou sem o arquivo)
+# - PRODUCT_FAST_PATH_ENABLED: ativa o caminho rápido (padrão: true)
+# - PRODUCTS_PATH: arquivo de produtos (padrão: products/products.json na raiz do repositório)
+# - PRODUCT_FAST_PATH_MAX_PRODUCTS: número máximo de produtos citados para usar o caminho rápido (padrão: 2)
+def create_product_matcher(enabled=None):
+    if enabled is None:
+        enabled = get_env_flag("PRODUCT_FAST_PATH_ENABLED", True)
+    if not enabled:
+        return None
+    path = os.getenv("PRODUCTS_PATH") or DEFAULT_PRODUCTS_PATH
+    try:
+        return ProductMatcher.from_file(
+            path, max_products=int(os.getenv("PRODUCT_FAST_PATH_MAX_PRODUCTS", "2")))
+    except OSError as e:
+        print(f"Aviso: caminho rápido de produtos desativado ({e})")
+        return None
@@ -1,15 +1,14 @@
 import json
-import pandas as pd
-import numpy as np
 import os
+import threading
+import time
 from copy import deepcopy
 import dotenv
-from openai import OpenAI
+from .llm_client import create_llm_client
 # Importar funções utilitárias
-from .utils import get_chatbot_response, get_embedding, double_check_json_output  # utilitários
-from pinecone import Pinecone  # Importar o cliente Pinecone
-# Importar SentenceTransformer para embeddings locais
-from sentence_transformers import SentenceTransformer
+from .utils import get_chatbot_response, double_check_json_output, get_structured_chatbot_response, get_env_flag, get_routing_timeout, stream_chatbot_response  # utilitários
+from .schemas import RECOMMENDATION_CLASSIFICATION_RESPONSE_FORMAT
+from .recommendation_snapshot import RecommendationSnapshot, get_snapshot_signature
 
 dotenv.load_dotenv()  # Carregar variáveis de ambiente
 
@@ -18,94 +17,89 @@ dotenv.load_dotenv()  # Carregar variáveis de ambiente
 
 class RecommendationAgent():
     # Método construtor
-    def __init__(self, apriori_recommendation_path, popular_recommendation_path):
-        # Inicializar o cliente OpenAI com a chave de API e a URL base
-        self.client = OpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url=os.getenv("CHATBOT_URL")
-        )
+    def __init__(self, apriori_recommendation_path, popular_recommendation_path, client=None):
+        # Cliente LLM: compartilhado (injetado pelo AgentController) ou próprio, se não for informado
+        self.client = client if client is not None else create_llm_client()
         self.model_name = os.getenv("MODEL_NAME")  # Modelo LLM
-
-        # Ler arquivo de recomendações Apriori (.json)
-        with open(apriori_recommendation_path, 'r') as file:
-            self.apriori_recommendations = json.load(file)
-
-        # Ler arquivo de recomendações populares (.csv)
-        self.popular_recommendations = pd.read_csv(popular_recommendation_path)
-        # Lista de produtos
-        self.products = self.popular_recommendations['product'].tolist()
-        # Categorias dos produtos
-        self.product_categories = list(set(  # transformar em set para evitar duplicatas
-            self.popular_recommendations['product_category'].tolist()
-        ))
+        # Modo de saída estruturada (response_format com JSON schema)
+        self.structured_output = get_env_flag("STRUCTURED_OUTPUT", False)
+        # Timeout das chamadas de decisão (LLM_ROUTING_TIMEOUT): menor que o da geração das respostas
+        self.routing_timeout = get_routing_timeout()
+
+        self.apriori_recommendation_path = apriori_recommendation_path
+        self.popular_recommendation_path = popular_recommendation_path
+        # Pasta das recomendações publicadas (ponteiro snapshot.json + snapshots/v000001/, ...)
+        self.snapshot_path = os.path.dirname(apriori_recommendation_path)
+        self.snapshot_signature = None  # assinatura (mtime, tamanho) do ponteiro na última verificação
+        self.snapshot_lock = threading.Lock()
+        self.reload_stats = {"checks": 0, "loads": 0, "failures": 0, "last_check": None, "last_error": None}
+        self.reload()
+
+    # Método para (re)carregar o snapshot ativo das recomendações; retorna o snapshot
+    # O novo snapshot é montado e validado antes de substituir o atual (troca de uma referência): requisições em
+    # andamento continuam com o snapshot que já tinham. Levanta ValueError/OSError se o snapshot for inválido
+    def reload(self):
+        with self.snapshot_lock:
+            return self.load_snapshot()
+
+    # Método para recarregar o snapshot só se o ponteiro mudou (usado pela verificação em segundo plano)
+    # Retorna True se uma nova versão foi ativada; um snapshot inválido é ignorado (a versão atual continua ativa)
+    # até o ponteiro mudar de novo
+    def refresh(self):
+        with self.snapshot_lock:
+            signature = get_snapshot_signature(self.snapshot_path)
+            self.reload_stats["checks"] += 1
+            self.reload_stats["last_check"] = time.time()
+            if signature == self.snapshot_signature:
+                return False
+            try:
+                self.load_snapshot()
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Erro ao carregar o snapshot das recomendações: {e}")
+                self.snapshot_signature = signature
+                self.reload_stats["failures"] += 1
+                self.reload_stats["last_error"] = str(e)
+                return False
+            return True
+
+    # Método para carregar o snapshot e trocá-lo pelo atual (chamado com `snapshot_lock`)
+    def load_snapshot(self):
+        # Assinatura lida antes dos arquivos: se o ponteiro mudar durante a carga, a próxima verificação recarrega
+        signature = get_snapshot_signature(self.snapshot_path)
+        snapshot = RecommendationSnapshot.load(
+            self.snapshot_path, self.apriori_recommendation_path, self.popular_recommendation_path)
+        self.snapshot = snapshot
+        self.snapshot_signature = signature
+        self.reload_stats["loads"] += 1
+        self.reload_stats["last_error"] = None
+        return snapshot
+
+    # Método para obter o estado do snapshot ativo e das recargas (endpoint de administração e /metrics)
+    def snapshot_stats(self):
+        return {"active": self.snapshot.stats(), **self.reload_stats}
 
     # Método para obter recomendações Apriori
-    def get_apriori_recommendation(self, products, top_k=5):
-        # DataFrame com as recomendações Apriori
-        recommendation_list = []
-        for product in products:
-            if product in self.apriori_recommendations:
-                recommendation_list += self.apriori_recommendations[product]
-        # Ordenar lista de recomendações pela confiança
-        recommendation_list = sorted(
-            recommendation_list, key=lambda x: x['confidence'], reverse=True)
-
-        # Criar lista de recomendações
-        recommendations = []  # Alterado de 'recommendation' para 'recommendations'
-        recommendation_per_category = {}
-        for recommendation_item in recommendation_list:
-            # Se o produto desta recomendação já estiver na lista, ignora
-            if recommendation_item['product'] in recommendations:
-                continue
-
-            # Limitar 2 recomendações por categoria
-            product_category = recommendation_item['product_category']
-            if product_category not in recommendation_per_category:
-                # inicializa contagem de recomendações por categoria
-                recommendation_per_category[product_category] = 0
-            # Se já houver 2 recomendações por categoria, ignora
-            if recommendation_per_category[product_category] >= 2:
-                continue
-            # incrementa contagem
-            recommendation_per_category[product_category] += 1
-
-            # Adicionar produto da recomendação à lista
-            recommendations.append(recommendation_item['product'])
-
-            if len(recommendations) >= top_k:
-                # parar se já atingir o limite de recomendações
-                break
-
-        # Retornar as recomendações
-        return recommendations
+    # Regras dos produtos da cesta da maior confiança à menor, sem repetições e com no máximo 2 por categoria
+    # `snapshot`: snapshot da requisição (padrão: o ativo)
+    def get_apriori_recommendation(self, products, top_k=5, snapshot=None):
+        snapshot = snapshot or self.snapshot
+        return snapshot.apriori_index.recommend(products, top_k=top_k)
 
     # Método para obter recomendações Populares (não Apriori)
-
-    def get_popular_recommendation(self, product_categories=None, top_k=5):
-        # DataFrame com as recomendações populares
-        recommendations_df = self.popular_recommendations
-
+    # Produtos com mais transações (de todas as categorias ou das categorias informadas), sem DataFrame na consulta
+    def get_popular_recommendation(self, product_categories=None, top_k=5, snapshot=None):
+        snapshot = snapshot or self.snapshot
         # Type Check
         # se argumento for uma string, transforma em lista
         if isinstance(product_categories, str):  # Alterado de type() para isinstance()
             product_categories = [product_categories]
-        # se argumento não for None
-        if product_categories is not None:
-            recommendations_df = self.popular_recommendations[self.popular_recommendations['product_category'].isin(
-                product_categories)]
-
-        # Ordenar DataFrame por número de transações
-        recommendations_df = recommendations_df.sort_values(
-            'number_of_transactions', ascending=False)
-        # Se não houver recomendações retorna uma lista vazia
-        if recommendations_df.shape[0] == 0:
-            return []
-        # Se houver recomendações, retorna as mais populares
-        recommendations = recommendations_df['product'].tolist()[:top_k]
-        return recommendations
+        # Lista vazia se nenhuma categoria informada existir
+        return snapshot.popularity_index.recommend(product_categories, top_k=top_k)
 
     # Método para obter recomendações de produtos semelhantes
-    def recommendation_classification(self, message):
+    # `snapshot`: snapshot da requisição (padrão: o ativo)
+    async def recommendation_classification(self, message, snapshot=None):
+        snapshot = snapshot or self.snapshot
         system_prompt = """ Você é um assistente de IA útil para um aplicativo de cafeteria que serve bebidas e doces. Temos 3 tipos de recomendações:
 
         1. Recomendações Apriori: Estas são recomendações baseadas no histórico de pedidos do usuário. Recomendamos itens que são frequentemente comprados junto com os itens do pedido do usuário.
@@ -113,9 +107,9 @@ class RecommendationAgent():
         3. Recomendações Populares por Categoria: Aqui o usuário pede para recomendar um produto em uma categoria. Como, qual café você me recomenda pegar? Recomendamos itens que são populares na categoria solicitada pelo usuário.
 
         Aqui está a lista de itens na cafeteria:
-        """ + ",".join(self.products) + """
+        """ + ",".join(snapshot.products) + """
         Aqui está a lista de Categorias que temos na cafeteria:
-        """ + ",".join(self.product_categories) + """
+        """ + ",".join(snapshot.product_categories) + """
 
         Sua tarefa é determinar qual tipo de recomendação fornecer com base na mensagem do usuário.
 
@@ -128,11 +122,17 @@ class RecommendationAgent():
         # Mensagens que serão enviadas para o LLM: system prompt + 3 últimas mensagens do chat
         input_messages = [
             {'role': 'system', 'content': system_prompt}] + message[-3:]
-        # Obter resposta do LLM
-        chatbot_output = get_chatbot_response(
-            self.client, self.model_name, input_messages)
-        chatbot_output = double_check_json_output(  # verificar se o JSON está correto
-            self.client, self.model_name, chatbot_output)
+        # Obter resposta do LLM: saída estruturada (se ativada) ou resposta livre + verificação do JSON
+        chatbot_output = None
+        if self.structured_output:
+            chatbot_output = await get_structured_chatbot_response(
+                self.client, self.model_name, input_messages, RECOMMENDATION_CLASSIFICATION_RESPONSE_FORMAT,
+                timeout=self.routing_timeout)
+        if chatbot_output is None:
+            chatbot_output = await get_chatbot_response(
+                self.client, self.model_name, input_messages, timeout=self.routing_timeout)
+            chatbot_output = await double_check_json_output(  # verificar se o JSON está correto
+                self.client, self.model_name, chatbot_output)
 
         output = self.postprocess_classification(chatbot_output)
         return output  # retornar resposta do LLM    # Método para pós-processar a resposta do LLM
@@ -154,7 +154,7 @@ class RecommendationAgent():
                 "parameters": []
             }  # Método para obter recomendações a partir de um pedido que o usuário fez ou está fazendo
 
-    def get_recommendations_from_order(self, messages, order):
+    async def get_recommendations_from_order(self, messages, order):
         messages = deepcopy(messages)  # evitar alterações
 
         products = []  # lista de produtos no pedido
@@ -184,33 +184,36 @@ class RecommendationAgent():
         input_messages = [
             {'role': 'system', 'content': system_prompt}] + messages[-3:]
         # Obter resposta do LLM
-        chatbot_output = get_chatbot_response(
+        chatbot_output = await get_chatbot_response(
             self.client, self.model_name, input_messages)
         output = self.postprocess(chatbot_output)
         return output
 
-    # Método para obter recomendações a partir de uma pergunta que o usuário fez
-    def get_response(self, messages):
+    # Método para montar as mensagens enviadas ao LLM a partir de uma pergunta que o usuário fez
+    # Retorna (mensagens, None) ou (None, resposta padrão) se não houver recomendações
+    async def build_input_messages(self, messages):
         messages = deepcopy(messages)  # evitar alterações
-        #
-        recommendation_classification = self.recommendation_classification(
-            messages)
+        # Snapshot lido uma vez: a classificação e as recomendações usam a mesma versão, mesmo se outra for
+        # ativada enquanto o LLM responde
+        snapshot = self.snapshot
+        recommendation_classification = await self.recommendation_classification(
+            messages, snapshot)
         recommendation_type = recommendation_classification['recommendation_type']
 
         recommendations = []
         # Adicionar recomendações com base no tipo de recomendação
         if recommendation_type == 'apriori':
             recommendations = self.get_apriori_recommendation(
-                recommendation_classification['parameters']
+                recommendation_classification['parameters'], snapshot=snapshot
             )
         elif recommendation_type == 'popular':
-            recommendations = self.get_popular_recommendation()
+            recommendations = self.get_popular_recommendation(snapshot=snapshot)
         elif recommendation_type == 'popular by category':
             recommendations = self.get_popular_recommendation(
-                recommendation_classification['parameters'])
+                recommendation_classification['parameters'], snapshot=snapshot)
         # Se recomendações estiver vazia, retorna uma mensagem padrão
         if recommendations == []:
-            return {
+            return None, {
                 'role': 'assistant',
                 'content': 'Desculpe, eu não posso te ajudar com essa recomendação. Posso te ajudar com outra coisa?',
             }
@@ -232,13 +235,36 @@ class RecommendationAgent():
         # Mensagens pro LLM: system prompt + 3 últimas mensagens do chat
         input_messages = [
             {'role': 'system', 'content': system_prompt}] + messages[-3:]
+        return input_messages, None
+
+    # Método para obter recomendações a partir de uma pergunta que o usuário fez
+    async def get_response(self, messages):
+        input_messages, default_output = await self.build_input_messages(messages)
+        if default_output is not None:
+            return default_output
         # Obter resposta do LLM
-        chatbot_output = get_chatbot_response(
+        chatbot_output = await get_chatbot_response(
             self.client, self.model_name, input_messages)
         # pós-processamento da resposta (converter string para JSON)
         output = self.postprocess(chatbot_output)
         return output
 
+    # Método para obter recomendações em streaming
+    # Produz ("token", texto) a cada pedaço gerado pelo LLM e, por último, ("final", resposta completa)
+    async def stream_response(self, messages):
+        input_messages, default_output = await self.build_input_messages(messages)
+        if default_output is not None:
+            yield "token", default_output['content']
+            yield "final", default_output
+            return
+
+        chunks = []
+        async for delta in stream_chatbot_response(
+                self.client, self.model_name, input_messages):
+            chunks.append(delta)
+            yield "token", delta
+        yield "final", self.postprocess("".join(chunks))
+
     # Método para pós-processar a resposta do LLM
 
     def postprocess(self, output):
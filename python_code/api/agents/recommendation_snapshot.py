@@ -0,0 +1,224 @@
+# Snapshots versionados das recomendações (regras Apriori + rankings de popularidade)
+# Cada publicação grava uma pasta imutável `snapshots/v000001/` com os dois arquivos e, por último, troca o ponteiro
+# `snapshot.json` (versão, pasta e hash SHA-256 de cada arquivo). Quem lê o ponteiro sempre encontra uma pasta completa.
+# A carga (RecommendationSnapshot.load) monta os índices e valida o snapshot (hashes, ranking não vazio, produtos
+# das regras presentes no ranking, confianças entre 0 e 1) antes de ele ser usado: um snapshot inválido não é ativado.
+# Sem ponteiro, os arquivos da raiz da pasta (os do repositório) são carregados como snapshot inicial (versão None).
+# Publicações de processos diferentes (workers da API, treinamento, atualizador) são serializadas com um lock de
+# arquivo: cada versão é alocada uma única vez.
+import contextlib
+import csv
+import hashlib
+import json
+import os
+import shutil
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from .apriori_index import AprioriIndex
+from .popularity_index import PopularityIndex
+
+APRIORI_FILE = "apriori_recommendation.json"
+POPULARITY_FILE = "popularity_recommendation.csv"
+SNAPSHOT_FILE = "snapshot.json"  # ponteiro para a versão ativa
+SNAPSHOTS_DIR = "snapshots"  # pastas das versões publicadas
+KEEP_SNAPSHOTS = 5  # versões mantidas em disco (as mais antigas são removidas a cada publicação)
+LOCK_FILE = ".publish.lock"  # lock das publicações (entre processos)
+
+
+# Gerenciador de contexto para um lock exclusivo entre processos (lock de arquivo `name` na pasta `path`)
+# Bloqueia até o lock ser liberado; a pasta deve existir
+@contextlib.contextmanager
+def file_lock(path, name=LOCK_FILE):
+    with open(os.path.join(path, name), "a+") as file:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        else:
+            file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)  # tenta por 10 s antes de levantar OSError
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# Função para ler o ponteiro `snapshot.json` de `path` (None se não houver)
+def read_snapshot_manifest(path):
+    try:
+        with open(os.path.join(path, SNAPSHOT_FILE), "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) and "version" in manifest else None
+
+
+# Função para ler a versão publicada em `path` (None se não houver ponteiro)
+def read_snapshot_version(path):
+    manifest = read_snapshot_manifest(path)
+    return manifest["version"] if manifest is not None else None
+
+
+# Função para obter a assinatura (mtime, tamanho) do ponteiro: verificação barata de mudanças (None se não houver)
+def get_snapshot_signature(path):
+    try:
+        stat = os.stat(os.path.join(path, SNAPSHOT_FILE))
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Função para calcular o hash SHA-256 de um arquivo
+def get_file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Função para gravar os arquivos das recomendações em `path` (arquivos temporários + renomear)
+def write_recommendation_files(path, apriori_recommendations, popularity_rows):
+    os.makedirs(path, exist_ok=True)
+    apriori_path = os.path.join(path, APRIORI_FILE)
+    with open(apriori_path + ".tmp", "w") as file:
+        json.dump(apriori_recommendations, file)
+    popularity_path = os.path.join(path, POPULARITY_FILE)
+    with open(popularity_path + ".tmp", "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(["product", "product_category", "number_of_transactions"])
+        writer.writerows(popularity_rows)
+    os.replace(apriori_path + ".tmp", apriori_path)
+    os.replace(popularity_path + ".tmp", popularity_path)
+
+
+# Função para publicar uma nova versão em `path`; retorna a versão
+# Os arquivos também são copiados para a raiz de `path` (cópia da última versão para notebooks e scripts offline)
+# `source`: origem da publicação ("training" ou "incremental"); `keep`: versões mantidas em disco
+def publish_snapshot(path, apriori_recommendations, popularity_rows, source="training", keep=KEEP_SNAPSHOTS):
+    os.makedirs(path, exist_ok=True)
+    # Lock entre processos: ler a versão atual, gravar a próxima e trocar o ponteiro sem outra publicação no meio
+    with file_lock(path):
+        write_recommendation_files(path, apriori_recommendations, popularity_rows)
+
+        version = (read_snapshot_version(path) or 0) + 1
+        directory = os.path.join(SNAPSHOTS_DIR, f"v{version:06d}")
+        snapshot_path = os.path.join(path, directory)
+        # Pasta da versão montada ao lado e renomeada: nunca fica visível pela metade
+        shutil.rmtree(snapshot_path + ".tmp", ignore_errors=True)
+        write_recommendation_files(snapshot_path + ".tmp", apriori_recommendations, popularity_rows)
+        shutil.rmtree(snapshot_path, ignore_errors=True)  # sobra de uma publicação interrompida antes do ponteiro
+        os.replace(snapshot_path + ".tmp", snapshot_path)
+
+        # Ponteiro por último: a nova versão só aparece depois da pasta completa
+        manifest = {
+            "version": version,
+            "directory": directory,
+            "updated_at": time.time(),
+            "source": source,
+            "files": {name: get_file_hash(os.path.join(snapshot_path, name))
+                      for name in (APRIORI_FILE, POPULARITY_FILE)},
+        }
+        manifest_path = os.path.join(path, SNAPSHOT_FILE)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(manifest, file)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+        prune_snapshots(path, keep)
+    return version
+
+
+# Função para remover as versões mais antigas, mantendo as `keep` mais recentes
+def prune_snapshots(path, keep=KEEP_SNAPSHOTS):
+    snapshots_path = os.path.join(path, SNAPSHOTS_DIR)
+    names = sorted(name for name in os.listdir(snapshots_path)
+                   if name.startswith("v") and name[1:].isdigit())
+    for name in names[:-keep] if keep > 0 else []:
+        shutil.rmtree(os.path.join(snapshots_path, name), ignore_errors=True)
+
+
+# Snapshot carregado: índices prontos para consulta + versão e momento da carga
+# Não é alterado depois de criado: uma requisição que guardou a referência usa sempre os mesmos dados
+class RecommendationSnapshot():
+    # Método construtor
+    def __init__(self, apriori_index, popularity_index, version=None, source=None, path=None,
+                 loaded_at=None, load_seconds=None):
+        self.apriori_index = apriori_index
+        self.popularity_index = popularity_index
+        # Lista de produtos
+        self.products = popularity_index.products
+        # Categorias dos produtos (sem duplicatas, na ordem do arquivo)
+        self.product_categories = popularity_index.categories
+        self.version = version
+        self.source = source
+        self.path = path  # pasta dos arquivos carregados
+        self.loaded_at = loaded_at if loaded_at is not None else time.time()
+        self.load_seconds = load_seconds
+
+    # Método para carregar e validar o snapshot ativo de `path` (pasta com snapshot.json)
+    # Sem ponteiro, carrega os arquivos informados (ou os da raiz de `path`)
+    # Levanta ValueError se o snapshot for inválido
+    @classmethod
+    def load(cls, path, apriori_recommendation_path=None, popular_recommendation_path=None):
+        start = time.perf_counter()
+        manifest = read_snapshot_manifest(path)
+        if manifest is not None:
+            # Ponteiros antigos (sem "directory"): arquivos na raiz de `path`
+            snapshot_path = os.path.join(path, manifest.get("directory", ""))
+            apriori_recommendation_path = os.path.join(snapshot_path, APRIORI_FILE)
+            popular_recommendation_path = os.path.join(snapshot_path, POPULARITY_FILE)
+            for name, expected_hash in manifest.get("files", {}).items():
+                if get_file_hash(os.path.join(snapshot_path, name)) != expected_hash:
+                    raise ValueError(f"Snapshot {manifest['version']} inválido: hash de {name} não confere")
+        else:
+            apriori_recommendation_path = apriori_recommendation_path or os.path.join(path, APRIORI_FILE)
+            popular_recommendation_path = popular_recommendation_path or os.path.join(path, POPULARITY_FILE)
+
+        # Ler arquivo de recomendações Apriori (.json) e compilar as regras (ids inteiros, regras pré-ordenadas)
+        apriori_index = AprioriIndex.from_file(apriori_recommendation_path)
+        # Ler arquivo de recomendações populares (.csv) e ordenar uma vez: ranking geral e por categoria
+        popularity_index = PopularityIndex.from_file(popular_recommendation_path)
+        validate_indexes(apriori_index, popularity_index)
+
+        return cls(apriori_index, popularity_index,
+                   version=manifest["version"] if manifest is not None else None,
+                   source=manifest.get("source") if manifest is not None else None,
+                   path=os.path.dirname(os.path.abspath(apriori_recommendation_path)),
+                   load_seconds=time.perf_counter() - start)
+
+    # Método para obter o resumo do snapshot (endpoint de administração e /metrics)
+    def stats(self):
+        return {
+            "version": self.version,
+            "source": self.source,
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "products": len(self.products),
+            "apriori_rules": len(self.apriori_index.rule_products),
+        }
+
+
+# Função para validar os índices de um snapshot (ValueError se inválidos)
+def validate_indexes(apriori_index, popularity_index):
+    if not popularity_index.products:
+        raise ValueError("Snapshot inválido: ranking de popularidade vazio")
+    products = set(popularity_index.products)
+    missing = [product for product in apriori_index.products if product not in products]
+    if missing:
+        raise ValueError(f"Snapshot inválido: produtos das regras fora do ranking de popularidade: {missing[:5]}")
+    if any(not 0.0 <= confidence <= 1.0 for confidence in apriori_index.rule_confidences):
+        raise ValueError("Snapshot inválido: confiança fora do intervalo [0, 1]")
@@ -0,0 +1,60 @@
+# Cache dos resultados da busca no armazenamento vetorial (DetailsAgent.get_closest_result)
+# A chave é o embedding da pergunta quantizado (perguntas iguais, ou com embeddings praticamente iguais,
+# reaproveitam o resultado) + top_k + versão do índice: quando o vector_index_builder.py atualiza o índice,
+# a versão muda e os resultados antigos deixam de ser usados (e saem do cache pelo LRU/TTL)
+# No Pinecone, a versão é um registro no próprio índice, relido periodicamente por todas as réplicas
+import hashlib
+import os
+
+import numpy as np
+
+from .cache import LRUCache
+from .utils import get_env_flag
+from .vector_store import normalize_embeddings
+
+
+class RetrievalCache():
+    # Método construtor
+    # `decimals`: casas decimais mantidas em cada dimensão do embedding normalizado
+    def __init__(self, max_size=1024, ttl=600, decimals=3):
+        self.cache = LRUCache(max_size=max_size, ttl=ttl)
+        self.decimals = decimals
+
+    # Método para gerar a chave de uma busca
+    def build_key(self, embedding, top_k, version):
+        quantized = np.round(normalize_embeddings(np.ravel(embedding))
+                             * 10 ** self.decimals).astype(np.int32)
+        digest = hashlib.sha256(quantized.tobytes())
+        digest.update(f"\0{top_k}\0{version}".encode("utf-8"))
+        return digest.hexdigest()
+
+    # Método para obter o resultado de uma busca (None se não estiver no cache)
+    def get(self, embedding, top_k, version):
+        return self.cache.get(self.build_key(embedding, top_k, version))
+
+    # Método para armazenar o resultado de uma busca
+    def set(self, embedding, top_k, version, result):
+        self.cache.set(self.build_key(embedding, top_k, version), result)
+
+    # Método para obter as estatísticas do cache
+    def stats(self):
+        stats = self.cache.stats()
+        stats["ttl"] = self.cache.ttl
+        return stats
+
+
+# Função para criar o cache de resultados da busca configurado nas variáveis de ambiente (None se desativado)
+# - RETRIEVAL_CACHE_ENABLED: ativa o cache (padrão: true)
+# - RETRIEVAL_CACHE_SIZE: número máximo de resultados (padrão: 1024)
+# - RETRIEVAL_CACHE_TTL: tempo de vida de cada resultado em segundos (padrão: 600)
+# - RETRIEVAL_CACHE_DECIMALS: casas decimais da quantização do embedding (padrão: 3)
+def create_retrieval_cache(enabled=None):
+    if enabled is None:
+        enabled = get_env_flag("RETRIEVAL_CACHE_ENABLED", True)
+    if not enabled:
+        return None
+    return RetrievalCache(
+        max_size=int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("RETRIEVAL_CACHE_TTL", "600")),
+        decimals=int(os.getenv("RETRIEVAL_CACHE_DECIMALS", "3")),
+    )
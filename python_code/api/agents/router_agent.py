@@ -0,0 +1,121 @@
+from .llm_client import create_llm_client
+import os
+import dotenv
+from .utils import get_chatbot_response, double_check_json_output, get_structured_chatbot_response, get_env_flag, get_routing_timeout  # utilitários
+from .cache import create_decision_cache, build_decision_cache_key
+from .schemas import ROUTER_RESPONSE_FORMAT
+import json
+from copy import deepcopy
+
+dotenv.load_dotenv()  # Carregar variáveis de ambiente
+
+
+# Agente roteador: faz o trabalho do Guard Agent e do Classification Agent em uma única chamada ao LLM
+class RouterAgent():
+    # Método construtor
+    def __init__(self, use_cache=None, client=None):
+        # Cliente LLM: compartilhado (injetado pelo AgentController) ou próprio, se não for informado
+        self.client = client if client is not None else create_llm_client()
+        # Carregar o modelo a partir das variáveis de ambiente
+        self.model_name = os.getenv("MODEL_NAME")
+        # Modo de saída estruturada (response_format com JSON schema)
+        self.structured_output = get_env_flag("STRUCTURED_OUTPUT", False)
+        # Timeout das chamadas de decisão (LLM_ROUTING_TIMEOUT): menor que o da geração das respostas
+        self.routing_timeout = get_routing_timeout()
+        # Cache de decisões (LRU + TTL); None se desativado (variável ROUTER_CACHE_ENABLED ou `use_cache`)
+        self.decision_cache = create_decision_cache("ROUTER", use_cache)
+
+    # Método para obter a resposta do modelo
+    async def get_response(self, messages):
+        # Deepcopy das mensagens para evitar mutações indesejadas
+        messages = deepcopy(messages)
+
+        # System prompt do roteador: regras do Guard Agent + agentes do Classification Agent com um único schema de saída
+        system_prompt = """
+            Você é um assistente de IA prestativo para um aplicativo de cafeteria que serve bebidas e doces.
+            Sua tarefa tem duas partes: determinar se o usuário está perguntando algo relevante para a cafeteria e, se estiver, qual agente deve lidar com a entrada do usuário.
+
+            O usuário está autorizado a:
+            1. Fazer perguntas sobre a cafeteria, como localização, horário de funcionamento, itens do cardápio e perguntas relacionadas à cafeteria.
+            2. Fazer perguntas sobre os items do menu, eles podem perguntar por ingredientes em um item e mais detalhes sobre o item.
+            3. Fazer um pedido.
+            4. Pedir recomendações do que quer pedir.
+
+            O usuário não está autorizado a:
+            1. Fazer perguntas sobre qualquer outra coisa não relacionada à nossa cafeteria.
+            2. Fazer perguntas sobre os funcionários ou como fazer um item do cardápio.
+
+            Você tem 3 agentes para escolher:
+            1. details_agent: Este agente é responsável por responder perguntas sobre a cafeteria, como localização, locais de entrega, horários de funcionamento, detalhes sobre itens do menu. Ou listar itens no menu. Ou ao perguntar o que temos.
+            2. order_taking_agent: Este agente é responsável por receber pedidos do usuário. Ele é responsável por ter uma conversa com o usuário sobre o pedido até que esteja completo.
+            3. recommendation_agent: Este agente é responsável por dar recomendações ao usuário sobre o que comprar. Se o usuário pedir uma recomendação, este agente deve ser usado.
+
+            Sua saída deve estar em um formato JSON estruturado como este. Cada chave é uma string e cada valor é uma string. Certifique-se de seguir o formato JSON exatamente como mostrado abaixo:
+            {
+            "chain of thought": Revise cada um dos pontos autorizados e não autorizados e veja se a mensagem se enquadra neles. Depois, percorra cada um dos agentes acima e escreva qual deles é relevante para esta entrada.
+            "guard_decision": "allowed" or "not allowed". Escolha um desses dois valores e apenas escreva a palavra.
+            "classification_decision": "details_agent" ou "order_taking_agent" ou "recommendation_agent". Escolha um desses valores e escreva apenas a palavra. Escreva um valor mesmo se "guard_decision" for "not allowed".
+            "message": deixe a mensagem vazia (empty strings) se "guard_decision" for "allowed", caso contrário, escreva "Desculpe, não posso ajudar com isso. Posso te ajudar com seu pedido?".
+            }
+        """
+
+        # Adicionar o prompt do sistema e as mensagens anteriores (últimas 3 mensagens)
+        input_messages = [
+            {"role": "system", "content": system_prompt}] + messages[-3:]
+
+        # Cache de decisões: mesma janela de mensagens (e mesmo system prompt) -> mesma decisão, sem chamar o LLM
+        cache_key = None
+        if self.decision_cache is not None:
+            cache_key = build_decision_cache_key(
+                self.model_name, input_messages)
+            cached_output = self.decision_cache.get(cache_key)
+            if cached_output is not None:
+                return deepcopy(cached_output)
+
+        # Resposta do chatbot: saída estruturada (se ativada) ou resposta livre + verificação do JSON
+        chatbot_output = None
+        if self.structured_output:
+            chatbot_output = await get_structured_chatbot_response(
+                self.client, self.model_name, input_messages, ROUTER_RESPONSE_FORMAT,
+                timeout=self.routing_timeout)
+        if chatbot_output is None:
+            chatbot_output = await get_chatbot_response(
+                self.client, self.model_name, input_messages, timeout=self.routing_timeout)
+            chatbot_output = await double_check_json_output(
+                self.client, self.model_name, chatbot_output)
+        # Resposta ao usuário:
+        output = self.postprocess(chatbot_output)
+        if cache_key is not None:
+            self.decision_cache.set(cache_key, deepcopy(output))
+
+        return output
+
+    def postprocess(self, output):
+        # Docstring
+        '''
+        Função para pós-processamento da resposta do chatbot.
+        Ela converte a resposta do chatbot em um dicionário estruturado com as decisões do guard e da classificação,
+        no mesmo formato de memória usado pelo GuardAgent e pelo ClassificationAgent.
+
+        Parameters:
+        self (RouterAgent): Instância da classe RouterAgent.
+        output (str): A resposta do chatbot em formato JSON.
+
+        Returns:
+        dict: Um dicionário estruturado com as informações relevantes da resposta do chatbot.
+        '''
+        output = json.loads(output)
+
+        dict_output = {
+            "role": "assistant",  # papel: assistente da mensagem
+            "content": output["message"],
+            "memory": {  # se lembrar dos passos (anteriores, atual e próximos)
+                "agent": "router_agent",  # agente atual
+                # decisão do guard
+                "guard_decision": output["guard_decision"],
+                # decisão de classificação
+                "classification_decision": output["classification_decision"],
+            }
+        }
+
+        return dict_output
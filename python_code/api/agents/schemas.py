@@ -0,0 +1,102 @@
+# Schemas JSON das saídas dos agentes para o modo de saída estruturada (response_format)
+# Os valores de "decision" são restritos por enum, então o LLM não consegue devolver uma decisão inválida
+
+AGENT_NAMES = ["details_agent", "order_taking_agent", "recommendation_agent"]
+GUARD_DECISIONS = ["allowed", "not allowed"]
+
+
+# Tipos JSON do schema -> tipos Python aceitos
+JSON_TYPES = {"string": str, "number": (int, float), "integer": int, "boolean": bool,
+              "array": list, "object": dict}
+
+
+# Função para validar um valor contra o (subconjunto usado aqui do) JSON schema: type, enum, required,
+# properties e items. Retorna True se o valor for válido
+def validate_schema(value, schema):
+    expected = JSON_TYPES.get(schema.get("type"))
+    if expected is not None and (not isinstance(value, expected) or
+                                 (isinstance(value, bool) and schema.get("type") != "boolean")):
+        return False
+    if "enum" in schema and value not in schema["enum"]:
+        return False
+    if isinstance(value, dict):
+        if any(key not in value for key in schema.get("required", [])):
+            return False
+        properties = schema.get("properties", {})
+        if not all(validate_schema(value[key], properties[key]) for key in properties if key in value):
+            return False
+    if isinstance(value, list) and "items" in schema:
+        return all(validate_schema(item, schema["items"]) for item in value)
+    return True
+
+
+# Função para validar uma resposta (já convertida de JSON) contra o schema de um `response_format`
+def validate_response_format(value, response_format):
+    return validate_schema(value, response_format["json_schema"]["schema"])
+
+
+# Função para montar o `response_format` no formato da API da OpenAI (json_schema estrito)
+def build_response_format(name, properties):
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties.keys()),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+# Guard Agent
+GUARD_RESPONSE_FORMAT = build_response_format("guard_agent", {
+    "chain of thought": {"type": "string"},
+    "decision": {"type": "string", "enum": GUARD_DECISIONS},
+    "message": {"type": "string"},
+})
+
+# Classification Agent
+CLASSIFICATION_RESPONSE_FORMAT = build_response_format("classification_agent", {
+    "chain of thought": {"type": "string"},
+    "decision": {"type": "string", "enum": AGENT_NAMES},
+    "message": {"type": "string"},
+})
+
+# Router Agent (guard + classificação)
+ROUTER_RESPONSE_FORMAT = build_response_format("router_agent", {
+    "chain of thought": {"type": "string"},
+    "guard_decision": {"type": "string", "enum": GUARD_DECISIONS},
+    "classification_decision": {"type": "string", "enum": AGENT_NAMES},
+    "message": {"type": "string"},
+})
+
+# Recommendation Agent: classificação do tipo de recomendação
+RECOMMENDATION_CLASSIFICATION_RESPONSE_FORMAT = build_response_format("recommendation_classification", {
+    "chain of thought": {"type": "string"},
+    "recommendation_type": {"type": "string", "enum": ["apriori", "popular", "popular by category"]},
+    "parameters": {"type": "array", "items": {"type": "string"}},
+})
+
+# Order Taking Agent
+ORDER_TAKING_RESPONSE_FORMAT = build_response_format("order_taking_agent", {
+    "chain of thought": {"type": "string"},
+    "step number": {"type": "string"},
+    "order": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "item": {"type": "string"},
+                "quantity": {"type": "number"},
+                "price": {"type": "number"},
+            },
+            "required": ["item", "quantity", "price"],
+            "additionalProperties": False,
+        },
+    },
+    "response": {"type": "string"},
+})
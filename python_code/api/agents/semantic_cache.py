@@ -0,0 +1,103 @@
+# Cache semântico de roteamento
+# Reaproveita as decisões do guard e da classificação para mensagens parecidas com mensagens já roteadas,
+# comparando o embedding da última mensagem do usuário com uma matriz de embeddings em memória
+# Cada linha guarda o contexto da mensagem (agente da resposta anterior do assistente): só linhas do mesmo contexto
+# são comparadas, pois a mesma resposta curta ("sim") pode ir para agentes diferentes conforme a conversa
+import threading
+from copy import deepcopy
+
+import numpy as np
+
+from .utils import get_embedding
+
+
+class SemanticRoutingCache():
+    # Método construtor
+    def __init__(self, embedding_client, threshold=0.92, capacity=2048, embedding_cache=None):
+        self.embedding_client = embedding_client  # cliente de embeddings (SentenceTransformer)
+        self.embedding_cache = embedding_cache  # cache de embeddings (opcional, compartilhado com o Details Agent)
+        self.threshold = threshold  # similaridade de cosseno mínima para reaproveitar uma decisão
+        self.capacity = capacity  # número máximo de mensagens na matriz
+
+        self.embeddings = None  # matriz (capacity, dimensão) com embeddings normalizados, alocada no 1º uso
+        self.decisions = [None] * capacity  # decisões de roteamento de cada linha da matriz
+        self.contexts = np.full(capacity, -1, dtype=np.int32)  # código do contexto de cada linha
+        self.context_codes = {}  # contexto -> código
+        self.last_used = np.zeros(capacity, dtype=np.int64)  # "relógio" do último uso de cada linha (LRU)
+        self.size = 0  # linhas ocupadas
+        self.clock = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Lock: a matriz pode ser lida e escrita por requisições concorrentes
+        self.lock = threading.Lock()
+
+    # Método para calcular o embedding normalizado de uma mensagem (CPU-bound: chamar via asyncio.to_thread)
+    def embed(self, text):
+        embedding = np.asarray(get_embedding(
+            self.embedding_client, text, self.embedding_cache)[0], dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm > 0 else embedding
+
+    # Método para buscar a decisão da mensagem mais parecida com o mesmo `context`
+    # Retorna (decisão, similaridade) ou None se nenhuma mensagem passar do limiar
+    def lookup(self, embedding, context=None):
+        with self.lock:
+            code = self.context_codes.get(context)
+            if self.size == 0 or code is None:
+                self.misses += 1
+                return None
+            # Similaridade de cosseno (vetores normalizados): produto escalar com todas as linhas
+            scores = self.embeddings[:self.size] @ embedding
+            scores[self.contexts[:self.size] != code] = -np.inf  # linhas de outro contexto
+            index = int(np.argmax(scores))
+            score = float(scores[index])
+            if score < self.threshold:
+                self.misses += 1
+                return None
+            self.clock += 1
+            self.last_used[index] = self.clock
+            self.hits += 1
+            return deepcopy(self.decisions[index]), score
+
+    # Método para adicionar uma mensagem roteada no contexto `context` (se a matriz estiver cheia, substitui a linha menos usada)
+    def add(self, embedding, decision, context=None):
+        with self.lock:
+            if self.embeddings is None:
+                self.embeddings = np.zeros(
+                    (self.capacity, embedding.shape[0]), dtype=np.float32)
+            if self.size < self.capacity:
+                index = self.size
+                self.size += 1
+            else:
+                index = int(np.argmin(self.last_used))
+                self.evictions += 1
+            self.clock += 1
+            self.embeddings[index] = embedding
+            self.decisions[index] = deepcopy(decision)
+            self.contexts[index] = self.context_codes.setdefault(context, len(self.context_codes))
+            self.last_used[index] = self.clock
+
+    # Método para limpar o cache
+    def clear(self):
+        with self.lock:
+            self.size = 0
+            self.decisions = [None] * self.capacity
+            self.contexts[:] = -1
+            self.context_codes = {}
+            self.last_used[:] = 0
+
+    # Método para obter as estatísticas do cache
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": self.size,
+                "capacity": self.capacity,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -1,35 +1,92 @@
 # Utilitários para agentes de chatbot
-
-# Função para obter uma resposta do chatbot.
-
-
-def get_chatbot_response(client, model_name, messages, temperature=0):
+import asyncio
+import os
+import contextlib
+import json
+import httpx
+import numpy as np
+import openai
+from .json_repair import repair_json_output
+from .schemas import validate_response_format
+
+# Contadores da verificação de JSON (double_check_json_output)
+json_repair_stats = {
+    "valid": 0,  # JSON já era válido
+    "repaired": 0,  # corrigido localmente (sem chamar o LLM)
+    "llm_fallback": 0,  # reparo local falhou: JSON enviado ao LLM para correção
+}
+
+# Contadores do modo de saída estruturada (get_structured_chatbot_response)
+structured_output_stats = {
+    "structured": 0,  # respostas obtidas com response_format (sem reparo)
+    "fallback": 0,  # backend sem suporte ou resposta inválida: caminho normal com reparo
+}
+# Backends (URL base + modelo) que rejeitaram o response_format: não tentar novamente
+structured_output_unsupported = set()
+
+
+# Função para ler o timeout (s) das chamadas de decisão (guard, classificação, roteamento e tipo de recomendação)
+# Respostas curtas em JSON: falham rápido em vez de esperar o timeout padrão do cliente (LLM_TIMEOUT), usado na geração
+def get_routing_timeout():
+    return httpx.Timeout(float(os.getenv("LLM_ROUTING_TIMEOUT", "15")),
+                         connect=float(os.getenv("LLM_CONNECT_TIMEOUT", "5")))
+
+
+# Função para ler uma flag booleana das variáveis de ambiente ("true", "1", "yes", "sim")
+def get_env_flag(name, default=False):
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("true", "1", "yes", "sim")
+
+
+# Função para cancelar uma task assíncrona e aguardar seu término (descartando o resultado)
+async def cancel_task(task):
+    task.cancel()
+    # A task cancelada pode terminar com CancelledError ou com a exceção original
+    with contextlib.suppress(asyncio.CancelledError, Exception):
+        await task
+
+
+# Função assíncrona para chamar o LLM e retornar o conteúdo da resposta (exceções da API não são tratadas)
+# O `client` deve ser um `AsyncOpenAI`, para não bloquear o event loop do servidor enquanto o LLM responde
+async def create_chat_completion(client, model_name, messages, temperature=0, **kwargs):
+    # Lista de mensagens enviadas para o LLM
+    input_messages = []
+    for message in messages:
+        # Adicionar dicionário à lista
+        input_messages.append({
+            # Quem está falando (usuário ou sistema)
+            "role": message["role"],
+            "content": message["content"]  # Conteúdo da mensagem
+        })
+
+    # Chamada à API do OpenAI para obter a resposta do modelo
+    response = await client.chat.completions.create(
+        model=model_name,  # Modelo de IA
+        # Lista de mensagens
+        messages=input_messages,
+        # Temperatura: quantidade de aleatoriedade na resposta
+        temperature=temperature,  # 0 pois queremos resultados concretos
+        top_p=0.8,
+        max_tokens=2_000,  # Limite de tokens na resposta
+        # Token: unidade de medida do modelo de IA (palavras, sub-palavras, caracteres, ...)
+        **kwargs
+    )
+    return response.choices[0].message.content
+
+
+# Função assíncrona para obter uma resposta do chatbot.
+# `timeout`: timeout desta chamada (segundos ou httpx.Timeout; None: usa o timeout padrão do cliente)
+async def get_chatbot_response(client, model_name, messages, temperature=0, timeout=None):
     # Type check do messages
     # if not isinstance(messages, list):
     #     raise TypeError("messages deve ser uma lista")
 
     try:
-        # Lista de mensagens enviadas para o LLM
-        input_messages = []
-        for message in messages:
-            # Adicionar dicionário à lista
-            input_messages.append({
-                # Quem está falando (usuário ou sistema)
-                "role": message["role"],
-                "content": message["content"]  # Conteúdo da mensagem
-            })
-
-        # Chamada à API do OpenAI para obter a resposta do modelo
-        response = client.chat.completions.create(
-            model=model_name,  # Modelo de IA
-            # Lista de mensagens
-            messages=input_messages,
-            # Temperatura: quantidade de aleatoriedade na resposta
-            temperature=temperature,  # 0 pois queremos resultados concretos
-            top_p=0.8,
-            max_tokens=2_000,  # Limite de tokens na resposta
-            # Token: unidade de medida do modelo de IA (palavras, sub-palavras, caracteres, ...)
-        ).choices[0].message.content
+        options = {"timeout": timeout} if timeout is not None else {}
+        response = await create_chat_completion(
+            client, model_name, messages, temperature, **options)
 
         # Verificar se a resposta está vazia
         if not response or response.strip() == "":
@@ -41,28 +98,118 @@ def get_chatbot_response(client, model_name, messages, temperature=0):
         print(f"Erro ao chamar a API: {e}")
         return ""  # Retornar string vazia em caso de erro
 
+
+# Gerador assíncrono para obter a resposta do chatbot em streaming (stream=True)
+# Produz os pedaços de texto (deltas) à medida que o LLM os gera; em caso de erro, imprime e encerra
+async def stream_chatbot_response(client, model_name, messages, temperature=0):
+    input_messages = [{"role": message["role"], "content": message["content"]}
+                      for message in messages]
+    try:
+        stream = await client.chat.completions.create(
+            model=model_name,
+            messages=input_messages,
+            temperature=temperature,
+            top_p=0.8,
+            max_tokens=2_000,
+            stream=True,
+        )
+        # `async with`: fecha a conexão mesmo se o cliente da API desconectar no meio do streaming
+        async with stream:
+            async for chunk in stream:
+                # Alguns backends enviam pedaços sem `choices` (ex.: uso de tokens no final)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+    except Exception as e:
+        print(f"Erro ao chamar a API (streaming): {e}")
+
+
+# Função assíncrona para obter uma resposta JSON usando saída estruturada (response_format com JSON schema)
+# Retorna o JSON como string, ou None se o backend não suportar o modo ou a resposta não seguir o schema
+# (nesse caso o agente usa o caminho normal: get_chatbot_response + double_check_json_output)
+# `timeout`: timeout desta chamada (segundos ou httpx.Timeout; None: usa o timeout padrão do cliente)
+async def get_structured_chatbot_response(client, model_name, messages, response_format, temperature=0, timeout=None):
+    backend = (str(client.base_url), model_name)
+    if backend in structured_output_unsupported:
+        structured_output_stats["fallback"] += 1
+        return None
+
+    try:
+        options = {"timeout": timeout} if timeout is not None else {}
+        response = await create_chat_completion(
+            client, model_name, messages, temperature, response_format=response_format, **options)
+    except (openai.BadRequestError, openai.UnprocessableEntityError, openai.NotFoundError) as e:
+        # Backend rejeitou o response_format: lembrar e usar o caminho normal daqui em diante
+        # Outros erros de requisição (ex.: contexto longo demais): caminho normal só nesta chamada
+        if any(term in str(e).lower() for term in ("response_format", "json_schema")):
+            print(f"Aviso: saída estruturada não suportada por {backend}: {e}")
+            structured_output_unsupported.add(backend)
+        else:
+            print(f"Erro ao chamar a API (saída estruturada): {e}")
+        structured_output_stats["fallback"] += 1
+        return None
+    except Exception as e:
+        print(f"Erro ao chamar a API: {e}")
+        structured_output_stats["fallback"] += 1
+        return None
+
+    # Alguns backends aceitam o parâmetro mas o ignoram: validar a resposta (chaves obrigatórias, tipos e enums)
+    try:
+        if validate_response_format(json.loads(response or ""), response_format):
+            structured_output_stats["structured"] += 1
+            return response
+    except json.JSONDecodeError:
+        pass
+    structured_output_stats["fallback"] += 1
+    return None
+
+
 # Função para obter os embeddings
+# Operação CPU-bound e síncrona: em código assíncrono, chamar via `asyncio.to_thread`
+# `cache`: cache de embeddings (EmbeddingCache) opcional; só os textos que não estão no cache são calculados
 
 
-def get_embedding(embedding_client, text_input):
+def get_embedding(embedding_client, text_input, cache=None):
     # Data check: Se for uma string, transforma em lista
     if isinstance(text_input, str):
         text_input = [text_input]
 
-    # Gerar embeddings usando o cliente | retorna um numpy array
-    embeddings = embedding_client.encode(text_input, convert_to_numpy=True)
-    # Retornar embeddings
-    return embeddings
+    if cache is None:
+        # Gerar embeddings usando o cliente | retorna um numpy array
+        embeddings = embedding_client.encode(text_input, convert_to_numpy=True)
+        # Retornar embeddings
+        return embeddings
+
+    # Buscar no cache e calcular apenas os textos que faltam (em um único lote)
+    embeddings = [cache.get(text) for text in text_input]
+    missing = [index for index, embedding in enumerate(embeddings)
+               if embedding is None]
+    if missing:
+        computed = embedding_client.encode(
+            [text_input[index] for index in missing], convert_to_numpy=True)
+        for index, embedding in zip(missing, computed):
+            cache.set(text_input[index], embedding)
+            embeddings[index] = embedding
+    return np.stack(embeddings).astype(np.float32, copy=False)
 
 # Verificação de output JSON
 
 
-def double_check_json_output(client, model_name, json_string):
+async def double_check_json_output(client, model_name, json_string):
     # Verificar se json_string está vazio ou é nulo
     if not json_string or json_string.strip() == "":
         # Retornar um JSON padrão para evitar erro
         return '{"recommendation_type": "popular", "chain of thought": "Não foi possível determinar o tipo de recomendação devido a um erro na resposta.", "parameters": []}'
 
+    # Reparo local: só chama o LLM se o JSON não puder ser corrigido deterministicamente
+    repaired, was_valid = repair_json_output(json_string)
+    if repaired is not None:
+        json_repair_stats["valid" if was_valid else "repaired"] += 1
+        return repaired
+    json_repair_stats["llm_fallback"] += 1
+
     prompt = f""" You will check this json string and correct any mistakes that will make it invalid. Then you will return the corrected json string. Nothing else. 
     If the Json is correct just return it.
 
@@ -82,7 +229,7 @@ def double_check_json_output(client, model_name, json_string):
 
     # Versão que realmente verifica e corrige o JSON:
     messages = [{'role': 'user', 'content': prompt}]
-    response = get_chatbot_response(client, model_name, messages)
+    response = await get_chatbot_response(client, model_name, messages)
 
     # Se a resposta estiver vazia, manter o JSON original
     if not response or response.strip() == "":
@@ -90,6 +237,10 @@ def double_check_json_output(client, model_name, json_string):
 
     # Remover triple backticks (indicadores de código)
     response = response.replace("`", "")
+    # Aplicar o reparo local também na resposta do LLM
+    repaired, _ = repair_json_output(response)
+    if repaired is not None:
+        response = repaired
 
     # Verificar se a resposta está vazia
     if not response or response.strip() == "":
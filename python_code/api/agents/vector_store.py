@@ -0,0 +1,316 @@
+# Armazenamento vetorial usado pelo Details Agent (busca dos contextos mais parecidos com a pergunta do usuário)
+# Backends:
+# - "local": matriz NumPy com os embeddings normalizados + metadados, salvos em disco e mapeados em memória (sem rede)
+# - "pinecone": índice do Pinecone (uma requisição de rede por consulta)
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Protocol
+
+import dotenv
+import numpy as np
+
+dotenv.load_dotenv()  # Carregar variáveis de ambiente
+
+# Arquivos do armazenamento local
+EMBEDDINGS_FILE = "embeddings.npy"  # matriz (n, dimensão) float32 com os embeddings normalizados
+# JSON lines: uma linha por linha da matriz, com id, hash do conteúdo e metadados (texto legível para humanos)
+METADATA_FILE = "metadata.jsonl"
+# Versão do índice: incrementada pelo vector_index_builder.py sempre que o conteúdo muda
+# (invalida o cache de resultados da busca e faz o armazenamento local ser recarregado)
+INDEX_VERSION_FILE = "index_version.json"
+# Versão do índice no Pinecone: um registro em um namespace separado (as consultas aos documentos não o encontram),
+# com a versão nos metadados. Fica no próprio Pinecone, então todas as réplicas da API veem a mesma versão
+PINECONE_VERSION_ID = "index_version"
+PINECONE_VERSION_NAMESPACE_SUFFIX = "__meta"
+# Diretório padrão do armazenamento local
+DEFAULT_LOCAL_PATH = os.path.join(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))), "vector_index")
+
+
+class VectorStore(Protocol):
+    version: Optional[int]  # versão do índice usada nas consultas (None: desconhecida)
+
+    def is_stale(self) -> bool:
+        # Docstring
+        '''
+        Função para verificar se o índice mudou depois que o armazenamento foi carregado.
+
+        Returns:
+        bool: True se o armazenamento deve ser recriado para refletir a nova versão do índice.
+        '''
+        ...
+
+    def query(self, embedding, top_k: int = 2) -> Dict[str, Any]:
+        # Docstring
+        '''
+        Função para buscar os vetores mais parecidos com um embedding (similaridade de cosseno).
+
+        Parameters:
+        embedding (np.ndarray | List[float]): Embedding da pergunta do usuário.
+        top_k (int): Número de resultados.
+
+        Returns:
+        Dict[str, Any]: {"matches": [{"id": ..., "score": ..., "metadata": {"text": ...}}, ...]}, do mais parecido ao menos parecido.
+        '''
+        ...
+
+
+# Função para ler a versão do índice salva em `path` (None se não houver)
+def read_index_version(path):
+    try:
+        with open(os.path.join(path, INDEX_VERSION_FILE), "r", encoding="utf-8") as file:
+            return json.load(file)["version"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+# Função para incrementar a versão do índice salva em `path` (arquivo temporário + renomear)
+def bump_index_version(path):
+    version = (read_index_version(path) or 0) + 1
+    os.makedirs(path, exist_ok=True)
+    version_path = os.path.join(path, INDEX_VERSION_FILE)
+    with open(version_path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump({"version": version, "updated_at": time.time()}, file)
+    os.replace(version_path + ".tmp", version_path)
+    return version
+
+
+# Leitura da versão do índice com cache: o arquivo só é relido quando muda (os.stat a cada chamada)
+class IndexVersionFile():
+    # Método construtor
+    def __init__(self, path):
+        self.path = path
+        self.signature = None  # (mtime, tamanho) da última leitura
+        self.version = None
+        self.lock = threading.Lock()
+
+    # Método para obter a versão atual do índice em disco (None se não houver)
+    def read(self):
+        try:
+            stat = os.stat(os.path.join(self.path, INDEX_VERSION_FILE))
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        with self.lock:
+            if signature != self.signature:
+                self.version = read_index_version(
+                    self.path) if signature is not None else None
+                self.signature = signature
+            return self.version
+
+
+# Função para obter o namespace do registro de versão de um namespace de documentos do Pinecone
+def get_pinecone_version_namespace(namespace):
+    return f"{namespace}{PINECONE_VERSION_NAMESPACE_SUFFIX}"
+
+
+# Função para ler a versão do índice registrada no Pinecone para `namespace` (None se não houver)
+def read_pinecone_index_version(index, namespace):
+    response = index.fetch(ids=[PINECONE_VERSION_ID],
+                           namespace=get_pinecone_version_namespace(namespace))
+    record = response.vectors.get(PINECONE_VERSION_ID)
+    if record is None or not record.metadata or "version" not in record.metadata:
+        return None
+    return int(record.metadata["version"])
+
+
+# Função para incrementar a versão do índice registrada no Pinecone para `namespace`
+# O registro precisa de um vetor com a dimensão do índice e ao menos um valor diferente de zero
+def bump_pinecone_index_version(index, namespace):
+    version = (read_pinecone_index_version(index, namespace) or 0) + 1
+    values = [0.0] * int(index.describe_index_stats()["dimension"])
+    values[0] = 1.0
+    index.upsert(vectors=[{
+        "id": PINECONE_VERSION_ID,
+        "values": values,
+        "metadata": {"version": version, "updated_at": time.time()},
+    }], namespace=get_pinecone_version_namespace(namespace))
+    return version
+
+
+# Leitura da versão do índice no Pinecone com cache: consultada no máximo a cada `refresh_interval` segundos
+# Uma atualização do índice é percebida por todas as réplicas em até `refresh_interval` segundos
+class PineconeIndexVersion():
+    # Método construtor
+    def __init__(self, index, namespace, refresh_interval=30.0):
+        self.index = index
+        self.namespace = namespace
+        self.refresh_interval = refresh_interval
+        self.version = None
+        self.next_refresh = 0.0  # instante (time.monotonic) da próxima consulta
+        self.lock = threading.Lock()
+
+    # Método para obter a versão atual do índice (None se não houver registro ou a consulta falhar)
+    def read(self):
+        with self.lock:
+            now = time.monotonic()
+            if now < self.next_refresh:
+                return self.version
+            # Só uma thread consulta o Pinecone; as outras usam a versão anterior enquanto isso
+            self.next_refresh = now + self.refresh_interval
+        try:
+            version = read_pinecone_index_version(self.index, self.namespace)
+        except Exception as e:
+            print(f"Aviso: não foi possível ler a versão do índice do Pinecone: {e}")
+            version = None  # versão desconhecida: sem cache até a próxima consulta
+        with self.lock:
+            self.version = version
+        return version
+
+
+# Função para normalizar as linhas de uma matriz de embeddings (norma 1: produto escalar = cosseno)
+def normalize_embeddings(embeddings):
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+# Armazenamento vetorial local (em processo)
+class LocalVectorStore():
+    # Método construtor: carregar o armazenamento salvo em `path`
+    # A matriz é mapeada em memória (mmap): o sistema operacional carrega só as páginas usadas
+    def __init__(self, path=DEFAULT_LOCAL_PATH):
+        self.path = path
+        # Versão carregada (lida antes dos arquivos: se o índice mudar durante a carga, a versão fica desatualizada
+        # e o armazenamento é recarregado na próxima consulta)
+        self.version_file = IndexVersionFile(path)
+        self.version = self.version_file.read()
+        self.embeddings = np.load(os.path.join(
+            path, EMBEDDINGS_FILE), mmap_mode="r")
+        self.ids: List[str] = []
+        self.hashes: List[str] = []  # hash do conteúdo de cada documento (usado na atualização incremental)
+        self.metadata: List[Dict[str, Any]] = []
+        for record in self.iter_records(path):
+            self.ids.append(record["id"])
+            self.hashes.append(record.get("hash"))
+            self.metadata.append(record["metadata"])
+        if len(self.ids) != self.embeddings.shape[0]:
+            raise ValueError(
+                f"Armazenamento vetorial inconsistente em {path}: {len(self.ids)} ids para {self.embeddings.shape[0]} embeddings")
+
+    # Método para verificar se o índice em disco mudou depois da carga (o armazenamento deve ser recriado)
+    def is_stale(self):
+        return self.version_file.read() != self.version
+
+    # Método para buscar os `top_k` vetores mais parecidos (produto escalar com todas as linhas da matriz)
+    def query(self, embedding, top_k=2):
+        query_embedding = normalize_embeddings(np.ravel(embedding))
+        scores = self.embeddings @ query_embedding
+        top_k = min(top_k, scores.shape[0])
+        if top_k <= 0:
+            return {"matches": []}
+        # argpartition: seleciona os top_k em O(n); só eles são ordenados
+        indexes = np.argpartition(-scores, top_k - 1)[:top_k]
+        indexes = indexes[np.argsort(-scores[indexes], kind="stable")]
+        return {"matches": [{
+            "id": self.ids[index],
+            "score": float(scores[index]),
+            "metadata": self.metadata[index],
+        } for index in indexes]}
+
+    # Método para ler os registros (id, hash, metadados) de um armazenamento salvo, um por vez
+    @staticmethod
+    def iter_records(path):
+        with open(os.path.join(path, METADATA_FILE), "r", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    # Método para verificar se existe um armazenamento salvo em `path`
+    @staticmethod
+    def exists(path):
+        return (os.path.exists(os.path.join(path, EMBEDDINGS_FILE))
+                and os.path.exists(os.path.join(path, METADATA_FILE)))
+
+    # Método para salvar um armazenamento local em `path` e carregá-lo
+    # Os arquivos são escritos em arquivos temporários e renomeados (uma leitura concorrente nunca vê um arquivo pela metade)
+    @classmethod
+    def save(cls, path, ids, embeddings, metadata, hashes=None):
+        embeddings = normalize_embeddings(embeddings)
+        if not (len(ids) == len(metadata) == embeddings.shape[0]):
+            raise ValueError("ids, embeddings e metadata devem ter o mesmo tamanho")
+        if hashes is None:
+            hashes = [None] * len(ids)
+        os.makedirs(path, exist_ok=True)
+
+        embeddings_path = os.path.join(path, EMBEDDINGS_FILE)
+        with open(embeddings_path + ".tmp", "wb") as file:
+            np.save(file, embeddings)
+        metadata_path = os.path.join(path, METADATA_FILE)
+        with open(metadata_path + ".tmp", "w", encoding="utf-8") as file:
+            for record_id, record_hash, record_metadata in zip(ids, hashes, metadata):
+                file.write(json.dumps({"id": record_id, "hash": record_hash, "metadata": record_metadata},
+                                      ensure_ascii=False) + "\n")
+        os.replace(embeddings_path + ".tmp", embeddings_path)
+        os.replace(metadata_path + ".tmp", metadata_path)
+        bump_index_version(path)
+        return cls(path)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+# Armazenamento vetorial no Pinecone
+class PineconeVectorStore():
+    # Método construtor
+    # `version_refresh_interval`: intervalo (segundos) entre as leituras da versão do índice registrada no Pinecone
+    def __init__(self, index_name=None, namespace="ns1", api_key=None, version_refresh_interval=30.0):
+        from pinecone import Pinecone  # dependência usada só por este backend
+
+        self.pc = Pinecone(api_key=api_key or os.getenv("PINECONE_API_KEY"))
+        self.index_name = index_name or os.getenv("PINECONE_INDEX_NAME")
+        self.namespace = namespace
+        self.index = self.pc.Index(self.index_name)
+        self.index_version = PineconeIndexVersion(
+            self.index, namespace, version_refresh_interval)
+
+    # Versão do índice (registro compartilhado no Pinecone; None se desconhecida: sem cache de resultados)
+    @property
+    def version(self):
+        return self.index_version.read()
+
+    # O índice remoto já reflete as atualizações: não precisa ser recarregado
+    def is_stale(self):
+        return False
+
+    # Método para buscar os `top_k` vetores mais parecidos no índice do Pinecone
+    def query(self, embedding, top_k=2):
+        # Certificar-se de que os embeddings estão no formato de lista
+        if isinstance(embedding, np.ndarray):
+            embedding = embedding.tolist()
+
+        results = self.index.query(
+            namespace=self.namespace,  # namespace do Pinecone
+            vector=embedding,  # embeddings de entrada
+            top_k=top_k,  # número de resultados mais próximos
+            # não incluir valores na resposta (os embeddings em si)
+            include_values=False,
+            # incluir metadados (texto legível para humanos)
+            include_metadata=True,
+        )
+        return {"matches": [{
+            "id": match["id"],
+            "score": match["score"],
+            "metadata": match["metadata"],
+        } for match in results["matches"]]}
+
+
+# Função para criar o armazenamento vetorial configurado nas variáveis de ambiente
+# - VECTOR_STORE_BACKEND: "local" ou "pinecone" (padrão: "pinecone")
+# - VECTOR_STORE_PATH: diretório do armazenamento local e do arquivo de versão do índice (padrão: api/vector_index)
+#   (só no backend local)
+# - PINECONE_VERSION_REFRESH_INTERVAL: intervalo entre as leituras da versão do índice no Pinecone em segundos
+#   (padrão: 30)
+def create_vector_store(backend=None):
+    if backend is None:
+        backend = os.getenv("VECTOR_STORE_BACKEND", "pinecone")
+    if backend == "local":
+        return LocalVectorStore(os.getenv("VECTOR_STORE_PATH") or DEFAULT_LOCAL_PATH)
+    if backend == "pinecone":
+        return PineconeVectorStore(version_refresh_interval=float(
+            os.getenv("PINECONE_VERSION_REFRESH_INTERVAL", "30")))
+    raise ValueError(
+        f"VECTOR_STORE_BACKEND inválido: {backend} (use 'local' ou 'pinecone')")
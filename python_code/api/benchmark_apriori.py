@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark das recomendações Apriori do Recommendation Agent.
+Compara o método anterior (concatena as regras dos produtos da cesta e ordena a lista inteira a cada chamada)
+com o índice compilado (agents/apriori_index.py: ids inteiros, regras pré-ordenadas e intercalação com heap),
+em catálogos sintéticos de vários tamanhos. Os dois métodos são conferidos (mesmo resultado) antes da medição.
+
+Uso:
+    python benchmark_apriori.py
+    python benchmark_apriori.py --sizes 20 2000 200000 --rules-per-product 5 --queries 2000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from agents.apriori_index import AprioriIndex
+
+
+# Método anterior (RecommendationAgent.get_apriori_recommendation), usado como referência
+def legacy_apriori_recommendation(apriori_recommendations, products, top_k=5):
+    recommendation_list = []
+    for product in products:
+        if product in apriori_recommendations:
+            recommendation_list += apriori_recommendations[product]
+    recommendation_list = sorted(
+        recommendation_list, key=lambda x: x['confidence'], reverse=True)
+
+    recommendations = []
+    recommendation_per_category = {}
+    for recommendation_item in recommendation_list:
+        if recommendation_item['product'] in recommendations:
+            continue
+        product_category = recommendation_item['product_category']
+        if product_category not in recommendation_per_category:
+            recommendation_per_category[product_category] = 0
+        if recommendation_per_category[product_category] >= 2:
+            continue
+        recommendation_per_category[product_category] += 1
+        recommendations.append(recommendation_item['product'])
+        if len(recommendations) >= top_k:
+            break
+    return recommendations
+
+
+# Função para gerar regras sintéticas no formato de apriori_recommendation.json
+# `size` produtos em ~size/10 categorias (mínimo 3); cada produto tem até `rules_per_product` regras
+# (confianças arredondadas, para haver empates como no arquivo real)
+def generate_rules(size, rules_per_product=5, seed=0):
+    rng = random.Random(seed)
+    categories = [f"Category {index}" for index in range(max(3, size // 10))]
+    product_categories = [rng.choice(categories) for _ in range(size)]
+    rules = {}
+    for antecedent in range(size):
+        consequents = rng.sample(range(size), min(rules_per_product, size - 1) + 1)
+        rules[f"Product {antecedent}"] = [{
+            "product": f"Product {consequent}",
+            "product_category": product_categories[consequent],
+            "confidence": round(rng.random(), 2),
+        } for consequent in consequents if consequent != antecedent][:rules_per_product]
+    return rules
+
+
+# Medir a latência (µs) de cada método nas mesmas cestas
+def measure(function, baskets, top_k):
+    latencies = []
+    for basket in baskets:
+        start = time.perf_counter()
+        function(basket, top_k)
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    latencies.sort()
+    return statistics.mean(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 2_000, 200_000])
+    parser.add_argument("--rules-per-product", type=int, default=5)
+    parser.add_argument("--basket-size", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"🛒 Recomendações Apriori | {args.rules_per_product} regras por produto | "
+          f"cestas de {args.basket_size} produtos | {args.queries} consultas | top_k={args.top_k}")
+    print(f"{'produtos':>9} | {'compilação (ms)':>15} | {'anterior média/p95 (µs)':>23} | "
+          f"{'índice média/p95 (µs)':>21} | {'ganho':>6}")
+    print("-" * 88)
+
+    for size in args.sizes:
+        rules = generate_rules(size, args.rules_per_product)
+        start = time.perf_counter()
+        index = AprioriIndex(rules)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        rng = random.Random(size)
+        products = list(rules)
+        baskets = [rng.sample(products, min(args.basket_size, size))
+                   for _ in range(args.queries)]
+        # Conferir os resultados antes de medir
+        for basket in baskets:
+            expected = legacy_apriori_recommendation(rules, basket, args.top_k)
+            assert index.recommend(basket, args.top_k) == expected, basket
+
+        legacy_mean, legacy_p95 = measure(
+            lambda basket, top_k: legacy_apriori_recommendation(rules, basket, top_k),
+            baskets, args.top_k)
+        index_mean, index_p95 = measure(index.recommend, baskets, args.top_k)
+        print(f"{size:>9} | {compile_ms:>15.1f} | {legacy_mean:>12.1f} / {legacy_p95:>8.1f} | "
+              f"{index_mean:>10.1f} / {index_p95:>8.1f} | {legacy_mean / index_mean:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark de throughput do pipeline assíncrono de agentes.
+Usa um LLM falso local (fake_llm.py) com latência fixa e mede quantas conversas
+por segundo o AgentController atende conforme a concorrência aumenta.
+
+Uso:
+    python benchmark_async.py --latency 0.05 --requests 64
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+# O cliente AsyncOpenAI exige uma chave, mesmo que o LLM seja falso
+os.environ.setdefault("OPENROUTER_API_KEY", "fake-key")
+
+from agents import GuardAgent, ClassificationAgent, OrderTakingAgent, RouterAgent  # noqa: E402
+from agent_controller import AgentController  # noqa: E402
+from fake_llm import FakeLLM  # noqa: E402
+
+
+# Criar um AgentController cujos agentes usam o cliente criado por `client_factory` (ex.: LLM falso)
+# O DetailsAgent não é instanciado (carregaria o modelo de embeddings): as mensagens do benchmark vão para o Order Taking Agent
+def build_controller(client_factory, parallel_routing=True, routing_mode="separate"):
+    controller = AgentController.__new__(AgentController)
+    controller.routing_mode = routing_mode
+    controller.parallel_routing = parallel_routing
+    controller.speculative_execution = False
+    controller.semantic_cache = None
+    # Cliente compartilhado entre os agentes (como no AgentController)
+    # Cache de decisões desativado: cada requisição do benchmark deve chegar ao LLM
+    controller.llm_client = client_factory()
+    controller.guard_agent = GuardAgent(
+        use_cache=False, client=controller.llm_client)
+    controller.classification_agent = ClassificationAgent(
+        use_cache=False, client=controller.llm_client)
+    controller.router_agent = RouterAgent(
+        use_cache=False, client=controller.llm_client)
+    controller.agent_dict = {
+        "order_taking_agent": OrderTakingAgent(None, client=controller.llm_client)}
+    return controller
+
+
+# Executar `total` requisições com no máximo `concurrency` simultâneas
+async def run_load(controller, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one_request(i):
+        input_data = {"input": {"messages": [
+            {"role": "user", "content": f"Eu gostaria de um latte, por favor ({i})"}]}}
+        async with semaphore:
+            start = time.perf_counter()
+            await controller.get_response(input_data)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    return elapsed, latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="latência simulada de cada chamada ao LLM (s)")
+    parser.add_argument("--requests", type=int, default=64,
+                        help="número de conversas por nível de concorrência")
+    parser.add_argument("--concurrency", type=int, nargs="+",
+                        default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--sequential-routing", action="store_true",
+                        help="executar Guard e Classification em sequência (PARALLEL_ROUTING=false)")
+    args = parser.parse_args()
+
+    fake_llm = FakeLLM(latency=args.latency)
+    controller = build_controller(
+        fake_llm.client, parallel_routing=not args.sequential_routing)
+
+    routing = "sequencial" if args.sequential_routing else "paralelo"
+    print(f"🧪 Benchmark assíncrono | latência do LLM: {args.latency*1000:.0f} ms | "
+          f"{args.requests} conversas por nível | roteamento {routing}")
+    print(f"{'concorrência':>12} | {'tempo (s)':>9} | {'conversas/s':>11} | {'p50 (ms)':>8} | {'speedup':>7}")
+    print("-" * 62)
+
+    baseline = None
+    for concurrency in args.concurrency:
+        elapsed, latencies = await run_load(controller, args.requests, concurrency)
+        throughput = args.requests / elapsed
+        baseline = baseline or throughput
+        print(f"{concurrency:>12} | {elapsed:>9.2f} | {throughput:>11.1f} | "
+              f"{statistics.median(latencies)*1000:>8.0f} | {throughput/baseline:>6.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos backends de embeddings (EMBEDDING_BACKEND): PyTorch (SentenceTransformer) x ONNX int8.
+Cada backend roda em um processo separado (inicialização a frio), medindo:
+- tempo de importação das bibliotecas e de carregamento do modelo (cold start)
+- memória residente máxima do processo (RSS)
+- latência de uma pergunta (média e p95) e throughput em lote (textos do índice)
+
+Requer o modelo ONNX exportado com export_onnx_embedding.py.
+
+Uso:
+    python benchmark_embedding_backends.py
+    python benchmark_embedding_backends.py --backends onnx --queries 500
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+# Bibliotecas importadas por cada backend
+BACKEND_IMPORTS = {
+    "torch": ["sentence_transformers"],
+    "onnx": ["onnxruntime", "tokenizers"],
+}
+
+
+# Executado em um processo novo: mede um backend e imprime o resultado em JSON
+def run_worker(backend, queries):
+    import importlib
+    import resource
+    import statistics
+
+    start = time.perf_counter()
+    for module in BACKEND_IMPORTS[backend]:
+        importlib.import_module(module)
+    import_time = time.perf_counter() - start
+
+    from agents.embedding_model import create_embedding_model
+    from vector_index_builder import iter_documents
+
+    start = time.perf_counter()
+    model = create_embedding_model(backend=backend)
+    load_time = time.perf_counter() - start
+
+    texts = [text for _, text in iter_documents(warn_duplicates=False)]
+    questions = ["Is Cappuccino lactose-free?", "Where is the coffee shop located?",
+                 "What are your opening hours?", "Which syrups do you have?"]
+    model.encode(questions, convert_to_numpy=True)  # aquecimento
+
+    latencies = []
+    for index in range(queries):
+        start = time.perf_counter()
+        model.encode([questions[index % len(questions)]], convert_to_numpy=True)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    start = time.perf_counter()
+    model.encode(texts, batch_size=32, convert_to_numpy=True)
+    batch_time = time.perf_counter() - start
+
+    print(json.dumps({
+        "import_s": import_time,
+        "load_s": load_time,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "latency_ms": statistics.mean(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "texts_per_s": len(texts) / batch_time,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=list(BACKEND_IMPORTS),
+                        default=list(BACKEND_IMPORTS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--worker", choices=list(BACKEND_IMPORTS),
+                        help=argparse.SUPPRESS)  # uso interno (processo filho)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.queries)
+        return
+
+    print(f"🧠 Backends de embeddings | {args.queries} perguntas")
+    print(f"{'backend':>7} | {'import (s)':>10} | {'modelo (s)':>10} | {'RSS (MB)':>8} | "
+          f"{'latência (ms)':>13} | {'p95 (ms)':>8} | {'lote (textos/s)':>15}")
+    print("-" * 90)
+    for backend in args.backends:
+        process = subprocess.run(
+            [sys.executable, __file__, "--worker", backend, "--queries", str(args.queries)],
+            capture_output=True, text=True)
+        if process.returncode != 0:
+            error = process.stderr.strip().splitlines()
+            print(f"{backend:>7} | erro: {error[-1] if error else process.returncode}")
+            continue
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        print(f"{backend:>7} | {result['import_s']:>10.2f} | {result['load_s']:>10.2f} | "
+              f"{result['rss_mb']:>8.0f} | {result['latency_ms']:>13.2f} | {result['p95_ms']:>8.2f} | "
+              f"{result['texts_per_s']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
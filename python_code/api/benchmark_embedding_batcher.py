@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark do micro-batching de embeddings (agents/embedding_batcher.py).
+Simula N requisições concorrentes, cada uma calculando o embedding de uma pergunta com get_embedding
+(como o Details Agent faz via asyncio.to_thread), e mede quantos embeddings por segundo são calculados
+chamando o modelo diretamente e com o EmbeddingBatcher.
+
+Usa o modelo de EMBEDDING_MODEL_NAME (.env), no backend de EMBEDDING_BACKEND. Com --fake (ou se o modelo não puder ser carregado),
+usa um modelo sintético em NumPy com um custo fixo por chamada + um custo por texto.
+
+Uso:
+    python benchmark_embedding_batcher.py
+    python benchmark_embedding_batcher.py --concurrency 1 4 16 64 --requests 512 --window-ms 5 --max-batch-size 32
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import dotenv
+import numpy as np
+
+from agents.embedding_batcher import EmbeddingBatcher
+from agents.embedding_model import create_embedding_model
+from agents.utils import get_embedding
+
+dotenv.load_dotenv()
+
+QUESTIONS = [
+    "Qual é o horário de funcionamento?",
+    "Vocês entregam no SoHo?",
+    "O cappuccino tem lactose?",
+    "Quais são os ingredientes do croissant?",
+    "Onde fica a cafeteria?",
+    "Quanto custa o latte?",
+]
+
+
+class SyntheticEmbeddingModel():
+    """Modelo sintético: projeção aleatória de um "bag of words" (custo fixo por chamada + custo por texto)."""
+
+    def __init__(self, dimension=384, vocabulary=4096, call_overhead=0.004, seed=0):
+        rng = np.random.default_rng(seed)
+        self.projection = rng.standard_normal(
+            (vocabulary, dimension)).astype(np.float32)
+        self.hidden = rng.standard_normal(
+            (dimension, dimension)).astype(np.float32)
+        self.call_overhead = call_overhead  # custo fixo (tokenização, preparação do modelo, ...)
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        # Custo fixo em Python puro (segura o GIL, como a preparação de cada chamada do modelo real)
+        end = time.perf_counter() + self.call_overhead
+        while time.perf_counter() < end:
+            pass
+        features = np.zeros(
+            (len(texts), self.projection.shape[0]), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                features[row, hash(word) % self.projection.shape[0]] += 1.0
+        embeddings = features @ self.projection
+        for _ in range(4):  # camadas "densas"
+            embeddings = np.tanh(embeddings @ self.hidden)
+        return embeddings
+
+
+# Medir embeddings por segundo com `concurrency` chamadores simultâneos
+def measure(embedding_client, concurrency, requests):
+    def worker(index):
+        get_embedding(embedding_client, QUESTIONS[index % len(QUESTIONS)] + f" #{index}")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(min(concurrency, 8))))  # aquecimento
+        start = time.perf_counter()
+        list(executor.map(worker, range(requests)))
+        elapsed = time.perf_counter() - start
+    return requests / elapsed
+
+
+def load_model(fake):
+    if not fake:
+        try:
+            return create_embedding_model(), os.getenv("EMBEDDING_MODEL_NAME")
+        except Exception as e:
+            print(f"Aviso: não foi possível carregar o modelo ({e}); usando o modelo sintético")
+    return SyntheticEmbeddingModel(), "sintético"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+",
+                        default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--window-ms", type=float, default=5)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--fake", action="store_true",
+                        help="usar o modelo sintético")
+    args = parser.parse_args()
+
+    model, model_name = load_model(args.fake)
+    print(f"🧮 Micro-batching de embeddings | modelo {model_name} | {args.requests} chamadas | "
+          f"janela {args.window_ms} ms | lote máx. {args.max_batch_size}")
+    print(f"{'concorrência':>12} | {'direto (emb/s)':>14} | {'batcher (emb/s)':>15} | "
+          f"{'lote médio':>10} | {'ganho':>6}")
+    print("-" * 70)
+    for concurrency in args.concurrency:
+        direct = measure(model, concurrency, args.requests)
+        batcher = EmbeddingBatcher(model, max_batch_size=args.max_batch_size,
+                                   max_wait=args.window_ms / 1000)
+        batched = measure(batcher, concurrency, args.requests)
+        average_batch_size = batcher.stats()["average_batch_size"]
+        batcher.close()
+        print(f"{concurrency:>12} | {direct:>14.1f} | {batched:>15.1f} | "
+              f"{average_batch_size:>10.1f} | {batched / direct:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
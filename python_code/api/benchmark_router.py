@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark lado a lado dos modos de roteamento:
+- "separate": Guard Agent + Classification Agent (duas chamadas + duas verificações de JSON)
+- "fused": RouterAgent (uma chamada + uma verificação de JSON)
+
+Mede latência, tokens consumidos e concordância das decisões entre os dois modos.
+Por padrão usa o LLM falso local; com --real usa o LLM configurado no .env (CHATBOT_URL, MODEL_NAME).
+
+Uso:
+    python benchmark_router.py
+    python benchmark_router.py --real
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import dotenv
+import httpx
+from openai import AsyncOpenAI
+
+dotenv.load_dotenv()
+# O cliente AsyncOpenAI exige uma chave, mesmo que o LLM seja falso
+os.environ.setdefault("OPENROUTER_API_KEY", "fake-key")
+
+from benchmark_async import build_controller  # noqa: E402
+from fake_llm import FakeLLM  # noqa: E402
+
+# Mensagens de teste: (mensagem, decisão do guard esperada, agente esperado)
+SAMPLE_MESSAGES = [
+    ("Eu gostaria de um latte, por favor", "allowed", "order_taking_agent"),
+    ("Quero dois croissants e um cappuccino", "allowed", "order_taking_agent"),
+    ("Qual é o horário de funcionamento?", "allowed", "details_agent"),
+    ("Onde fica a cafeteria?", "allowed", "details_agent"),
+    ("Quais são os ingredientes do Chocolate Croissant?", "allowed", "details_agent"),
+    ("Vocês fazem entrega no SoHo?", "allowed", "details_agent"),
+    ("O que você me recomenda?", "allowed", "recommendation_agent"),
+    ("Qual café você me recomenda pegar?", "allowed", "recommendation_agent"),
+    ("Quem ganhou o jogo de futebol ontem?", "not allowed", None),
+    ("Me passa a receita do cappuccino de vocês", "not allowed", None),
+]
+
+
+# Contador de tokens: hook do httpx que lê o campo `usage` de cada resposta do LLM
+class TokenCounter():
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+
+    async def on_response(self, response):
+        await response.aread()
+        try:
+            usage = response.json().get("usage") or {}
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return
+        self.calls += 1
+        self.prompt_tokens += usage.get("prompt_tokens", 0)
+        self.completion_tokens += usage.get("completion_tokens", 0)
+
+    def reset(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+
+
+# Rotear todas as mensagens de teste em um modo e coletar latências e decisões
+async def run_mode(controller, counter):
+    counter.reset()
+    latencies = []
+    decisions = []
+    for message, _, _ in SAMPLE_MESSAGES:
+        messages = [{"role": "user", "content": message}]
+        start = time.perf_counter()
+        guard_response, classification_response = await controller.route(messages)
+        latencies.append(time.perf_counter() - start)
+        guard_decision = guard_response["memory"]["guard_decision"]
+        classification_decision = (classification_response["memory"]["classification_decision"]
+                                   if classification_response else None)
+        decisions.append((guard_decision, classification_decision))
+    tokens = counter.prompt_tokens + counter.completion_tokens
+    return latencies, decisions, tokens, counter.calls
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--real", action="store_true",
+                        help="usar o LLM configurado no .env em vez do LLM falso")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="latência simulada de cada chamada ao LLM falso (s)")
+    args = parser.parse_args()
+
+    counter = TokenCounter()
+    event_hooks = {"response": [counter.on_response]}
+    if args.real:
+        def client_factory():
+            return AsyncOpenAI(
+                api_key=os.getenv("OPENROUTER_API_KEY"),
+                base_url=os.getenv("CHATBOT_URL"),
+                http_client=httpx.AsyncClient(event_hooks=event_hooks))
+    else:
+        fake_llm = FakeLLM(latency=args.latency)
+
+        def client_factory():
+            return fake_llm.client(event_hooks=event_hooks)
+
+    results = {}
+    for mode, parallel_routing in [("separate (sequencial)", False), ("separate (paralelo)", True), ("fused", True)]:
+        routing_mode = "fused" if mode == "fused" else "separate"
+        controller = build_controller(
+            client_factory, parallel_routing=parallel_routing, routing_mode=routing_mode)
+        results[mode] = await run_mode(controller, counter)
+
+    llm = "LLM real" if args.real else f"LLM falso ({args.latency*1000:.0f} ms)"
+    print(f"🧪 Benchmark de roteamento | {llm} | {len(SAMPLE_MESSAGES)} mensagens")
+    print(f"{'modo':>22} | {'p50 (ms)':>8} | {'média (ms)':>10} | {'chamadas':>8} | {'tokens':>7} | {'acerto':>6}")
+    print("-" * 78)
+    for mode, (latencies, decisions, tokens, calls) in results.items():
+        correct = sum(1 for (guard, agent), (_, expected_guard, expected_agent)
+                      in zip(decisions, SAMPLE_MESSAGES)
+                      if guard == expected_guard and (guard == "not allowed" or agent == expected_agent))
+        print(f"{mode:>22} | {statistics.median(latencies)*1000:>8.0f} | "
+              f"{statistics.mean(latencies)*1000:>10.0f} | {calls:>8} | {tokens:>7} | "
+              f"{correct}/{len(SAMPLE_MESSAGES)}")
+
+    # Concordância entre o modo separado e o fundido
+    separate_decisions = results["separate (paralelo)"][1]
+    fused_decisions = results["fused"][1]
+    agreement = sum(1 for a, b in zip(separate_decisions, fused_decisions) if a == b)
+    print(f"\nConcordância separate x fused: {agreement}/{len(SAMPLE_MESSAGES)}")
+    for (message, _, _), a, b in zip(SAMPLE_MESSAGES, separate_decisions, fused_decisions):
+        if a != b:
+            print(f"  ≠ {message!r}: separate={a} | fused={b}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
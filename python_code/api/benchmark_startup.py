@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark da inicialização da API (cold start), em processos novos:
+- tempo de importação e de construção de cada agente (importação preguiçosa: cada agente importa só o que usa)
+- tempo do warm-up do Details Agent (modelo de embeddings e armazenamento vetorial, carregados fora do construtor)
+- tempo de `import main` (controlador construído): quando a API passa a aceitar conexões
+
+Os importes são medidos na ordem da tabela: dependências já carregadas por uma etapa anterior
+(ex.: openai) não contam de novo nas seguintes.
+
+Usa o modelo e o armazenamento vetorial configurados no .env (EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND,
+VECTOR_STORE_BACKEND, ...). Nenhuma chamada é feita ao LLM.
+
+Uso:
+    python benchmark_startup.py
+    python benchmark_startup.py --runs 5 --skip-models
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+folder_path = os.path.dirname(os.path.abspath(__file__))
+
+# Agentes na ordem de construção do AgentController: (classe, módulo)
+AGENTS = [
+    ("GuardAgent", "agents.guard_agent"),
+    ("ClassificationAgent", "agents.classification_agent"),
+    ("RouterAgent", "agents.router_agent"),
+    ("RecommendationAgent", "agents.recommendation_agent"),
+    ("DetailsAgent", "agents.details_agent"),
+    ("OrderTakingAgent", "agents.order_taking_agent"),
+]
+
+
+# Construir um agente com os mesmos argumentos usados pelo AgentController
+def build_agent(agent_class, client, agents):
+    if agent_class.__name__ == "RecommendationAgent":
+        return agent_class(
+            os.path.join(folder_path, "recommendation_objects/apriori_recommendation.json"),
+            os.path.join(folder_path, "recommendation_objects/popularity_recommendation.csv"),
+            client=client)
+    if agent_class.__name__ == "OrderTakingAgent":
+        return agent_class(agents["RecommendationAgent"], client=client)
+    return agent_class(client=client)
+
+
+# Executado em um processo novo: mede cada etapa e imprime o resultado em JSON
+def run_agents_worker(skip_models):
+    import importlib
+
+    steps = []
+
+    def measure(name, function):
+        start = time.perf_counter()
+        result = function()
+        steps.append((name, time.perf_counter() - start))
+        return result
+
+    llm_client = measure("import agents.llm_client (openai, httpx)",
+                         lambda: importlib.import_module("agents.llm_client"))
+    client = measure("create_llm_client()", llm_client.create_llm_client)
+
+    agents = {}
+    for class_name, module_name in AGENTS:
+        module = measure(f"import {module_name}",
+                         lambda: importlib.import_module(module_name))
+        agent_class = getattr(module, class_name)
+        agents[class_name] = measure(
+            f"{class_name}()", lambda: build_agent(agent_class, client, agents))
+
+    if not skip_models:
+        details_agent = agents["DetailsAgent"]
+        measure("warm-up: modelo de embeddings", details_agent.embedding_model.load)
+        measure("warm-up: armazenamento vetorial", details_agent.get_vector_store)
+
+    print(json.dumps(steps))
+
+
+# Executado em um processo novo: tempo de `import main` (importação + construção do AgentController)
+def run_main_worker():
+    start = time.perf_counter()
+    import main  # noqa: F401
+    print(json.dumps([("import main", time.perf_counter() - start)]))
+
+
+def run_worker_process(worker, skip_models):
+    command = [sys.executable, __file__, "--worker", worker]
+    if skip_models:
+        command.append("--skip-models")
+    process = subprocess.run(command, capture_output=True, text=True, cwd=folder_path)
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()
+        raise RuntimeError(error[-1] if error else f"código {process.returncode}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3,
+                        help="processos por medida (é mostrada a mediana)")
+    parser.add_argument("--skip-models", action="store_true",
+                        help="não medir o carregamento do modelo de embeddings e do armazenamento vetorial")
+    parser.add_argument("--worker", choices=["agents", "main"],
+                        help=argparse.SUPPRESS)  # uso interno (processo filho)
+    args = parser.parse_args()
+
+    if args.worker == "agents":
+        run_agents_worker(args.skip_models)
+        return
+    if args.worker == "main":
+        run_main_worker()
+        return
+
+    print(f"🚀 Inicialização da API | mediana de {args.runs} processos")
+    print(f"{'etapa':<45} | {'tempo (s)':>9}")
+    print("-" * 58)
+    for worker in ("agents", "main"):
+        try:
+            runs = [run_worker_process(worker, args.skip_models)
+                    for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{worker:<45} | erro: {e}")
+            continue
+        for index, (name, _) in enumerate(runs[0]):
+            seconds = statistics.median(run[index][1] for run in runs)
+            print(f"{name:<45} | {seconds:>9.3f}")
+        if worker == "agents":
+            total = statistics.median(sum(seconds for _, seconds in run) for run in runs)
+            print(f"{'total (agentes + warm-up)':<45} | {total:>9.3f}")
+            print("-" * 58)
+
+
+if __name__ == "__main__":
+    main()
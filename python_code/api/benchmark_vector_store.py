@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark da latência de consulta do armazenamento vetorial do Details Agent.
+Compara o backend local (matriz NumPy mapeada em memória) com o Pinecone (requisição de rede).
+
+O backend local é medido com embeddings aleatórios para vários tamanhos de índice
+(o índice real da cafeteria tem ~20 documentos). O Pinecone só é medido com --pinecone
+(requer PINECONE_API_KEY e PINECONE_INDEX_NAME no .env).
+
+Uso:
+    python benchmark_vector_store.py
+    python benchmark_vector_store.py --sizes 20 10000 100000 --queries 500 --pinecone
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from agents.vector_store import LocalVectorStore, PineconeVectorStore
+
+
+# Medir a latência (ms) de `queries` consultas com embeddings aleatórios
+def measure(store, dimension, queries, top_k, seed=0):
+    rng = np.random.default_rng(seed)
+    query_embeddings = rng.standard_normal(
+        (queries, dimension)).astype(np.float32)
+    store.query(query_embeddings[0], top_k)  # aquecimento
+    latencies = []
+    for query_embedding in query_embeddings:
+        start = time.perf_counter()
+        store.query(query_embedding, top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.mean(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[20, 1_000, 10_000, 100_000])
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=2)
+    parser.add_argument("--pinecone", action="store_true",
+                        help="medir também o índice do Pinecone configurado no .env")
+    args = parser.parse_args()
+
+    print(f"🔎 Armazenamento vetorial | dimensão {args.dimension} | "
+          f"{args.queries} consultas | top_k={args.top_k}")
+    print(f"{'backend':>9} | {'documentos':>10} | {'média (ms)':>10} | {'p95 (ms)':>8}")
+    print("-" * 48)
+
+    rng = np.random.default_rng(42)
+    for size in args.sizes:
+        embeddings = rng.standard_normal(
+            (size, args.dimension)).astype(np.float32)
+        with tempfile.TemporaryDirectory() as path:
+            store = LocalVectorStore.save(
+                path,
+                ids=[str(i) for i in range(size)],
+                embeddings=embeddings,
+                metadata=[{"text": f"documento {i}"} for i in range(size)],
+            )
+            mean, p95 = measure(store, args.dimension,
+                                args.queries, args.top_k)
+            del store  # liberar o mmap antes de apagar o diretório
+        print(f"{'local':>9} | {size:>10} | {mean:>10.3f} | {p95:>8.3f}")
+
+    if args.pinecone:
+        store = PineconeVectorStore()
+        mean, p95 = measure(store, args.dimension,
+                            min(args.queries, 50), args.top_k)
+        print(f"{'pinecone':>9} | {'-':>10} | {mean:>10.3f} | {p95:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Avaliação offline do cache semântico de roteamento.
+Simula um fluxo de mensagens rotuladas passando pelo cache para vários limiares de similaridade:
+em uma falha (miss), a decisão correta é adicionada ao cache (como se o LLM tivesse acertado);
+em um acerto (hit), a decisão reaproveitada é comparada com o rótulo da mensagem.
+
+Mostra como a taxa de acerto do cache e a precisão das decisões reaproveitadas variam com o limiar.
+Usa o modelo de embeddings de EMBEDDING_MODEL_NAME (.env).
+
+Uso:
+    python evaluate_semantic_cache.py
+    python evaluate_semantic_cache.py --dataset mensagens_rotuladas.jsonl --thresholds 0.85 0.9 0.95
+O dataset (JSONL) deve ter as chaves "message", "guard_decision" e "classification_decision".
+"""
+
+import argparse
+import json
+import random
+
+import dotenv
+import numpy as np
+
+from agents.embedding_model import create_embedding_model
+from agents.semantic_cache import SemanticRoutingCache
+
+dotenv.load_dotenv()
+
+# Mensagens rotuladas (com paráfrases) usadas quando nenhum dataset é informado
+SAMPLE_DATASET = [
+    ("O que você me recomenda?", "allowed", "recommendation_agent"),
+    ("O que vocês recomendam?", "allowed", "recommendation_agent"),
+    ("Pode me recomendar alguma coisa?", "allowed", "recommendation_agent"),
+    ("Qual café você me recomenda?", "allowed", "recommendation_agent"),
+    ("Me recomenda um doce", "allowed", "recommendation_agent"),
+    ("Eu gostaria de um latte", "allowed", "order_taking_agent"),
+    ("Eu gostaria de um latte, por favor", "allowed", "order_taking_agent"),
+    ("Quero um latte", "allowed", "order_taking_agent"),
+    ("Quero um cappuccino", "allowed", "order_taking_agent"),
+    ("Me vê dois croissants", "allowed", "order_taking_agent"),
+    ("Quero pedir um espresso", "allowed", "order_taking_agent"),
+    ("Onde vocês ficam?", "allowed", "details_agent"),
+    ("Onde fica a cafeteria?", "allowed", "details_agent"),
+    ("Qual é o endereço de vocês?", "allowed", "details_agent"),
+    ("Qual o horário de funcionamento?", "allowed", "details_agent"),
+    ("Que horas vocês abrem?", "allowed", "details_agent"),
+    ("Vocês abrem no domingo?", "allowed", "details_agent"),
+    ("Vocês entregam no SoHo?", "allowed", "details_agent"),
+    ("Quais bairros vocês atendem com entrega?", "allowed", "details_agent"),
+    ("O cappuccino tem lactose?", "allowed", "details_agent"),
+    ("Quais são os ingredientes do croissant?", "allowed", "details_agent"),
+    ("O que tem no cardápio?", "allowed", "details_agent"),
+    ("Quais itens vocês têm no menu?", "allowed", "details_agent"),
+    ("Quem ganhou o jogo de futebol ontem?", "not allowed", None),
+    ("Qual o resultado do futebol?", "not allowed", None),
+    ("Como faço um cappuccino em casa?", "not allowed", None),
+    ("Me passa a receita do croissant", "not allowed", None),
+    ("Qual o salário dos funcionários?", "not allowed", None),
+    ("Em quem devo votar na eleição?", "not allowed", None),
+    ("Me conta uma piada sobre política", "not allowed", None),
+]
+
+
+# Carregar um dataset JSONL de mensagens rotuladas
+def load_dataset(path):
+    dataset = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                row = json.loads(line)
+                dataset.append((row["message"], row["guard_decision"],
+                                row.get("classification_decision")))
+    return dataset
+
+
+# Simular o fluxo de mensagens com um limiar e retornar (taxa de acerto, precisão dos acertos)
+def evaluate(embeddings, dataset, threshold, capacity):
+    cache = SemanticRoutingCache(None, threshold=threshold, capacity=capacity)
+    correct_hits = 0
+    for embedding, (_, guard_decision, classification_decision) in zip(embeddings, dataset):
+        label = (guard_decision, classification_decision)
+        cached = cache.lookup(embedding)
+        if cached is None:
+            cache.add(embedding, label)
+        elif cached[0] == label:
+            correct_hits += 1
+    stats = cache.stats()
+    accuracy = correct_hits / stats["hits"] if stats["hits"] else 1.0
+    return stats["hit_rate"], accuracy, stats["hits"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", help="arquivo JSONL com mensagens rotuladas")
+    parser.add_argument("--thresholds", type=float, nargs="+",
+                        default=[0.75, 0.8, 0.85, 0.88, 0.9, 0.92, 0.95, 0.98])
+    parser.add_argument("--capacity", type=int, default=2048)
+    parser.add_argument("--seed", type=int, default=42,
+                        help="semente para embaralhar a ordem das mensagens")
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.dataset) if args.dataset else list(SAMPLE_DATASET)
+    random.Random(args.seed).shuffle(dataset)
+
+    # Calcular os embeddings uma única vez (reaproveitados para todos os limiares)
+    embedding_client = create_embedding_model()
+    embeddings = embedding_client.encode(
+        [message for message, _, _ in dataset], convert_to_numpy=True).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    print(f"🧪 Cache semântico | {len(dataset)} mensagens | capacidade {args.capacity}")
+    print(f"{'limiar':>6} | {'acertos':>7} | {'taxa de acerto':>14} | {'precisão':>8}")
+    print("-" * 46)
+    for threshold in args.thresholds:
+        hit_rate, accuracy, hits = evaluate(
+            embeddings, dataset, threshold, args.capacity)
+        print(f"{threshold:>6.2f} | {hits:>7} | {hit_rate:>13.1%} | {accuracy:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
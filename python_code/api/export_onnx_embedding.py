@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Exportação do modelo de embeddings (EMBEDDING_MODEL_NAME) para ONNX, com quantização dinâmica int8,
+para o backend EMBEDDING_BACKEND=onnx (agents/embedding_model.py).
+
+Gera, em --output:
+- model.onnx: transformer exportado (float32)
+- model_quantized.onnx: pesos quantizados em int8 (usado pelo backend)
+- tokenizer.json: tokenizador (biblioteca `tokenizers`, sem PyTorch)
+- embedding_config.json: pooling, normalização, tamanho máximo da sequência e dimensão
+
+Requer as dependências de exportação (PyTorch, sentence-transformers, onnx e onnxruntime), que só
+precisam estar instaladas na máquina que exporta o modelo (não no container de produção).
+
+Uso:
+    python export_onnx_embedding.py
+    python export_onnx_embedding.py --model BAAI/bge-small-en-v1.5 --output onnx_embedding_model
+"""
+
+import argparse
+import json
+import os
+
+import dotenv
+import numpy as np
+
+from agents.embedding_model import (DEFAULT_ONNX_PATH, EMBEDDING_CONFIG_FILE, ONNX_FULL_MODEL_FILE,
+                                    ONNX_MODEL_FILE, TOKENIZER_FILE, OnnxEmbeddingModel)
+from vector_index_builder import iter_documents
+
+dotenv.load_dotenv()
+
+
+# Exportar um SentenceTransformer (Transformer + Pooling [+ Normalize]) para ONNX
+def export(model_name, output_path, opset=17):
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer, models
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer, pooling = model[0], model[1]
+    others = [module for module in list(model)[2:]
+              if not isinstance(module, models.Normalize)]
+    if not isinstance(transformer, models.Transformer) or not isinstance(pooling, models.Pooling) or others:
+        raise ValueError(
+            f"Arquitetura não suportada: {[type(module).__name__ for module in model]}")
+    pooling_mode = pooling.get_pooling_mode_str()
+    if pooling_mode not in ("cls", "mean", "max"):
+        raise ValueError(f"Pooling não suportado: {pooling_mode}")
+
+    os.makedirs(output_path, exist_ok=True)
+    tokenizer = transformer.tokenizer
+    tokenizer.backend_tokenizer.save(os.path.join(output_path, TOKENIZER_FILE))
+    with open(os.path.join(output_path, EMBEDDING_CONFIG_FILE), "w", encoding="utf-8") as file:
+        json.dump({
+            "model_name": model_name,
+            "pooling_mode": pooling_mode,
+            "normalize": any(isinstance(module, models.Normalize) for module in model),
+            "max_seq_length": model.max_seq_length,
+            "dimension": model.get_sentence_embedding_dimension(),
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": tokenizer.pad_token_id,
+        }, file, indent=2)
+
+    # Transformer: entradas do tokenizador -> embeddings dos tokens (o pooling é feito em NumPy)
+    auto_model = transformer.auto_model.eval()
+    input_names = ["input_ids", "attention_mask"]
+    if "token_type_ids" in tokenizer.model_input_names:
+        input_names.append("token_type_ids")
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    sample = tokenizer(["Exemplo de entrada", "Outro exemplo"],
+                       padding=True, return_tensors="pt")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+    full_model_path = os.path.join(output_path, ONNX_FULL_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(), tuple(sample[name] for name in input_names), full_model_path,
+            input_names=input_names, output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes, opset_version=opset, dynamo=False)
+
+    # Quantização dinâmica: pesos em int8, ativações quantizadas em tempo de execução
+    quantize_dynamic(full_model_path, os.path.join(output_path, ONNX_MODEL_FILE),
+                     weight_type=QuantType.QInt8)
+    return model
+
+
+# Comparar os embeddings do PyTorch e do ONNX nos textos do índice (similaridade de cosseno por documento)
+def check_parity(model, output_path):
+    texts = [text for _, text in iter_documents()]
+    expected = model.encode(texts, convert_to_numpy=True)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    for quantized in (False, True):
+        onnx_model = OnnxEmbeddingModel(output_path, quantized=quantized)
+        actual = onnx_model.encode(texts)
+        actual /= np.linalg.norm(actual, axis=1, keepdims=True)
+        similarities = (expected * actual).sum(axis=1)
+        name = "int8" if quantized else "float32"
+        print(f"   {name:>7}: cosseno mínimo {similarities.min():.4f} | médio {similarities.mean():.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL_NAME"))
+    parser.add_argument("--output", default=os.getenv("EMBEDDING_ONNX_PATH") or DEFAULT_ONNX_PATH)
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    model = export(args.model, args.output, args.opset)
+    print(f"✅ Modelo {args.model} exportado para {args.output}")
+    print("🔍 Paridade com o PyTorch nos textos do índice:")
+    check_parity(model, args.output)
+
+
+if __name__ == "__main__":
+    main()
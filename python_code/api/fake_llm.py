@@ -0,0 +1,183 @@
+"""
+LLM falso (local) compatível com a API de chat da OpenAI.
+Usado em benchmarks e testes para simular a latência do LLM sem acessar a rede.
+"""
+
+import asyncio
+import json
+import re
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+# Palavras que fazem o guard falso bloquear a mensagem
+OFF_TOPIC_WORDS = ["futebol", "política", "politica", "receita", "funcionário"]
+
+
+# Decisão do guard falso: bloquear mensagens com palavras fora do contexto da cafeteria
+def fake_guard_decision(message):
+    if any(word in message.lower() for word in OFF_TOPIC_WORDS):
+        return "not allowed"
+    return "allowed"
+
+
+# Decisão do classificador falso: escolher o agente por palavras-chave
+def fake_classification_decision(message):
+    message = message.lower()
+    if "recomend" in message:
+        return "recommendation_agent"
+    if any(word in message for word in ["horário", "onde", "localiza", "ingrediente", "menu", "cardápio", "entrega"]):
+        return "details_agent"
+    return "order_taking_agent"
+
+
+# Resposta padrão do LLM falso: identifica o agente pelo system prompt e devolve uma saída plausível
+def default_responder(messages):
+    system_prompt = messages[0]["content"] if messages[0]["role"] == "system" else ""
+    last_message = messages[-1]["content"]
+
+    # Verificação de JSON (double_check_json_output): devolver o JSON entre crases
+    if "You will check this json string" in last_message:
+        match = re.search(r"```(.*)```", last_message, re.DOTALL)
+        return match.group(1).strip() if match else last_message
+
+    # Router Agent (guard + classificação em uma única chamada)
+    if "guard_decision" in system_prompt:
+        guard_decision = fake_guard_decision(last_message)
+        return json.dumps({
+            "chain of thought": "Avaliação do guard e escolha do agente.",
+            "guard_decision": guard_decision,
+            "classification_decision": fake_classification_decision(last_message),
+            "message": "" if guard_decision == "allowed" else "Desculpe, não posso ajudar com isso. Posso te ajudar com seu pedido?"
+        }, ensure_ascii=False)
+
+    # Guard Agent
+    if "se o usuário está perguntando algo relevante" in system_prompt:
+        if fake_guard_decision(last_message) == "not allowed":
+            return json.dumps({
+                "chain of thought": "A mensagem não está relacionada à cafeteria.",
+                "decision": "not allowed",
+                "message": "Desculpe, não posso ajudar com isso. Posso te ajudar com seu pedido?"
+            }, ensure_ascii=False)
+        return json.dumps({
+            "chain of thought": "A mensagem está relacionada à cafeteria.",
+            "decision": "allowed",
+            "message": ""
+        }, ensure_ascii=False)
+
+    # Classification Agent
+    if "qual agente deve lidar com a entrada do usuário" in system_prompt:
+        decision = fake_classification_decision(last_message)
+        return json.dumps({
+            "chain of thought": f"A mensagem deve ser tratada pelo {decision}.",
+            "decision": decision,
+            "message": ""
+        }, ensure_ascii=False)
+
+    # Classificação do tipo de recomendação (Recommendation Agent)
+    if "tipos de recomendações" in system_prompt:
+        return json.dumps({
+            "chain of thought": "O usuário pediu uma recomendação geral.",
+            "recommendation_type": "popular",
+            "parameters": []
+        }, ensure_ascii=False)
+
+    # Order Taking Agent
+    if "Merry's way" in system_prompt and "order" in system_prompt:
+        return json.dumps({
+            "chain of thought": "O usuário está fazendo um pedido.",
+            "step number": "1",
+            "order": [{"item": "Latte", "quantity": 1, "price": 4.75}],
+            "response": "Anotei um Latte. Deseja mais alguma coisa?"
+        }, ensure_ascii=False)
+
+    # Agentes de texto livre (Details e Recommendation)
+    return "Resposta do LLM falso para a mensagem do usuário."
+
+
+# Contagem aproximada de tokens (palavras) para simular o campo `usage`
+def count_tokens(text):
+    return len(str(text).split())
+
+
+class FakeLLM():
+    # Método construtor
+    def __init__(self, latency=0.05, responder=default_responder, supports_response_format=True,
+                 chunk_size=8, chunk_latency=0.0):
+        self.latency = latency  # latência simulada de cada chamada (segundos)
+        # Streaming (stream=True): tamanho (caracteres) e intervalo (segundos) entre os pedaços enviados
+        self.chunk_size = chunk_size
+        self.chunk_latency = chunk_latency
+        self.responder = responder  # função que gera o conteúdo da resposta
+        # Simular backends sem suporte a saída estruturada (response_format → erro 400)
+        self.supports_response_format = supports_response_format
+        self.calls = 0  # número de chamadas recebidas
+        self.requests = []  # corpo das requisições recebidas (para inspeção em testes)
+
+    # Handler HTTP (assíncrono) que simula o endpoint /chat/completions
+    async def handle(self, request: httpx.Request):
+        body = json.loads(request.content)
+        self.calls += 1
+        self.requests.append(body)
+
+        await asyncio.sleep(self.latency)  # simula o tempo de geração do LLM
+        if "response_format" in body and not self.supports_response_format:
+            return httpx.Response(400, json={"error": {
+                "message": "response_format is not supported by this model",
+                "type": "invalid_request_error"
+            }})
+        content = self.responder(body["messages"])
+        if body.get("stream"):
+            return httpx.Response(200, headers={"content-type": "text/event-stream"},
+                                  content=self.stream_chunks(content, body))
+
+        prompt_tokens = sum(count_tokens(message["content"])
+                            for message in body["messages"])
+        completion_tokens = count_tokens(content)
+        return httpx.Response(200, json={
+            "id": f"fake-{self.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model") or "fake-model",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    # Gerador assíncrono com os pedaços da resposta no formato de streaming da OpenAI (Server-Sent Events)
+    async def stream_chunks(self, content, body):
+        for start in range(0, len(content), self.chunk_size):
+            await asyncio.sleep(self.chunk_latency)
+            chunk = {
+                "id": f"fake-{self.calls}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model") or "fake-model",
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": content[start:start + self.chunk_size]},
+                    "finish_reason": None
+                }]
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+        yield b"data: [DONE]\n\n"
+
+    # Criar um cliente AsyncOpenAI que envia as requisições para este LLM falso
+    # `event_hooks`: hooks do httpx (ex.: contar tokens das respostas em benchmarks)
+    def client(self, event_hooks=None):
+        http_client = httpx.AsyncClient(
+            transport=httpx.MockTransport(self.handle),
+            event_hooks=event_hooks)
+        return AsyncOpenAI(
+            api_key="fake-key",
+            base_url="http://fake-llm.local/v1",
+            http_client=http_client
+        )
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Construção do índice de respostas prontas (FAQ) usado pelo Details Agent, depois do Guard Agent e da classificação
+(agents/faq_store.py).
+Lê o texto "About Us" (horários, bairro e áreas de entrega) e dataset/sales_outlet.csv (endereço e telefone
+da loja), preenche os modelos de resposta e calcula os embeddings das perguntas canônicas de cada resposta.
+
+Rodar novamente sempre que o texto "About Us", o arquivo de lojas ou o modelo de embeddings mudar.
+
+Uso:
+    python faq_builder.py
+    python faq_builder.py --output faq_index
+"""
+
+import argparse
+import csv
+import os
+import re
+
+import dotenv
+
+from agents.embedding_model import create_embedding_model
+from agents.faq_store import DEFAULT_FAQ_PATH, FaqStore
+from agents.product_matcher import normalize_text, to_ascii
+
+dotenv.load_dotenv()
+
+FOLDER_PATH = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ABOUT_US_PATH = os.path.join(
+    FOLDER_PATH, "..", "..", "products", "Merry's_way_about_us.txt")
+DEFAULT_OUTLETS_PATH = os.path.join(
+    FOLDER_PATH, "..", "dataset", "sales_outlet.csv")
+
+# Modelos das respostas e perguntas canônicas (os campos entre chaves vêm dos arquivos de origem)
+HOURS_TEMPLATE = "We're open every day:\n{hours}"
+LOCATION_TEMPLATE = "Merry's Way Coffee is located at {address}, {city}, {state} {postal_code}, in {neighborhood}."
+PHONE_TEMPLATE = "You can reach Merry's Way Coffee at {telephone}."
+DELIVERY_TEMPLATE = "We deliver to {areas}. Just place your order in the app and we'll bring it to your door!"
+DELIVERY_AREA_TEMPLATE = "Yes! We deliver to {area}. Just place your order in the app and we'll bring it to your door."
+
+HOURS_QUESTIONS = [
+    "What are your opening hours?",
+    "What are your working hours?",
+    "When are you open?",
+    "What time do you open?",
+    "What time do you close?",
+    "Are you open on weekends?",
+    "Are you open on Sunday?",
+    "What are the store hours?",
+]
+LOCATION_QUESTIONS = [
+    "Where are you located?",
+    "What is your address?",
+    "Where is the coffee shop?",
+    "Where is Merry's Way?",
+    "How do I find the coffee shop?",
+]
+PHONE_QUESTIONS = [
+    "What is your phone number?",
+    "How can I call you?",
+    "What is the coffee shop's telephone number?",
+]
+DELIVERY_QUESTIONS = [
+    "Where do you deliver?",
+    "What areas do you deliver to?",
+    "Do you deliver?",
+    "Do you offer delivery?",
+    "Which neighborhoods do you deliver to?",
+]
+DELIVERY_AREA_QUESTIONS = [
+    "Do you deliver to {area}?",
+    "Can I get delivery in {area}?",
+    "Can you deliver my order to {area}?",
+]
+
+
+# Função para dividir o texto "About Us" em seções: título -> texto
+# Títulos são linhas curtas sem pontuação (nem ":"); o texto antes do primeiro título fica em "Welcome"
+def parse_about_us(path=DEFAULT_ABOUT_US_PATH):
+    with open(path, "r", encoding="utf-8") as file:
+        text = file.read()
+    sections = {}
+    title = "Welcome"
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped and len(stripped) <= 40 and not re.search(r"[.!?:,]", stripped) and lines:
+            sections[title] = "\n".join(lines).strip()
+            title, lines = stripped, []
+            continue
+        lines.append(line)
+    sections[title] = "\n".join(lines).strip()
+    return sections
+
+
+# Função para ler as lojas de varejo de sales_outlet.csv
+def load_outlets(path=DEFAULT_OUTLETS_PATH):
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        return [row for row in csv.DictReader(file) if row["sales_outlet_type"] == "retail"]
+
+
+# Função para juntar itens em uma lista em inglês ("A, B, and C")
+def join_items(items):
+    if len(items) <= 2:
+        return " and ".join(items)
+    return ", ".join(items[:-1]) + ", and " + items[-1]
+
+
+# Função para montar as respostas prontas a partir dos arquivos de origem
+# Retorna [{"id", "questions", "template", "fields", "answer", "required_terms"}, ...]
+def build_faq_entries(about_us_path=DEFAULT_ABOUT_US_PATH, outlets_path=DEFAULT_OUTLETS_PATH):
+    sections = parse_about_us(about_us_path)
+    entries = []
+
+    def add_entry(entry_id, questions, template, fields, required_terms=None):
+        entries.append({
+            "id": entry_id,
+            "questions": questions,
+            "template": template,
+            "fields": fields,
+            "answer": template.format(**fields),
+            "required_terms": required_terms or [],
+        })
+
+    # Horários: linhas "Dia(s): horário" da seção "Working Hours"
+    hours = [line.strip() for line in sections.get("Working Hours", "").splitlines()
+             if re.match(r"^\w+( to \w+)?day:", line.strip())]
+    if hours:
+        add_entry("opening_hours", HOURS_QUESTIONS, HOURS_TEMPLATE,
+                  {"hours": "\n".join(f"- {line}" for line in hours)})
+
+    # Localização e telefone: loja do bairro citado na apresentação ("located in the heart of ...")
+    welcome = to_ascii(sections.get("Welcome", ""))
+    outlet = next((outlet for outlet in load_outlets(outlets_path)
+                   if outlet["Neighorhood"] and outlet["Neighorhood"] in welcome), None)
+    if outlet is not None:
+        add_entry("location", LOCATION_QUESTIONS, LOCATION_TEMPLATE, {
+            "address": outlet["store_address"],
+            "city": outlet["store_city"],
+            "state": outlet["store_state_province"],
+            "postal_code": outlet["store_postal_code"],
+            "neighborhood": outlet["Neighorhood"],
+        })
+        if outlet["store_telephone"]:
+            add_entry("phone", PHONE_QUESTIONS, PHONE_TEMPLATE,
+                      {"telephone": outlet["store_telephone"]})
+
+    # Entregas: bairros da frase "we proudly deliver to A, B, and C."
+    delivery = re.search(r"deliver to (.+?)\.",
+                         sections.get("Delivery & Locations Served", ""))
+    if delivery:
+        areas = [area.strip() for area in re.split(r",\s*(?:and\s+)?|\s+and\s+", delivery.group(1))
+                 if area.strip()]
+        add_entry("delivery_areas", DELIVERY_QUESTIONS, DELIVERY_TEMPLATE,
+                  {"areas": join_items(areas)})
+        for area in areas:
+            # Só responde se o bairro aparecer na pergunta (bairros diferentes têm perguntas muito parecidas)
+            add_entry(f"delivery_{normalize_text(area).replace(' ', '_')}",
+                      [question.format(area=area) for question in DELIVERY_AREA_QUESTIONS],
+                      DELIVERY_AREA_TEMPLATE, {"area": area}, required_terms=[normalize_text(area)])
+    return entries
+
+
+# Função para construir o índice de FAQ em `output_path`
+def build_faq_index(embedding_client, output_path=DEFAULT_FAQ_PATH, model_name=None,
+                    about_us_path=DEFAULT_ABOUT_US_PATH, outlets_path=DEFAULT_OUTLETS_PATH, **kwargs):
+    entries = build_faq_entries(about_us_path, outlets_path)
+    questions = [question for entry in entries for question in entry["questions"]]
+    embeddings = embedding_client.encode(questions, convert_to_numpy=True)
+    return FaqStore.save(output_path, entries, embeddings,
+                         model_name or os.getenv("EMBEDDING_MODEL_NAME"), **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--about-us", default=DEFAULT_ABOUT_US_PATH)
+    parser.add_argument("--outlets", default=DEFAULT_OUTLETS_PATH)
+    parser.add_argument("--output", default=os.getenv("FAQ_INDEX_PATH") or DEFAULT_FAQ_PATH)
+    args = parser.parse_args()
+
+    faq_store = build_faq_index(create_embedding_model(), args.output,
+                                about_us_path=args.about_us, outlets_path=args.outlets)
+    print(f"✅ FAQ ({args.output}): {len(faq_store.entries)} respostas, "
+          f"{len(faq_store.question_entries)} perguntas canônicas")
+    for entry in faq_store.entries:
+        print(f"\n[{entry['id']}] {entry['questions'][0]}\n{entry['answer']}")
+
+
+if __name__ == "__main__":
+    main()
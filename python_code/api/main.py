@@ -1,9 +1,15 @@
-from typing import List
-from fastapi import FastAPI, Request
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from agent_controller import AgentController
+from agents.utils import cancel_task, get_env_flag
+import hmac
 import json
+import os
 
 # Modelos para validação de dados
 
@@ -11,14 +17,41 @@ import json
 class Message(BaseModel):
     role: str
     content: str
+    # Memória do agente (retornada nas respostas do assistente): usada pelo Order Taking Agent e pela execução especulativa
+    memory: Optional[Dict[str, Any]] = None
 
 
 class ChatRequest(BaseModel):
     messages: List[Message]
 
 
+class ReceiptsRequest(BaseModel):
+    # Linhas de recibos no esquema de "201904 sales reciepts.csv" (transaction_id, customer_id, product_id, ...)
+    receipts: List[Dict[str, Any]]
+
+
+# Ciclo de vida da aplicação: warm-up na inicialização e liberação dos recursos no encerramento
+# O warm-up (conexões com o LLM + modelo de embeddings e armazenamento vetorial) roda em segundo plano:
+# a API começa a aceitar conexões na hora (/health/live) e só fica pronta (/health/ready) quando ele termina
+# PRELOAD_MODELS=false: os modelos são carregados no primeiro uso (inicialização mais rápida, primeira resposta mais lenta)
+# Novas versões das recomendações são verificadas a cada RECOMMENDATION_RELOAD_INTERVAL segundos (0: desativado)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up_task = asyncio.create_task(agent_controller.warm_up(
+        load_models=get_env_flag("PRELOAD_MODELS", True)))
+    reload_interval = float(os.getenv("RECOMMENDATION_RELOAD_INTERVAL", "30"))
+    watch_task = (asyncio.create_task(agent_controller.watch_recommendations(reload_interval))
+                  if reload_interval > 0 else None)
+    yield
+    await cancel_task(warm_up_task)
+    if watch_task is not None:
+        await cancel_task(watch_task)
+    await agent_controller.close()
+
+
 # Criar aplicação FastAPI
-app = FastAPI(title="Coffee Shop Chatbot API", version="1.0.0")
+app = FastAPI(title="Coffee Shop Chatbot API",
+              version="1.0.0", lifespan=lifespan)
 
 # Configurar CORS para permitir requisições do frontend
 app.add_middleware(
@@ -38,6 +71,66 @@ async def root():
     return {"message": "Coffee Shop Chatbot API", "status": "running"}
 
 
+@app.get("/health/live")
+async def liveness():
+    """
+    Liveness: o processo está no ar e o event loop responde (não depende do carregamento dos modelos).
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """
+    Readiness: a API está pronta para receber tráfego (warm-up concluído).
+    Retorna 503 enquanto os modelos carregam ou se o warm-up falhar, com o estado de cada componente.
+    """
+    state = agent_controller.get_load_state()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Métricas internas do controlador de agentes (ex.: taxa de acerto da execução especulativa).
+    """
+    return agent_controller.get_metrics()
+
+
+@app.get("/admin/recommendations")
+async def recommendation_snapshot():
+    """
+    Versão ativa das recomendações (snapshot carregado, momento e duração da carga) e estado das recargas
+    (verificações, cargas, falhas e último erro de validação).
+    """
+    return agent_controller.get_recommendation_snapshot_stats()
+
+
+@app.post("/admin/recommendations/receipts")
+async def ingest_receipts(receipts_request: ReceiptsRequest, x_admin_token: Optional[str] = Header(None)):
+    """
+    Ingestão de novos recibos: atualiza as recomendações de forma incremental e publica uma nova versão.
+    Desativado por padrão (RECOMMENDATION_INGESTION_ENABLED=true para ativar). Exige o cabeçalho
+    `X-Admin-Token` igual a RECOMMENDATION_ADMIN_TOKEN. As linhas de um recibo devem vir na mesma requisição.
+    """
+    if not get_env_flag("RECOMMENDATION_INGESTION_ENABLED", False):
+        return JSONResponse({"error": "Ingestão de recibos desativada"}, status_code=403)
+    admin_token = os.getenv("RECOMMENDATION_ADMIN_TOKEN")
+    if not admin_token:
+        return JSONResponse({"error": "RECOMMENDATION_ADMIN_TOKEN não configurado"}, status_code=403)
+    # Comparação em tempo constante: o tempo da resposta não revela o prefixo correto do token
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode("utf-8"), admin_token.encode("utf-8")):
+        return JSONResponse({"error": "Token de administração inválido"}, status_code=401)
+    try:
+        return {"success": True, "stats": await agent_controller.ingest_receipts(receipts_request.receipts)}
+    except FileNotFoundError:
+        return JSONResponse({"success": False,
+                             "error": "Estado das recomendações não encontrado: execute `python recommendation_updater.py init`"},
+                            status_code=409)
+    except (KeyError, ValueError) as e:
+        return JSONResponse({"success": False, "error": f"Recibos inválidos: {str(e)}"}, status_code=422)
+
+
 @app.post("/chat")
 async def chat_endpoint(chat_request: ChatRequest):
     """
@@ -46,7 +139,7 @@ async def chat_endpoint(chat_request: ChatRequest):
     """
     try:
         # Converter mensagens para o formato esperado pelo AgentController
-        messages_dict = [{"role": msg.role, "content": msg.content}
+        messages_dict = [msg.model_dump(exclude_none=True)
                          for msg in chat_request.messages]
 
         # Simular o formato de input que o AgentController espera (similar ao Runpod)
@@ -57,7 +150,7 @@ async def chat_endpoint(chat_request: ChatRequest):
         }
 
         # Obter resposta do controlador de agentes
-        response = agent_controller.get_response(input_data)
+        response = await agent_controller.get_response(input_data)
 
         if response is None:
             return {"error": "Mensagem não permitida pelo sistema de segurança"}
@@ -74,6 +167,49 @@ async def chat_endpoint(chat_request: ChatRequest):
         }
 
 
+# Função para formatar um evento Server-Sent Events (dados em JSON, em uma única linha)
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(chat_request: ChatRequest):
+    """
+    Endpoint de chat com streaming (Server-Sent Events).
+    O roteamento (guard e classificação) termina antes; depois, o texto do agente escolhido é enviado
+    à medida que o LLM o gera, em eventos `token`. O último evento (`memory`) traz a resposta completa
+    com a memória do agente (a mesma resposta do endpoint /chat). Erros são enviados no evento `error`.
+    """
+    messages_dict = [msg.model_dump(exclude_none=True)
+                     for msg in chat_request.messages]
+    input_data = {
+        "input": {
+            "messages": messages_dict
+        }
+    }
+
+    async def event_stream():
+        try:
+            async for event, data in agent_controller.stream_response(input_data):
+                if event == "token":
+                    yield format_sse("token", {"content": data})
+                elif data is None:
+                    yield format_sse("error", {"error": "Mensagem não permitida pelo sistema de segurança"})
+                else:
+                    yield format_sse("memory", data)
+        except Exception as e:
+            yield format_sse("error", {"error": f"Erro interno do servidor: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # desativar o buffer de proxies (ex.: nginx)
+        }
+    )
+
+
 @app.post("/chatbot")
 async def chatbot_legacy(request: Request):
     """
@@ -99,7 +235,7 @@ async def chatbot_legacy(request: Request):
         }
 
         # Obter resposta do controlador de agentes
-        response = agent_controller.get_response(input_data)
+        response = await agent_controller.get_response(input_data)
 
         if response is None:
             return {"message": "Mensagem não permitida pelo sistema de segurança"}
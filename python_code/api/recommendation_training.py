@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Treinamento offline das recomendações do Recommendation Agent (substitui o notebook
+recommendation_engine_training.ipynb). Gera os mesmos arquivos do notebook em recommendation_objects/:
+- popularity_recommendation.csv: número de itens vendidos por produto e categoria
+- apriori_recommendation.json: regras de associação (Apriori, lift >= --min-lift) agrupadas pelo antecedente
+
+Mesmo tratamento do notebook: tamanhos removidos do nome ("Latte Rg" -> "Latte"), só os produtos do menu
+(products.json), cestas identificadas por transaction_id + customer_id e descartadas se tiverem um único item.
+
+Os recibos são lidos em blocos (--chunk-size linhas, só as colunas usadas); cada bloco vira arrays de inteiros
+(chave da cesta, id do produto), e as linhas são distribuídas pelo hash da chave da cesta entre --partitions
+arquivos temporários (todas as linhas de uma cesta caem na mesma partição). Cada partição vira uma matriz esparsa
+(CSR) gravada em disco, e a contagem do suporte dos conjuntos de produtos percorre as partições uma de cada vez,
+dividida em fatias de cestas (--shard-size) processadas em paralelo (--workers processos).
+Memória: só as linhas de um bloco ou de uma partição ficam em memória (não o histórico inteiro); a matriz densa de
+cada fatia é limitada pelo --shard-size, e no máximo 2 fatias por processo ficam em andamento.
+Cada execução publica uma nova versão (snapshots/v000001/ + ponteiro snapshot.json), carregada pela API
+sem reiniciar; os arquivos também são copiados para a raiz da pasta (arquivos temporários + renomear).
+
+Uso:
+    python recommendation_training.py
+    python recommendation_training.py --receipts "../dataset/201904 sales reciepts.csv" --workers 4
+    python recommendation_training.py --split-baskets-by-outlet-and-date --output /tmp/recommendation_objects
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import combinations
+
+import numpy as np
+
+from agents.product_matcher import DEFAULT_PRODUCTS_PATH
+from agents.recommendation_snapshot import APRIORI_FILE, POPULARITY_FILE, publish_snapshot
+
+FOLDER_PATH = os.path.dirname(os.path.abspath(__file__))
+DATASET_FOLDER = os.path.join(FOLDER_PATH, "..", "dataset")
+DEFAULT_RECEIPTS_PATH = os.path.join(DATASET_FOLDER, "201904 sales reciepts.csv")
+DEFAULT_CATALOG_PATH = os.path.join(DATASET_FOLDER, "product.csv")
+DEFAULT_OUTPUT_PATH = os.path.join(FOLDER_PATH, "recommendation_objects")
+
+# Tamanhos no nome dos produtos ("Latte Rg", "Dark chocolate Lg", ...)
+SIZE_PATTERN = re.compile(r" (?:Rg|Sm|Lg)")
+# Colunas que identificam uma cesta (mesma regra do notebook)
+BASKET_COLUMNS = ["transaction_id", "customer_id"]
+# Com --split-baskets-by-outlet-and-date: transaction_id se repete entre lojas e dias
+OUTLET_DATE_COLUMNS = ["sales_outlet_id", "transaction_date"]
+# Memória máxima (bytes) da seleção de colunas de cada lote de candidatos em count_shard (conjuntos de 3+ itens)
+COUNT_BATCH_BYTES = 64 * 1024 * 1024
+
+
+# Função para remover os tamanhos do nome de um produto
+def strip_sizes(name):
+    return SIZE_PATTERN.sub("", name)
+
+
+# Função para ler os nomes dos produtos do menu (products.json, JSON lines)
+def load_menu(path=DEFAULT_PRODUCTS_PATH):
+    with open(path, "r", encoding="utf-8") as file:
+        return [json.loads(line)["name"] for line in file if line.strip()]
+
+
+# Catálogo: id do produto nos recibos -> (id do item, categoria)
+# Itens: produtos do menu sem o tamanho (ids em ordem alfabética, como as colunas da tabela de cestas do notebook)
+class ProductCatalog():
+    # Método construtor
+    # `products`: [(id do produto, nome, categoria), ...] (product.csv); `menu`: nomes aceitos (None: todos)
+    def __init__(self, products, menu=None):
+        self.products = list(products)
+        self.menu = list(menu) if menu is not None else None
+        menu = set(menu) if menu is not None else None
+        names = {}
+        for product_id, name, category in self.products:
+            name = strip_sizes(name)
+            if menu is None or name in menu:
+                names[product_id] = (name, category)
+        self.items = sorted({name for name, _ in names.values()})
+        item_ids = {name: item_id for item_id, name in enumerate(self.items)}
+
+        # Arrays indexados pelo id do produto nos recibos (-1: fora do menu)
+        size = max(names, default=-1) + 1
+        self.product_items = np.full(size, -1, dtype=np.int32)
+        self.product_categories = [None] * size
+        for product_id, (name, category) in names.items():
+            self.product_items[product_id] = item_ids[name]
+            self.product_categories[product_id] = category
+
+    # Método para criar o catálogo a partir de product.csv
+    @classmethod
+    def from_file(cls, path=DEFAULT_CATALOG_PATH, menu=None):
+        with open(path, "r", encoding="utf-8", newline="") as file:
+            products = [(int(row["product_id"]), row["product"], row["product_category"])
+                        for row in csv.DictReader(file)]
+        return cls(products, menu)
+
+    # Método para converter ids de produtos dos recibos em ids de itens (-1: fora do menu)
+    def map_products(self, product_ids):
+        product_ids = np.asarray(product_ids, dtype=np.int64)
+        items = np.full(product_ids.shape, -1, dtype=np.int32)
+        known = (product_ids >= 0) & (product_ids < len(self.product_items))
+        items[known] = self.product_items[product_ids[known]]
+        return items
+
+
+# Função para ler os itens vendidos dos recibos em blocos de `chunk_size` linhas
+# Produz, por bloco, (chaves das cestas: matriz int64 (linhas, colunas), ids dos produtos nos recibos)
+# só com as linhas de produtos do menu
+def read_line_items(path, catalog, chunk_size=200_000, basket_columns=BASKET_COLUMNS):
+    import pandas as pd  # leitura em blocos (o atualizador incremental usado pela API não precisa do pandas)
+
+    for chunk in pd.read_csv(path, usecols=basket_columns + ["product_id"], chunksize=chunk_size):
+        product_ids = chunk["product_id"].to_numpy(dtype=np.int64)
+        on_menu = catalog.map_products(product_ids) >= 0
+        keys = np.empty((int(on_menu.sum()), len(basket_columns)), dtype=np.int64)
+        for column, name in enumerate(basket_columns):
+            values = chunk[name].to_numpy()[on_menu]
+            if values.dtype.kind not in "iu":  # datas: "2019-04-01" -> 20190401
+                values = pd.to_datetime(values).strftime("%Y%m%d").astype(np.int64)
+            keys[:, column] = values
+        yield keys, product_ids[on_menu]
+
+
+# Cestas no formato CSR: os itens (distintos) da cesta `b` são `indices[indptr[b]:indptr[b + 1]]`
+class Baskets():
+    # Método construtor
+    # `basket_ids`, `product_ids`: uma posição por item vendido, na ordem do arquivo
+    # `rows`: número de cada linha no arquivo (padrão: a posição nos arrays)
+    def __init__(self, basket_ids, product_ids, catalog, min_items=2, rows=None):
+        items = catalog.map_products(product_ids)
+        # Cestas válidas: pelo menos `min_items` itens vendidos (linhas), como no notebook
+        line_counts = np.bincount(basket_ids)
+        valid_rows = line_counts[basket_ids] >= min_items
+        self.basket_ids = np.unique(basket_ids[valid_rows], return_inverse=True)[1]
+        self.product_ids = product_ids[valid_rows]
+        self.rows = rows[valid_rows] if rows is not None else np.flatnonzero(valid_rows)
+        self.items = items[valid_rows]
+        self.n_baskets = int(self.basket_ids.max()) + 1 if len(self.basket_ids) else 0
+        self.n_items = len(catalog.items)
+
+        # Matriz esparsa binária (cesta x item): pares (cesta, item) distintos, ordenados por cesta
+        pairs = np.unique(self.basket_ids.astype(np.int64) * self.n_items + self.items)
+        self.indices = (pairs % self.n_items).astype(np.int32)
+        self.indptr = np.zeros(self.n_baskets + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs // self.n_items, minlength=self.n_baskets),
+                  out=self.indptr[1:])
+
+    # Método para contar em quantas cestas aparece cada item
+    def get_item_counts(self):
+        return np.bincount(self.indices, minlength=self.n_items)
+
+    # Método para dividir as cestas em fatias de até `shard_size` cestas (gerador: (indptr, indices) sob demanda)
+    def shards(self, shard_size):
+        return split_shards(self.indptr, self.indices, shard_size)
+
+
+# Função para dividir uma matriz CSR em fatias de até `shard_size` linhas (gerador: (indptr, indices) sob demanda)
+def split_shards(indptr, indices, shard_size):
+    n_rows = len(indptr) - 1
+    for start in range(0, n_rows, shard_size):
+        end = min(start + shard_size, n_rows)
+        offset, stop = indptr[start], indptr[end]
+        yield indptr[start:end + 1] - offset, indices[offset:stop]
+
+
+# Cestas divididas em partições pelo hash da chave da cesta, com a matriz CSR de cada partição gravada em `folder`
+# Só os totais (cestas, itens e produtos vendidos, primeira linha de cada produto) ficam em memória; as partições são
+# lidas do disco uma de cada vez em `shards`
+class PartitionedBaskets():
+    # Método construtor
+    # `partition_paths`: arquivos .npz com `indptr` e `indices` de cada partição
+    def __init__(self, partition_paths, n_items, n_products):
+        self.partition_paths = list(partition_paths)
+        self.n_items = n_items
+        self.n_baskets = 0
+        self.line_items = 0
+        self.item_counts = np.zeros(n_items, dtype=np.int64)
+        self.product_counts = np.zeros(n_products, dtype=np.int64)
+        self.first_seen = np.full(n_products, -1, dtype=np.int64)
+
+    # Método para somar os totais das cestas de uma partição (Baskets)
+    def add_partition(self, baskets, first_seen):
+        self.n_baskets += baskets.n_baskets
+        self.line_items += len(baskets.product_ids)
+        self.item_counts += baskets.get_item_counts()
+        self.product_counts += np.bincount(baskets.product_ids, minlength=len(self.product_counts))
+        earlier = (first_seen >= 0) & ((self.first_seen < 0) | (first_seen < self.first_seen))
+        self.first_seen[earlier] = first_seen[earlier]
+
+    # Método para contar em quantas cestas aparece cada item
+    def get_item_counts(self):
+        return self.item_counts
+
+    # Método para dividir as cestas em fatias de até `shard_size` cestas, partição por partição
+    def shards(self, shard_size):
+        for path in self.partition_paths:
+            with np.load(path) as partition:
+                indptr, indices = partition["indptr"], partition["indices"]
+            yield from split_shards(indptr, indices, shard_size)
+
+
+# Função para ler os recibos e montar as cestas
+# A leitura é em blocos, mas as linhas do menu (chaves + ids dos produtos) do arquivo inteiro são reunidas para
+# identificar as cestas (as linhas de uma cesta podem estar em blocos diferentes); para históricos grandes, ver
+# load_partitioned_baskets
+def load_baskets(receipts_path, catalog, chunk_size=200_000, basket_columns=BASKET_COLUMNS):
+    keys = []
+    product_ids = []
+    for chunk_keys, chunk_product_ids in read_line_items(receipts_path, catalog, chunk_size, basket_columns):
+        keys.append(chunk_keys)
+        product_ids.append(chunk_product_ids)
+    keys = np.concatenate(keys) if keys else np.empty((0, len(basket_columns)), dtype=np.int64)
+    product_ids = np.concatenate(product_ids) if product_ids else np.empty(0, dtype=np.int64)
+    return build_baskets(keys, product_ids, catalog)
+
+
+# Função para montar as cestas a partir das chaves (matriz (linhas, colunas)) e dos ids dos produtos de cada linha
+def build_baskets(keys, product_ids, catalog):
+    # Chave da cesta (várias colunas) -> id inteiro
+    basket_ids = np.unique(keys, axis=0, return_inverse=True)[1].reshape(-1)
+    return Baskets(basket_ids, product_ids, catalog)
+
+
+# Função para escolher a partição de cada linha pelo hash da chave da cesta (matriz (linhas, colunas))
+def partition_keys(keys, partitions):
+    hashes = np.zeros(len(keys), dtype=np.uint64)
+    for column in keys.T:
+        hashes = (hashes ^ column.astype(np.uint64)) * np.uint64(0x9E3779B97F4A7C15)
+        hashes ^= hashes >> np.uint64(29)
+    return (hashes % np.uint64(partitions)).astype(np.int64)
+
+
+# Função para ler os recibos e montar as cestas em `partitions` partições gravadas em `folder`
+# 1) leitura em blocos: as linhas do menu (chave, id do produto, número da linha) são anexadas ao arquivo da
+#    partição da cesta; 2) cada partição é lida, vira uma matriz CSR (.npz) e o arquivo de linhas é apagado
+def load_partitioned_baskets(receipts_path, catalog, folder, partitions=16, chunk_size=200_000,
+                             basket_columns=BASKET_COLUMNS):
+    row_dtype = np.dtype([("keys", np.int64, (len(basket_columns),)), ("product_id", np.int64), ("row", np.int64)])
+    spill_paths = [os.path.join(folder, f"partition_{partition:04d}.bin") for partition in range(partitions)]
+    for path in spill_paths:
+        open(path, "wb").close()
+
+    row = 0
+    for keys, product_ids in read_line_items(receipts_path, catalog, chunk_size, basket_columns):
+        records = np.empty(len(product_ids), dtype=row_dtype)
+        records["keys"] = keys
+        records["product_id"] = product_ids
+        records["row"] = np.arange(row, row + len(product_ids))
+        row += len(product_ids)
+        targets = partition_keys(keys, partitions)
+        order = np.argsort(targets, kind="stable")
+        bounds = np.searchsorted(targets[order], np.arange(partitions + 1))
+        for partition, path in enumerate(spill_paths):
+            if bounds[partition] < bounds[partition + 1]:
+                with open(path, "ab") as file:
+                    records[order[bounds[partition]:bounds[partition + 1]]].tofile(file)
+
+    partition_paths = [path[:-len(".bin")] + ".npz" for path in spill_paths]
+    result = PartitionedBaskets(partition_paths, len(catalog.items), len(catalog.product_items))
+    for spill_path, partition_path in zip(spill_paths, partition_paths):
+        records = np.fromfile(spill_path, dtype=row_dtype)
+        os.remove(spill_path)
+        basket_ids = np.unique(records["keys"], axis=0, return_inverse=True)[1].reshape(-1)
+        baskets = Baskets(basket_ids, records["product_id"], catalog, rows=records["row"])
+        np.savez(partition_path, indptr=baskets.indptr, indices=baskets.indices)
+        result.add_partition(baskets, get_first_seen(baskets, catalog))
+    return result
+
+
+# Função para contar em quantas cestas de uma fatia aparece cada conjunto de itens (executada nos processos)
+# `columns`: itens considerados (colunas da matriz densa da fatia); `candidates`: matriz (conjuntos, k) de posições em `columns`
+# `batch_size`: candidatos por lote (padrão: o que cabe em COUNT_BATCH_BYTES, já que cada lote seleciona
+# cestas x lote x k posições da matriz)
+def count_shard(indptr, indices, columns, candidates, batch_size=None):
+    # Matriz densa (cestas da fatia x itens considerados)
+    column_of_item = np.full(int(max(indices.max(initial=0), columns.max(initial=0))) + 1, -1, dtype=np.int64)
+    column_of_item[columns] = np.arange(len(columns))
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    kept = column_of_item[indices] >= 0
+    matrix = np.zeros((len(indptr) - 1, len(columns)), dtype=np.float32)
+    matrix[rows[kept], column_of_item[indices[kept]]] = 1.0
+
+    if candidates.shape[1] == 2:
+        # Pares: matriz de coocorrência (produto de matrizes)
+        cooccurrence = matrix.T @ matrix
+        return np.rint(cooccurrence[candidates[:, 0], candidates[:, 1]]).astype(np.int64)
+    counts = np.empty(len(candidates), dtype=np.int64)
+    matrix = matrix.astype(bool)
+    if batch_size is None:
+        batch_size = max(1, COUNT_BATCH_BYTES // max(1, len(matrix) * candidates.shape[1]))
+    for start in range(0, len(candidates), batch_size):
+        batch = candidates[start:start + batch_size]
+        counts[start:start + len(batch)] = matrix[:, batch].all(axis=2).sum(axis=0)
+    return counts
+
+
+# Função para contar o suporte (número de cestas) de conjuntos de itens, com as fatias divididas entre processos
+# `candidates`: matriz (conjuntos, k) de ids de itens
+# `max_pending`: fatias enviadas aos processos e ainda não somadas (padrão: 2 por CPU); as fatias são criadas sob
+# demanda, então a memória das fatias em andamento não cresce com o número de cestas
+def count_itemsets(baskets, candidates, executor=None, shard_size=100_000, max_pending=None):
+    columns = np.unique(candidates)
+    positions = np.searchsorted(columns, candidates)
+    counts = np.zeros(len(candidates), dtype=np.int64)
+    if executor is None:
+        for indptr, indices in baskets.shards(shard_size):
+            counts += count_shard(indptr, indices, columns, positions)
+        return counts
+
+    max_pending = max_pending or 2 * (os.cpu_count() or 1)
+    pending = set()
+    for indptr, indices in baskets.shards(shard_size):
+        if len(pending) >= max_pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                counts += future.result()
+        pending.add(executor.submit(count_shard, indptr, indices, columns, positions))
+    for future in pending:
+        counts += future.result()
+    return counts
+
+
+# Função para gerar os candidatos de tamanho k + 1 a partir dos conjuntos frequentes de tamanho k (apriori-gen)
+# Dois conjuntos com os mesmos k - 1 primeiros itens são unidos; candidatos com algum subconjunto não frequente são descartados
+def generate_candidates(frequent):
+    frequent_set = set(frequent)
+    candidates = []
+    for position, first in enumerate(frequent):
+        for second in frequent[position + 1:]:
+            if first[:-1] != second[:-1]:
+                break
+            candidate = first + (second[-1],)
+            if all(subset in frequent_set for subset in combinations(candidate, len(candidate) - 1)):
+                candidates.append(candidate)
+    return candidates
+
+
+# Função para encontrar os conjuntos de itens frequentes (suporte >= `min_support`)
+# Retorna {conjunto (tupla de ids de itens em ordem crescente): suporte}, em ordem de tamanho e depois de ids
+# `max_pending`: fatias em andamento nos processos (ver count_itemsets)
+def mine_frequent_itemsets(baskets, min_support=0.05, max_length=None, executor=None, shard_size=100_000,
+                           max_pending=None):
+    if baskets.n_baskets == 0:
+        return {}
+    supports = {}
+    # Itens: contagem direta na matriz esparsa
+    item_counts = baskets.get_item_counts()
+    frequent = []
+    for item, count in enumerate(item_counts):
+        support = count / baskets.n_baskets
+        if support >= min_support:
+            supports[(item,)] = support
+            frequent.append((item,))
+
+    length = 1
+    while frequent and (max_length is None or length < max_length):
+        candidates = generate_candidates(frequent)
+        if not candidates:
+            break
+        counts = count_itemsets(baskets, np.array(candidates, dtype=np.int64), executor, shard_size, max_pending)
+        frequent = []
+        for candidate, count in zip(candidates, counts):
+            support = count / baskets.n_baskets
+            if support >= min_support:
+                supports[candidate] = support
+                frequent.append(candidate)
+        length += 1
+    return supports
+
+
+# Função para gerar as regras de associação (antecedente -> consequente) com lift >= `min_lift`
+# Retorna [(antecedente, consequente, confiança), ...] na ordem dos conjuntos frequentes
+def build_rules(supports, min_lift=1.0):
+    rules = []
+    for itemset, support in supports.items():
+        if len(itemset) < 2:
+            continue
+        for size in range(len(itemset) - 1, 0, -1):
+            for antecedent in combinations(itemset, size):
+                consequent = tuple(item for item in itemset if item not in antecedent)
+                confidence = support / supports[antecedent]
+                if confidence / supports[consequent] >= min_lift:
+                    rules.append((antecedent, consequent, confidence))
+    return rules
+
+
+# Função para montar o conteúdo de apriori_recommendation.json
+# Chave: antecedente (nomes unidos por "_"); valor: consequentes da maior confiança à menor, sem repetições
+def build_apriori_recommendations(rules, items, item_categories):
+    grouped = {}
+    for antecedent, consequent, confidence in rules:
+        grouped.setdefault(antecedent, []).append((consequent, confidence))
+    recommendations = {}
+    for antecedent, antecedent_rules in grouped.items():
+        key = "_".join(items[item] for item in antecedent)
+        recommendations[key] = []
+        seen = set()
+        for consequent, confidence in sorted(antecedent_rules, key=lambda rule: rule[1], reverse=True):
+            for item in consequent:
+                if item in seen:
+                    continue
+                seen.add(item)
+                recommendations[key].append({
+                    "product": items[item],
+                    "product_category": item_categories[item],
+                    "confidence": float(confidence),
+                })
+    return recommendations
+
+
+# Função para obter a primeira linha (entre as cestas válidas) em que aparece cada produto dos recibos (-1: nunca)
+def get_first_seen(baskets, catalog):
+    first_seen = np.full(len(catalog.product_items), -1, dtype=np.int64)
+    product_ids, first_rows = np.unique(baskets.product_ids, return_index=True)
+    first_seen[product_ids] = baskets.rows[first_rows]
+    return first_seen
+
+
+# Função para obter a categoria de cada item
+# Um item pode vir de produtos de categorias diferentes ("Dark chocolate": bebida e chocolate embalado);
+# vale a categoria do produto que aparece pela primeira vez mais tarde nos recibos (mesmo resultado do notebook)
+# `first_seen`: primeira linha de cada produto dos recibos (get_first_seen; -1: nunca)
+def get_item_categories(first_seen, catalog):
+    categories = {}
+    for _, product_id in sorted((row, product_id) for product_id, row in enumerate(first_seen) if row >= 0):
+        categories[catalog.product_items[product_id]] = catalog.product_categories[product_id]
+    return [categories.get(item) for item in range(len(catalog.items))]
+
+
+# Função para montar as linhas de popularity_recommendation.csv: (produto, categoria, itens vendidos)
+# em ordem de produto e categoria
+# `product_counts`: itens vendidos de cada produto dos recibos (array indexado pelo id do produto)
+def build_popularity_rows(product_counts, catalog):
+    totals = {}
+    for product_id in np.flatnonzero(product_counts):
+        key = (catalog.items[catalog.product_items[product_id]], catalog.product_categories[product_id])
+        totals[key] = totals.get(key, 0) + int(product_counts[product_id])
+    return [(product, category, count) for (product, category), count in sorted(totals.items())]
+
+
+# Função para publicar os arquivos em `output_path` como uma nova versão (snapshot versionado, ver
+# agents/recommendation_snapshot.py) e atualizar a cópia da raiz; retorna a nova versão
+# `source`: origem da publicação ("training" ou "incremental")
+def write_recommendation_objects(output_path, apriori_recommendations, popularity_rows, source="training"):
+    return publish_snapshot(output_path, apriori_recommendations, popularity_rows, source=source)
+
+
+# Função para treinar as recomendações e gravá-las em `output_path`
+# `workers`: processos da contagem do suporte (1: no processo atual)
+# `partitions`: partições das cestas em disco; `spill_path`: pasta dos arquivos temporários (padrão: a do sistema)
+def train(receipts_path=DEFAULT_RECEIPTS_PATH, catalog_path=DEFAULT_CATALOG_PATH, menu_path=DEFAULT_PRODUCTS_PATH,
+          output_path=DEFAULT_OUTPUT_PATH, min_support=0.05, min_lift=1.0, max_length=None,
+          chunk_size=200_000, shard_size=100_000, workers=1, basket_columns=BASKET_COLUMNS, partitions=16,
+          spill_path=None):
+    catalog = ProductCatalog.from_file(catalog_path, load_menu(menu_path) if menu_path else None)
+    with tempfile.TemporaryDirectory(prefix="recommendation_training_", dir=spill_path) as folder:
+        baskets = load_partitioned_baskets(receipts_path, catalog, folder, partitions, chunk_size, basket_columns)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                supports = mine_frequent_itemsets(baskets, min_support, max_length, executor, shard_size,
+                                                  max_pending=2 * workers)
+        else:
+            supports = mine_frequent_itemsets(baskets, min_support, max_length, None, shard_size)
+    rules = build_rules(supports, min_lift)
+
+    apriori_recommendations = build_apriori_recommendations(
+        rules, catalog.items, get_item_categories(baskets.first_seen, catalog))
+    popularity_rows = build_popularity_rows(baskets.product_counts, catalog)
+    version = None
+    if output_path is not None:
+        version = write_recommendation_objects(output_path, apriori_recommendations, popularity_rows)
+    return {
+        "version": version,
+        "baskets": baskets.n_baskets,
+        "line_items": baskets.line_items,
+        "frequent_itemsets": len(supports),
+        "rules": len(rules),
+        "antecedents": len(apriori_recommendations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--receipts", default=DEFAULT_RECEIPTS_PATH)
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH, help="product.csv")
+    parser.add_argument("--menu", default=DEFAULT_PRODUCTS_PATH,
+                        help="products.json com os produtos vendidos ('' para usar todos)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH)
+    parser.add_argument("--min-support", type=float, default=0.05)
+    parser.add_argument("--min-lift", type=float, default=1.0)
+    parser.add_argument("--max-length", type=int, default=None,
+                        help="tamanho máximo dos conjuntos de itens (padrão: sem limite)")
+    parser.add_argument("--chunk-size", type=int, default=200_000,
+                        help="linhas dos recibos lidas por bloco")
+    parser.add_argument("--shard-size", type=int, default=100_000,
+                        help="cestas por fatia na contagem do suporte")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processos da contagem do suporte")
+    parser.add_argument("--partitions", type=int, default=16,
+                        help="partições das cestas em disco (mais partições: menos linhas em memória)")
+    parser.add_argument("--spill-path", default=None,
+                        help="pasta dos arquivos temporários das partições (padrão: a do sistema)")
+    parser.add_argument("--split-baskets-by-outlet-and-date", action="store_true",
+                        help="separar cestas com o mesmo transaction_id em lojas ou dias diferentes")
+    args = parser.parse_args()
+
+    basket_columns = BASKET_COLUMNS + (OUTLET_DATE_COLUMNS if args.split_baskets_by_outlet_and_date else [])
+    start = time.perf_counter()
+    stats = train(args.receipts, args.catalog, args.menu or None, args.output, args.min_support, args.min_lift,
+                  args.max_length, args.chunk_size, args.shard_size, args.workers, basket_columns,
+                  args.partitions, args.spill_path)
+    print(f"✅ Recomendações ({args.output}): {stats} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
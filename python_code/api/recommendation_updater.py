@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Atualização incremental das recomendações do Recommendation Agent a partir de novos recibos
+(mesmo esquema de "201904 sales reciepts.csv"), sem retreinar com o histórico inteiro.
+
+O estado (--state) guarda contadores persistentes:
+- número de cestas válidas e, por item, em quantas cestas ele aparece
+- coocorrência de pares de itens (chaves i * n_itens + j, i < j, em arrays ordenados)
+- itens vendidos por produto dos recibos (popularity_recommendation.csv)
+Cada lote de recibos é somado aos contadores; as regras (antecedente -> consequente, suporte >= --min-support,
+lift >= --min-lift) só são recalculadas para os antecedentes afetados: itens das novas cestas e itens que
+aparecem junto com eles. Depois, uma nova versão de recommendation_objects/ é publicada (snapshot.json).
+
+Diferenças em relação ao treinamento completo (recommendation_training.py):
+- só regras entre pares de itens (o Recommendation Agent só consulta antecedentes de um produto)
+- os limiares de suporte e lift dos antecedentes não afetados não são reavaliados a cada lote (o número total de
+  cestas muda); `rederive` recalcula todas as regras a partir dos contadores, sem ler recibos
+- as linhas de um recibo devem chegar no mesmo lote (uma cesta é contada quando o lote é processado)
+
+Uso:
+    python recommendation_updater.py init     # contadores a partir do histórico (--receipts) + publicação
+    python recommendation_updater.py update --receipts novos_recibos.csv
+    python recommendation_updater.py rederive
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from itertools import combinations
+
+import dotenv
+import numpy as np
+
+from agents.product_matcher import DEFAULT_PRODUCTS_PATH
+from agents.recommendation_snapshot import file_lock
+from recommendation_training import (BASKET_COLUMNS, DEFAULT_CATALOG_PATH, DEFAULT_OUTPUT_PATH,
+                                     DEFAULT_RECEIPTS_PATH, ProductCatalog, build_baskets, build_popularity_rows,
+                                     get_item_categories, load_baskets, load_menu, write_recommendation_objects)
+
+dotenv.load_dotenv()
+
+FOLDER_PATH = os.path.dirname(os.path.abspath(__file__))
+# Diretório padrão do estado do atualizador
+DEFAULT_STATE_PATH = os.path.join(FOLDER_PATH, "recommendation_state")
+# Arquivos do estado
+COUNTERS_FILE = "counters.npz"  # arrays dos contadores
+STATE_FILE = "state.json"  # catálogo, parâmetros e regras derivadas
+STATE_LOCK_FILE = ".state.lock"  # lock do estado (entre processos: API, workers e linha de comando)
+
+
+# Função para converter linhas de recibos (dicionários com as colunas do CSV) em (chaves das cestas, ids dos produtos)
+# só com as linhas de produtos do menu
+def rows_to_line_items(rows, catalog, basket_columns=BASKET_COLUMNS):
+    product_ids = np.array([int(row["product_id"]) for row in rows], dtype=np.int64)
+    on_menu = catalog.map_products(product_ids) >= 0
+    # Datas "2019-04-01" -> 20190401 (mesma chave da leitura em blocos)
+    keys = np.array([[int(str(row[column]).replace("-", "")) for column in basket_columns]
+                     for row, kept in zip(rows, on_menu) if kept], dtype=np.int64)
+    return keys.reshape(-1, len(basket_columns)), product_ids[on_menu]
+
+
+# Função para obter os pares de itens (chave i * n_itens + j, i < j) de cada cesta, agrupando as cestas por tamanho
+def get_basket_pairs(baskets):
+    sizes = np.diff(baskets.indptr)
+    keys = [np.empty(0, dtype=np.int64)]
+    for size in np.unique(sizes[sizes >= 2]):
+        starts = baskets.indptr[:-1][sizes == size]
+        # Itens de cada cesta deste tamanho (em ordem crescente): matriz (cestas, tamanho)
+        items = baskets.indices[starts[:, None] + np.arange(size)].astype(np.int64)
+        for first, second in combinations(range(size), 2):
+            keys.append(items[:, first] * baskets.n_items + items[:, second])
+    return np.concatenate(keys)
+
+
+class RecommendationCounters():
+    # Método construtor
+    def __init__(self, catalog, min_support=0.05, min_lift=1.0, basket_columns=BASKET_COLUMNS):
+        self.catalog = catalog
+        self.min_support = min_support
+        self.min_lift = min_lift
+        self.basket_columns = list(basket_columns)
+        n_items = len(catalog.items)
+        n_products = len(catalog.product_items)
+
+        self.n_baskets = 0  # cestas válidas (2 ou mais itens vendidos)
+        self.item_counts = np.zeros(n_items, dtype=np.int64)  # cestas com cada item
+        self.pair_keys = np.empty(0, dtype=np.int64)  # pares (i * n_itens + j), ordenados
+        self.pair_counts = np.empty(0, dtype=np.int64)  # cestas com cada par
+        self.product_counts = np.zeros(n_products, dtype=np.int64)  # itens vendidos por produto dos recibos
+        # Primeira linha (entre as cestas válidas) de cada produto dos recibos: define a categoria do item
+        self.first_seen = np.full(n_products, -1, dtype=np.int64)
+        self.lines_seen = 0
+        self.rules = {}  # id do antecedente -> [(id do consequente, confiança), ...]
+        self.lock = threading.Lock()
+
+    # Método para somar as cestas de um lote aos contadores
+    # Retorna os ids dos antecedentes afetados (itens das cestas e itens que aparecem junto com eles)
+    def add_baskets(self, baskets):
+        if baskets.n_baskets == 0:
+            return set()
+        n_items = len(self.catalog.items)
+        self.n_baskets += baskets.n_baskets
+        self.item_counts += np.bincount(baskets.indices, minlength=n_items)
+        self.product_counts += np.bincount(baskets.product_ids, minlength=len(self.product_counts))
+        product_ids, first_rows = np.unique(baskets.product_ids, return_index=True)
+        unseen = self.first_seen[product_ids] < 0
+        self.first_seen[product_ids[unseen]] = self.lines_seen + first_rows[unseen]
+        self.lines_seen += len(baskets.product_ids)
+
+        # Pares: união das chaves ordenadas e soma das contagens
+        keys, counts = np.unique(get_basket_pairs(baskets), return_counts=True)
+        all_keys = np.concatenate([self.pair_keys, keys])
+        all_counts = np.concatenate([self.pair_counts, counts])
+        self.pair_keys, inverse = np.unique(all_keys, return_inverse=True)
+        self.pair_counts = np.zeros(len(self.pair_keys), dtype=np.int64)
+        np.add.at(self.pair_counts, inverse, all_counts)
+
+        items = np.unique(baskets.indices)
+        first, second = self.pair_keys // n_items, self.pair_keys % n_items
+        neighbors = np.concatenate([second[np.isin(first, items)], first[np.isin(second, items)]])
+        return set(items.tolist()) | set(neighbors.tolist())
+
+    # Método para recalcular as regras dos antecedentes informados (None: todos)
+    # Mesmo cálculo do treinamento: confiança = suporte(AC) / suporte(A), lift = confiança / suporte(C)
+    def derive(self, antecedents=None):
+        n_items = len(self.catalog.items)
+        if antecedents is None:
+            self.rules = {}
+            antecedents = range(n_items)
+        antecedents = np.array(sorted(antecedents), dtype=np.int64)
+        for antecedent in antecedents.tolist():
+            self.rules.pop(antecedent, None)
+        if self.n_baskets == 0 or len(antecedents) == 0:
+            return
+
+        item_supports = self.item_counts / self.n_baskets
+        pair_supports = self.pair_counts / self.n_baskets
+        frequent = pair_supports >= self.min_support
+        first, second = self.pair_keys[frequent] // n_items, self.pair_keys[frequent] % n_items
+        supports = pair_supports[frequent]
+        # As duas direções de cada par frequente (antecedente, consequente), só para os antecedentes pedidos
+        rule_antecedents = np.concatenate([first, second])
+        rule_consequents = np.concatenate([second, first])
+        rule_supports = np.concatenate([supports, supports])
+        selected = np.isin(rule_antecedents, antecedents)
+        rule_antecedents = rule_antecedents[selected]
+        rule_consequents = rule_consequents[selected]
+        confidences = rule_supports[selected] / item_supports[rule_antecedents]
+        kept = confidences / item_supports[rule_consequents] >= self.min_lift
+
+        # Ordem: antecedente, maior confiança, consequente (empates em ordem fixa, como no treinamento)
+        order = np.lexsort((rule_consequents[kept], -confidences[kept], rule_antecedents[kept]))
+        for antecedent, consequent, confidence in zip(rule_antecedents[kept][order].tolist(),
+                                                      rule_consequents[kept][order].tolist(),
+                                                      confidences[kept][order].tolist()):
+            self.rules.setdefault(antecedent, []).append((consequent, confidence))
+
+    # Método para somar um lote de cestas e recalcular as regras afetadas
+    def update(self, keys, product_ids):
+        with self.lock:
+            baskets = build_baskets(keys, product_ids, self.catalog)
+            affected = self.add_baskets(baskets)
+            self.derive(affected)
+            return {"baskets": baskets.n_baskets, "line_items": len(baskets.product_ids),
+                    "affected_antecedents": len(affected)}
+
+    # Método para somar linhas de recibos (dicionários com as colunas do CSV; ex.: corpo do endpoint de ingestão)
+    def ingest_rows(self, rows):
+        return self.update(*rows_to_line_items(rows, self.catalog, self.basket_columns))
+
+    # Método para somar um arquivo de recibos (lido em blocos)
+    def ingest_file(self, path, chunk_size=200_000):
+        baskets = load_baskets(path, self.catalog, chunk_size, self.basket_columns)
+        with self.lock:
+            affected = self.add_baskets(baskets)
+            self.derive(affected)
+            return {"baskets": baskets.n_baskets, "line_items": len(baskets.product_ids),
+                    "affected_antecedents": len(affected)}
+
+    # Método para montar o conteúdo de apriori_recommendation.json (mesmo formato do treinamento)
+    def apriori_recommendations(self):
+        items = self.catalog.items
+        categories = get_item_categories(self.first_seen, self.catalog)
+        return {items[antecedent]: [{
+            "product": items[consequent],
+            "product_category": categories[consequent],
+            "confidence": confidence,
+        } for consequent, confidence in self.rules[antecedent]] for antecedent in sorted(self.rules)}
+
+    # Método para publicar uma nova versão dos arquivos lidos pelo Recommendation Agent; retorna a versão
+    def publish(self, output_path=DEFAULT_OUTPUT_PATH):
+        with self.lock:
+            return write_recommendation_objects(
+                output_path, self.apriori_recommendations(),
+                build_popularity_rows(self.product_counts, self.catalog), source="incremental")
+
+    # Método para salvar o estado em `path` (arquivos temporários + renomear; state.json por último)
+    def save(self, path=DEFAULT_STATE_PATH):
+        with self.lock:
+            os.makedirs(path, exist_ok=True)
+            counters_path = os.path.join(path, COUNTERS_FILE)
+            with open(counters_path + ".tmp", "wb") as file:
+                np.savez(file, item_counts=self.item_counts, pair_keys=self.pair_keys,
+                         pair_counts=self.pair_counts, product_counts=self.product_counts,
+                         first_seen=self.first_seen)
+            state_path = os.path.join(path, STATE_FILE)
+            with open(state_path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump({
+                    "products": self.catalog.products,
+                    "menu": self.catalog.menu,
+                    "min_support": self.min_support,
+                    "min_lift": self.min_lift,
+                    "basket_columns": self.basket_columns,
+                    "n_baskets": self.n_baskets,
+                    "lines_seen": self.lines_seen,
+                    "rules": {str(antecedent): rules for antecedent, rules in self.rules.items()},
+                    "updated_at": time.time(),
+                }, file)
+            os.replace(counters_path + ".tmp", counters_path)
+            os.replace(state_path + ".tmp", state_path)
+
+    # Método para carregar o estado salvo em `path`
+    @classmethod
+    def load(cls, path=DEFAULT_STATE_PATH):
+        with open(os.path.join(path, STATE_FILE), "r", encoding="utf-8") as file:
+            state = json.load(file)
+        catalog = ProductCatalog([tuple(product) for product in state["products"]], state["menu"])
+        counters = cls(catalog, state["min_support"], state["min_lift"], state["basket_columns"])
+        counters.n_baskets = state["n_baskets"]
+        counters.lines_seen = state["lines_seen"]
+        counters.rules = {int(antecedent): [tuple(rule) for rule in rules]
+                          for antecedent, rules in state["rules"].items()}
+        with np.load(os.path.join(path, COUNTERS_FILE)) as arrays:
+            for name in ("item_counts", "pair_keys", "pair_counts", "product_counts", "first_seen"):
+                setattr(counters, name, arrays[name])
+        return counters
+
+    # Método para verificar se existe um estado salvo em `path`
+    @staticmethod
+    def exists(path=DEFAULT_STATE_PATH):
+        return os.path.exists(os.path.join(path, STATE_FILE))
+
+
+# Função para atualizar o estado salvo em `state_path` com o lock do estado (entre processos):
+# carregar do disco -> `update(counters)` -> salvar -> publicar em `output_path` (se `publish`)
+# Nenhuma atualização de outro processo é perdida. Retorna (contadores, resultado de `update`, versão publicada)
+def update_state(update, state_path=DEFAULT_STATE_PATH, output_path=DEFAULT_OUTPUT_PATH, publish=True):
+    with file_lock(state_path, STATE_LOCK_FILE):
+        counters = RecommendationCounters.load(state_path)
+        result = update(counters)
+        counters.save(state_path)
+        version = counters.publish(output_path) if publish else None
+    return counters, result, version
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["init", "update", "rederive"])
+    parser.add_argument("--receipts", default=None,
+                        help="recibos (init: histórico, padrão: o dataset do repositório; update: novos recibos)")
+    parser.add_argument("--state", default=os.getenv("RECOMMENDATION_STATE_PATH") or DEFAULT_STATE_PATH)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH,
+                        help="diretório publicado (lido pelo Recommendation Agent)")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH, help="init: product.csv")
+    parser.add_argument("--menu", default=DEFAULT_PRODUCTS_PATH, help="init: products.json ('' para todos)")
+    parser.add_argument("--min-support", type=float, default=0.05, help="init")
+    parser.add_argument("--min-lift", type=float, default=1.0, help="init")
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    parser.add_argument("--no-publish", action="store_true", help="só atualizar os contadores")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "init":
+        catalog = ProductCatalog.from_file(args.catalog, load_menu(args.menu) if args.menu else None)
+        counters = RecommendationCounters(catalog, args.min_support, args.min_lift)
+        stats = counters.ingest_file(args.receipts or DEFAULT_RECEIPTS_PATH, args.chunk_size)
+        counters.derive()
+        os.makedirs(args.state, exist_ok=True)
+        with file_lock(args.state, STATE_LOCK_FILE):
+            counters.save(args.state)
+            version = None if args.no_publish else counters.publish(args.output)
+    elif args.command == "update":
+        if not args.receipts:
+            parser.error("update requer --receipts")
+        counters, stats, version = update_state(
+            lambda counters: counters.ingest_file(args.receipts, args.chunk_size),
+            args.state, args.output, publish=not args.no_publish)
+    else:
+        def rederive(counters):
+            counters.derive()
+            return {"antecedents": len(counters.rules)}
+
+        counters, stats, version = update_state(rederive, args.state, args.output, publish=not args.no_publish)
+    print(f"✅ Recomendações ({args.command}): {stats} | cestas no total: {counters.n_baskets} | "
+          f"versão publicada: {version} ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Testes da autenticação do endpoint de ingestão de recibos (POST /admin/recommendations/receipts) com o TestClient
+do FastAPI. O controlador da API é trocado por um falso; não acessam a rede nem gravam recomendações.
+
+Executar:
+    python -m pytest test_admin_endpoints.py
+"""
+
+import os
+
+# O cliente AsyncOpenAI exige uma chave, mesmo que o LLM seja falso
+os.environ.setdefault("OPENROUTER_API_KEY", "fake-key")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+
+# Controlador falso: registra os lotes recebidos
+class FakeController():
+    def __init__(self):
+        self.batches = []
+
+    async def ingest_receipts(self, rows):
+        self.batches.append(rows)
+        return {"receipts": len(rows)}
+
+
+# Enviar um lote ao endpoint com as variáveis de ambiente `environment` e o cabeçalho `token`
+def post_receipts(environment, token=None):
+    variables = ["RECOMMENDATION_INGESTION_ENABLED", "RECOMMENDATION_ADMIN_TOKEN"]
+    saved = {name: os.environ.pop(name, None) for name in variables}
+    os.environ.update(environment)
+    original_controller = main.agent_controller
+    main.agent_controller = FakeController()
+    try:
+        headers = {"X-Admin-Token": token} if token is not None else {}
+        response = TestClient(main.app).post("/admin/recommendations/receipts", headers=headers,
+                                             json={"receipts": [{"transaction_id": 1, "product_id": 2}]})
+        return response, main.agent_controller.batches
+    finally:
+        main.agent_controller = original_controller
+        for name, value in saved.items():
+            os.environ.pop(name, None)
+            if value is not None:
+                os.environ[name] = value
+
+
+def test_ingestion_requires_admin_token():
+    """Sem token configurado, sem cabeçalho ou com token errado, nenhum lote chega ao controlador."""
+    enabled = {"RECOMMENDATION_INGESTION_ENABLED": "true"}
+    response, batches = post_receipts({}, token="segredo")
+    assert response.status_code == 403 and not batches  # ingestão desativada
+
+    response, batches = post_receipts(enabled, token="segredo")
+    assert response.status_code == 403 and not batches  # token não configurado
+
+    enabled["RECOMMENDATION_ADMIN_TOKEN"] = "segredo"
+    response, batches = post_receipts(enabled)
+    assert response.status_code == 401 and not batches
+    response, batches = post_receipts(enabled, token="errado")
+    assert response.status_code == 401 and not batches
+
+
+def test_ingestion_with_admin_token():
+    """Com o token correto, o lote é repassado ao controlador."""
+    response, batches = post_receipts({"RECOMMENDATION_INGESTION_ENABLED": "true",
+                                       "RECOMMENDATION_ADMIN_TOKEN": "segredo"}, token="segredo")
+    assert response.status_code == 200
+    assert response.json() == {"success": True, "stats": {"receipts": 1}}
+    assert batches == [[{"transaction_id": 1, "product_id": 2}]]
+
+
+if __name__ == "__main__":
+    for test in [test_ingestion_requires_admin_token,
+                 test_ingestion_with_admin_token]:
+        test()
+        print(f"✅ {test.__name__}")
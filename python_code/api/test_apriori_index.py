@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Testes do índice de recomendações Apriori do Recommendation Agent (agents/apriori_index.py).
+O resultado é comparado com o método anterior (benchmark_apriori.legacy_apriori_recommendation);
+não acessam a rede.
+
+Executar:
+    python -m pytest test_apriori_index.py
+"""
+
+import itertools
+import json
+import os
+import random
+
+from agents.apriori_index import AprioriIndex
+from benchmark_apriori import generate_rules, legacy_apriori_recommendation
+
+APRIORI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "recommendation_objects", "apriori_recommendation.json")
+
+
+def test_same_result_as_previous_method():
+    """Todas as cestas de 1 a 3 produtos do arquivo real dão o mesmo resultado do método anterior."""
+    with open(APRIORI_PATH, "r") as file:
+        rules = json.load(file)
+    index = AprioriIndex(rules)
+    products = list(rules) + ["Unknown product"]
+    for size in (1, 2, 3):
+        for basket in itertools.permutations(products, size):
+            for top_k in (1, 3, 5):
+                assert index.recommend(list(basket), top_k) == legacy_apriori_recommendation(
+                    rules, list(basket), top_k), basket
+
+
+def test_ties_and_repeated_products():
+    """Empates de confiança seguem a ordem da cesta e do arquivo; produtos repetidos na cesta não mudam o resultado."""
+    rules = generate_rules(200, rules_per_product=20, seed=1)
+    index = AprioriIndex(rules)
+    rng = random.Random(1)
+    products = list(rules)
+    for _ in range(300):
+        basket = rng.sample(products, 4)
+        basket.append(basket[0])
+        assert index.recommend(basket, 8) == legacy_apriori_recommendation(rules, basket, 8)
+
+
+def test_category_limit():
+    """No máximo 2 recomendações por categoria, mesmo com confiança maior."""
+    rules = {"Latte": [
+        {"product": "Carmel syrup", "product_category": "Flavours", "confidence": 0.9},
+        {"product": "Hazelnut syrup", "product_category": "Flavours", "confidence": 0.8},
+        {"product": "Chocolate syrup", "product_category": "Flavours", "confidence": 0.7},
+        {"product": "Croissant", "product_category": "Bakery", "confidence": 0.1},
+    ]}
+    index = AprioriIndex(rules)
+    assert index.recommend(["Latte"]) == ["Carmel syrup", "Hazelnut syrup", "Croissant"]
+    assert index.recommend(["Latte"], max_per_category=1) == ["Carmel syrup", "Croissant"]
+    assert index.recommend(["Espresso"]) == []
+    assert len(index) == 4
+
+
+if __name__ == "__main__":
+    for test in [test_same_result_as_previous_method,
+                 test_ties_and_repeated_products,
+                 test_category_limit]:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Testes do cache LRU e do cache de decisões dos agentes (agents/cache.py). Não acessam a rede.
+
+Executar:
+    python -m pytest test_cache.py
+"""
+
+import os
+import time
+
+from agents.cache import LRUCache, build_decision_cache_key, create_decision_cache
+
+
+def test_lru_eviction_order():
+    """Com o cache cheio, sai a entrada usada há mais tempo (leituras também contam como uso)."""
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" passa a ser a menos usada
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    cache.set("a", 10)  # regravar também marca como usada
+    cache.set("d", 4)
+    assert cache.get("c") is None and cache.get("a") == 10
+    stats = cache.stats()
+    assert stats["evictions"] == 2 and stats["size"] == 2
+    assert stats["hits"] == 4 and stats["misses"] == 2
+
+
+def test_ttl_expiry():
+    """Entradas expiradas contam como falha e são removidas."""
+    cache = LRUCache(max_size=10, ttl=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.1)
+    assert cache.get("a", "expirado") == "expirado"
+    assert len(cache) == 0 and cache.stats()["misses"] == 1
+
+    cache = LRUCache(max_size=10, ttl=None)  # sem expiração
+    cache.set("a", 1)
+    time.sleep(0.06)
+    assert cache.get("a") == 1
+
+
+def test_decision_cache_key():
+    """A chave ignora caixa e espaços da mensagem, mas muda com o system prompt e com o modelo."""
+    messages = [{"role": "system", "content": "Você é o guard da cafeteria."},
+                {"role": "user", "content": "Eu  gostaria de um LATTE"}]
+    key = build_decision_cache_key("model", messages)
+    assert key == build_decision_cache_key("model", [
+        messages[0], {"role": "user", "content": "eu gostaria de um latte"}])
+
+    changed_prompt = [{"role": "system", "content": "Você é o guard da cafeteria. Nova regra."}, messages[1]]
+    assert build_decision_cache_key("model", changed_prompt) != key
+    assert build_decision_cache_key("other-model", messages) != key
+
+
+def test_create_decision_cache_is_opt_in():
+    """O cache de decisões só é criado quando ativado (geral ou por agente)."""
+    variables = ["DECISION_CACHE_ENABLED", "GUARD_CACHE_ENABLED", "DECISION_CACHE_SIZE"]
+    saved = {name: os.environ.pop(name, None) for name in variables}
+    try:
+        assert create_decision_cache("GUARD") is None
+        assert create_decision_cache("GUARD", enabled=True) is not None
+        os.environ["DECISION_CACHE_ENABLED"] = "true"
+        os.environ["GUARD_CACHE_ENABLED"] = "false"
+        os.environ["DECISION_CACHE_SIZE"] = "8"
+        assert create_decision_cache("GUARD") is None
+        assert create_decision_cache("CLASSIFICATION").max_size == 8
+    finally:
+        for name, value in saved.items():
+            os.environ.pop(name, None)
+            if value is not None:
+                os.environ[name] = value
+
+
+if __name__ == "__main__":
+    for test in [test_lru_eviction_order,
+                 test_ttl_expiry,
+                 test_decision_cache_key,
+                 test_create_decision_cache_is_opt_in]:
+        test()
+        print(f"✅ {test.__name__}")
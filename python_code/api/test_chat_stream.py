@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Testes do endpoint de streaming /chat/stream (Server-Sent Events) com o TestClient do FastAPI e o LLM falso
+(fake_llm.py) respondendo em pedaços. O controlador da API é trocado por um que usa o LLM falso; não acessam a rede.
+
+Executar:
+    python -m pytest test_chat_stream.py
+"""
+
+import json
+import os
+
+# O cliente AsyncOpenAI exige uma chave, mesmo que o LLM seja falso
+os.environ.setdefault("OPENROUTER_API_KEY", "fake-key")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from agents import GuardAgent, ClassificationAgent, OrderTakingAgent  # noqa: E402
+from agent_controller import AgentController  # noqa: E402
+from fake_llm import FakeLLM  # noqa: E402
+
+
+# Agente falso cujo streaming falha depois do primeiro pedaço de texto
+class FailingAgent():
+    async def stream_response(self, messages):
+        yield "token", "Um momento"
+        raise RuntimeError("LLM indisponível")
+
+
+# AgentController no LLM falso (como em benchmark_async.py, o DetailsAgent real não é instanciado)
+def build_controller(fake_llm):
+    controller = AgentController.__new__(AgentController)
+    controller.routing_mode = "separate"
+    controller.parallel_routing = True
+    controller.speculative_execution = False
+    controller.semantic_cache = None
+    controller.llm_client = fake_llm.client()
+    controller.guard_agent = GuardAgent(use_cache=False, client=controller.llm_client)
+    controller.classification_agent = ClassificationAgent(use_cache=False, client=controller.llm_client)
+    controller.agent_dict = {
+        "order_taking_agent": OrderTakingAgent(None, client=controller.llm_client),
+        "details_agent": FailingAgent(),
+    }
+    return controller
+
+
+# Enviar uma mensagem ao /chat/stream e devolver a lista de eventos (nome, dados)
+def stream_chat(fake_llm, message):
+    original_controller = main.agent_controller
+    main.agent_controller = build_controller(fake_llm)
+    try:
+        # Sem `with`: o lifespan (warm-up do controlador real) não é executado
+        response = TestClient(main.app).post(
+            "/chat/stream", json={"messages": [{"role": "user", "content": message}]})
+    finally:
+        main.agent_controller = original_controller
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = []
+    for block in response.text.split("\n\n"):
+        if not block.strip():
+            continue
+        event_line, data_line = block.split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def test_order_taking_streams_only_response_field():
+    """Eventos `token` com o texto do campo "response" (sem o resto do JSON) e, por último, `memory`."""
+    fake_llm = FakeLLM(latency=0, chunk_size=5)
+    events = stream_chat(fake_llm, "Eu gostaria de um latte")
+
+    names = [name for name, _ in events]
+    assert names[-1] == "memory" and set(names[:-1]) == {"token"} and len(names) > 3
+    text = "".join(data["content"] for name, data in events if name == "token")
+    assert text == "Anotei um Latte. Deseja mais alguma coisa?"
+    memory = events[-1][1]
+    assert memory["content"] == text
+    assert memory["memory"]["agent"] == "order_taking_agent"
+    assert memory["memory"]["order"] == [{"item": "Latte", "quantity": 1, "price": 4.75}]
+    assert fake_llm.requests[-1]["stream"] is True
+
+
+def test_guard_rejection_sends_error_event():
+    """Mensagem bloqueada pelo Guard Agent: um único evento `error`, sem texto."""
+    events = stream_chat(FakeLLM(latency=0), "Quem ganhou o jogo de futebol?")
+    assert [name for name, _ in events] == ["error"]
+    assert "segurança" in events[0][1]["error"]
+
+
+def test_agent_failure_sends_error_event():
+    """Falha no meio do streaming: os pedaços já enviados são mantidos e o último evento é `error`."""
+    events = stream_chat(FakeLLM(latency=0), "Onde fica a cafeteria?")
+    assert events[0] == ("token", {"content": "Um momento"})
+    assert events[-1][0] == "error" and "LLM indisponível" in events[-1][1]["error"]
+    assert "memory" not in [name for name, _ in events]
+
+
+if __name__ == "__main__":
+    for test in [test_order_taking_streams_only_response_field,
+                 test_guard_rejection_sends_error_event,
+                 test_agent_failure_sends_error_event]:
+        test()
+        print(f"✅ {test.__name__}")
@@ -7,6 +7,7 @@ from agents import (  # importação dos agentes
     AgentProtocol,
     RecommendationAgent,
     OrderTakingAgent)
+import asyncio
 import os
 from typing import Dict  # tipagem
 import pathlib
@@ -17,7 +18,7 @@ folder_path = pathlib.Path(__file__).parent.resolve()  # caminho do projeto
 sys.path.append(os.path.join(folder_path, "../.."))
 
 
-def main():
+async def main():
     # Instanciar agentes
     guard_agent = GuardAgent()
     classification_agent = ClassificationAgent()
@@ -50,7 +51,7 @@ def main():
         messages.append({"role": "user", "content": prompt})
 
         # Executar Guard Agent
-        guard_agent_response = guard_agent.get_response(messages)
+        guard_agent_response = await guard_agent.get_response(messages)
         # print("Resposta do Guard Agent: ", guard_agent_response)
         if guard_agent_response['memory']['guard_decision'] == 'not allowed':
             # se a decisão não for permitida
@@ -58,7 +59,7 @@ def main():
             continue  # continue para a próxima iteração do loop
 
         # Executar Classification Agent
-        classification_agent_response = classification_agent.get_response(
+        classification_agent_response = await classification_agent.get_response(
             messages)
         # Agente escolhido pelo classificador
         chosen_agent = classification_agent_response["memory"]["classification_decision"]
@@ -68,7 +69,7 @@ def main():
         agent = agent_dict[chosen_agent]  # usar instância do agente escolhido
         # Resposta do agente escolhido
         # acessar seu método `get_response`
-        response = agent.get_response(messages)
+        response = await agent.get_response(messages)
         # Exibir metadados
         print("Agent output:", response)
         # adiciona a resposta do agente à lista de mensagens
@@ -78,4 +79,4 @@ def main():
 # Verificar se o script está sendo executado diretamente (não importado como módulo)
 # Evita que o código seja executado ao importar o módulo em outro lugar
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Testes da montagem do contexto do Details Agent com orçamento de tokens (agents/context_assembler.py)
+e da divisão dos textos longos em trechos na construção do índice (vector_index_builder.py).
+Usam a estimativa de tokens (sem tokenizador) e os textos do repositório; não acessam a rede.
+
+Executar:
+    python -m pytest test_context_assembler.py
+"""
+
+from agents.context_assembler import ContextAssembler, TokenCounter, chunk_text, split_units
+from vector_index_builder import DEFAULT_ABOUT_US_PATH, iter_documents
+
+TOKEN_COUNTER = TokenCounter()
+
+
+def read_about_us():
+    with open(DEFAULT_ABOUT_US_PATH, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def test_chunks_respect_limit_and_overlap():
+    """Os trechos têm até `max_tokens` tokens, cobrem todo o texto e repetem uma unidade do trecho anterior."""
+    text = read_about_us()
+    chunks = chunk_text(text, TOKEN_COUNTER, max_tokens=64)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert TOKEN_COUNTER.count(chunk) <= 64 or len(split_units(chunk)) == 1
+    for previous, chunk in zip(chunks, chunks[1:]):
+        if len(split_units(previous)) > 1:  # um trecho de uma única unidade não é repetido
+            assert split_units(previous)[-1][0] == split_units(chunk)[0][0]
+    units = {unit for unit, _ in split_units(text)}
+    assert units == {unit for chunk in chunks for unit, _ in split_units(chunk)}
+
+
+def test_long_texts_are_chunked_in_index():
+    """"About Us" e o menu viram vários documentos; com chunk_tokens=0, o formato do notebook é mantido."""
+    documents = dict(iter_documents(chunk_tokens=64, token_counter=TOKEN_COUNTER))
+    about_us = [document_id for document_id in documents if "About Section (part" in document_id]
+    assert len(about_us) > 1
+    assert documents["Menu Items (part 1)"].startswith("Menu Items (part 1):\n")
+
+    notebook = dict(iter_documents(chunk_tokens=0))
+    assert len(notebook) < len(documents)
+    assert not any("(part" in document_id for document_id in notebook)
+
+
+def test_overlapping_chunks_are_deduplicated():
+    """A unidade repetida entre trechos vizinhos entra uma única vez no contexto."""
+    chunks = chunk_text(read_about_us(), TOKEN_COUNTER, max_tokens=64)
+    assembler = ContextAssembler(TOKEN_COUNTER, max_tokens=10_000)
+    context, tokens = assembler.assemble(chunks[:2] + [chunks[0]])
+    overlap = split_units(chunks[0])[-1][0]
+    assert context.count(overlap) == 1
+    assert tokens <= TOKEN_COUNTER.count(chunks[0]) + TOKEN_COUNTER.count(chunks[1])
+
+
+def test_budget_is_respected_in_rank_order():
+    """O contexto não passa do orçamento e os documentos mais bem classificados entram primeiro."""
+    chunks = chunk_text(read_about_us(), TOKEN_COUNTER, max_tokens=64)
+    assembler = ContextAssembler(TOKEN_COUNTER, max_tokens=80)
+    context, tokens = assembler.assemble(list(reversed(chunks)))
+    assert 0 < tokens <= 80
+    assert context.startswith(chunks[-1].split("\n")[0])
+
+    assembler.record(tokens + 50, tokens)
+    stats = assembler.stats()
+    assert stats["requests"] == 1
+    assert stats["average_context_tokens"] == tokens
+    assert stats["average_candidate_tokens"] > tokens
+
+
+if __name__ == "__main__":
+    for test in [test_chunks_respect_limit_and_overlap,
+                 test_long_texts_are_chunked_in_index,
+                 test_overlapping_chunks_are_deduplicated,
+                 test_budget_is_respected_in_rank_order]:
+        test()
+        print(f"✅ {test.__name__}")
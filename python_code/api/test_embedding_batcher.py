@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Testes do micro-batching dos embeddings entre chamadas concorrentes (agents/embedding_batcher.py).
+Usam threads e um codificador falso (embedding = hash do texto); não acessam a rede.
+
+Executar:
+    python -m pytest test_embedding_batcher.py
+"""
+
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from agents.embedding_batcher import EmbeddingBatcher
+
+
+# Embedding falso e determinístico de um texto
+def fake_embedding(text):
+    return [zlib.crc32(text.encode("utf-8")) % 1000, len(text)]
+
+
+# Codificador falso: guarda os lotes recebidos; `gate` segura o cálculo até ser liberado
+class FakeEncoder():
+    def __init__(self, gate=None, fail_on=None):
+        self.batches = []
+        self.gate = gate
+        self.fail_on = fail_on  # texto que faz o lote inteiro falhar
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        self.batches.append(list(texts))
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail_on in texts:
+            raise ValueError("falha no modelo")
+        return np.array([fake_embedding(text) for text in texts], dtype=np.float32)
+
+
+# Chamar `batcher.encode` em uma thread por entrada; retorna (threads, resultados por entrada)
+def encode_concurrently(batcher, inputs):
+    results = [None] * len(inputs)
+
+    def call(index):
+        try:
+            results[index] = batcher.encode(inputs[index])
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(len(inputs))]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_rows_are_routed_to_each_caller():
+    """Chamadas concorrentes viram um único lote, e cada chamador recebe só as suas linhas, na sua ordem."""
+    encoder = FakeEncoder()
+    inputs = ["Latte", ["Mocha", "Croissant"], "Espresso", ["Scone", "Chai", "Cappuccino"]]
+    # Janela longa: o lote só fecha quando tiver todos os textos (7)
+    batcher = EmbeddingBatcher(encoder, max_batch_size=7, max_wait=5)
+    threads, results = encode_concurrently(batcher, inputs)
+    for thread in threads:
+        thread.join(10)
+
+    assert len(encoder.batches) == 1 and len(encoder.batches[0]) == 7
+    for texts, result in zip(inputs, results):
+        texts = [texts] if isinstance(texts, str) else texts
+        assert result.tolist() == [fake_embedding(text) for text in texts]
+    assert batcher.stats()["batches"] == 1 and batcher.stats()["texts"] == 7
+    batcher.close()
+
+
+def test_exception_reaches_every_caller_in_the_batch():
+    """Se o `encode` do lote falhar, todos os chamadores daquele lote recebem a exceção."""
+    encoder = FakeEncoder(fail_on="Mocha")
+    batcher = EmbeddingBatcher(encoder, max_batch_size=3, max_wait=5)
+    threads, results = encode_concurrently(batcher, ["Latte", "Mocha", "Espresso"])
+    for thread in threads:
+        thread.join(10)
+
+    assert len(encoder.batches) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    # O batcher continua funcionando depois da falha
+    texts = ["Latte", "Chai", "Scone"]  # lote cheio: não espera a janela
+    assert batcher.encode(texts).tolist() == [fake_embedding(text) for text in texts]
+    batcher.close()
+
+
+def test_close_finishes_queued_work():
+    """close() espera as chamadas já na fila serem calculadas; depois disso novas chamadas são recusadas."""
+    gate = threading.Event()
+    encoder = FakeEncoder(gate=gate)
+    batcher = EmbeddingBatcher(encoder, max_batch_size=1, max_wait=0)
+
+    threads, results = encode_concurrently(batcher, ["Latte"])
+    while not encoder.batches:  # 1º lote em cálculo (bloqueado no gate)
+        time.sleep(0.001)
+    more_threads, more_results = encode_concurrently(batcher, ["Mocha", "Espresso"])
+    while batcher.requests.qsize() < 2:
+        time.sleep(0.001)
+
+    closer = threading.Thread(target=batcher.close)
+    closer.start()
+    gate.set()
+    closer.join(10)
+    for thread in threads + more_threads:
+        thread.join(10)
+
+    assert not batcher.worker.is_alive()
+    assert results[0].tolist() == [fake_embedding("Latte")]
+    assert [result.tolist() for result in more_results] == [[fake_embedding("Mocha")], [fake_embedding("Espresso")]]
+    try:
+        batcher.encode("Latte")
+        assert False, "encode depois de close() deveria falhar"
+    except RuntimeError:
+        pass
+
+
+if __name__ == "__main__":
+    for test in [test_rows_are_routed_to_each_caller,
+                 test_exception_reaches_every_caller_in_the_batch,
+                 test_close_finishes_queued_work]:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Testes do cache de embeddings (agents/embedding_cache.py) e do uso parcial do cache em get_embedding
+(agents/utils.py). Usam um codificador falso e um banco SQLite em pasta temporária; não acessam a rede.
+
+Executar:
+    python -m pytest test_embedding_cache.py
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from agents.embedding_cache import EmbeddingCache
+from agents.utils import get_embedding
+
+
+# Codificador falso: embedding derivado do texto; guarda os lotes recebidos
+class FakeEncoder():
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.batches.append(list(texts))
+        return np.array([[len(text), sum(map(ord, text)) % 97, 1.0] for text in texts], dtype=np.float32)
+
+
+def test_persistent_tier_is_promoted_to_memory():
+    """Um worker novo encontra o embedding no SQLite e o promove para a memória."""
+    with tempfile.TemporaryDirectory() as path:
+        database = os.path.join(path, "embeddings.sqlite")
+        cache = EmbeddingCache("model", persistent_path=database)
+        cache.set("Quanto custa o Latte?", [1.0, 2.0, 3.0])
+        cache.close()
+
+        cache = EmbeddingCache("model", persistent_path=database)
+        assert cache.get("quanto  custa o latte?").tolist() == [1.0, 2.0, 3.0]
+        assert cache.stats()["persistent"]["hits"] == 1
+        assert cache.get("Quanto custa o Latte?") is not None
+        assert cache.stats()["persistent"]["hits"] == 1  # 2ª leitura vem da memória
+        assert cache.stats()["hits"] == 1
+        cache.close()
+
+
+def test_persistent_size_trims_least_recently_used():
+    """A camada persistente remove os embeddings usados há mais tempo (last_used)."""
+    with tempfile.TemporaryDirectory() as path:
+        database = os.path.join(path, "embeddings.sqlite")
+        cache = EmbeddingCache("model", max_size=1, persistent_path=database, persistent_size=2)
+        cache.set("a", [1.0])
+        time.sleep(0.01)
+        cache.set("b", [2.0])
+        time.sleep(0.01)
+        cache.memory.clear()
+        assert cache.get("a") is not None  # atualiza last_used de "a"
+        time.sleep(0.01)
+        cache.set("c", [3.0])
+
+        cache.memory.clear()
+        assert cache.get("b") is None
+        assert cache.get("a").tolist() == [1.0] and cache.get("c").tolist() == [3.0]
+        assert cache.stats()["persistent"]["size"] == 2
+        cache.close()
+
+
+def test_model_name_is_part_of_the_key():
+    """Trocar o modelo de embeddings não reaproveita embeddings do modelo anterior."""
+    with tempfile.TemporaryDirectory() as path:
+        database = os.path.join(path, "embeddings.sqlite")
+        cache = EmbeddingCache("model-a", persistent_path=database)
+        cache.set("Latte", [1.0])
+        assert cache.build_key("Latte") != EmbeddingCache("model-b").build_key("Latte")
+        cache.close()
+
+        cache = EmbeddingCache("model-b", persistent_path=database)
+        assert cache.get("Latte") is None
+        cache.close()
+
+
+def test_get_embedding_partial_hit_keeps_input_order():
+    """Só os textos fora do cache são calculados, em um único lote, e as linhas voltam na ordem da entrada."""
+    texts = ["Latte", "Croissant", "Mocha", "Espresso"]
+    encoder = FakeEncoder()
+    expected = encoder.encode(texts)
+
+    cache = EmbeddingCache("model")
+    cache.set("Croissant", expected[1])
+    cache.set("Espresso", expected[3])
+    encoder.batches.clear()
+
+    embeddings = get_embedding(encoder, texts, cache)
+    assert encoder.batches == [["Latte", "Mocha"]]
+    assert embeddings.dtype == np.float32 and np.array_equal(embeddings, expected)
+
+    # Tudo em cache: nenhum lote novo
+    assert np.array_equal(get_embedding(encoder, texts, cache), expected)
+    assert len(encoder.batches) == 1
+
+
+if __name__ == "__main__":
+    for test in [test_persistent_tier_is_promoted_to_memory,
+                 test_persistent_size_trims_least_recently_used,
+                 test_model_name_is_part_of_the_key,
+                 test_get_embedding_partial_hit_keeps_input_order]:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Testes das respostas prontas (FAQ) do Details Agent (agents/faq_store.py e faq_builder.py).
+Usam o texto "About Us" e o sales_outlet.csv do repositório e um cliente de embeddings falso (saco de palavras);
+não acessam a rede nem carregam o modelo de embeddings.
+
+Executar:
+    python -m pytest test_faq_store.py
+"""
+
+import re
+import tempfile
+import zlib
+
+import numpy as np
+
+from faq_builder import build_faq_entries, build_faq_index
+
+
+# Cliente de embeddings falso: contagem das palavras (cada palavra em uma posição fixa do vetor)
+class BagOfWordsClient():
+    def encode(self, texts, convert_to_numpy=True):
+        embeddings = np.zeros((len(texts), 512), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                embeddings[row, zlib.crc32(word.encode()) % 512] += 1
+        return embeddings
+
+
+def create_store(path, threshold=0.9):
+    return build_faq_index(BagOfWordsClient(), path, model_name="bag-of-words", threshold=threshold)
+
+
+def match(store, text):
+    result = store.match(BagOfWordsClient().encode([text])[0], text)
+    return result[0]["id"] if result is not None else None
+
+
+def test_entries_filled_from_source_files():
+    """Horários, endereço, telefone e bairros vêm do texto "About Us" e do sales_outlet.csv."""
+    entries = {entry["id"]: entry for entry in build_faq_entries()}
+    assert "Monday to Friday: 7 AM – 8 PM" in entries["opening_hours"]["answer"]
+    assert "Sunday: 8 AM – 6 PM" in entries["opening_hours"]["answer"]
+    assert "183 W 10th Street, New York, NY 10014" in entries["location"]["answer"]
+    assert "674-646-6434" in entries["phone"]["answer"]
+    assert entries["delivery_soho"]["required_terms"] == ["soho"]
+    assert "Lower Manhattan" in entries["delivery_areas"]["answer"]
+
+
+def test_canonical_questions_hit():
+    """Perguntas canônicas (em qualquer caixa/pontuação) recebem a resposta pronta."""
+    with tempfile.TemporaryDirectory() as path:
+        store = create_store(path)
+        assert match(store, "What are your opening hours?") == "opening_hours"
+        assert match(store, "what is your address") == "location"
+        assert match(store, "Do you deliver to SoHo?") == "delivery_soho"
+        assert store.stats()["hits"] == 3
+
+
+def test_unknown_area_never_gets_a_yes():
+    """Um bairro fora da lista não recebe "Yes! We deliver to ..." de outro bairro."""
+    with tempfile.TemporaryDirectory() as path:
+        # Limiar baixo: a pergunta sobre Brooklyn fica parecida com as perguntas por bairro
+        store = create_store(path, threshold=0.75)
+        # A resposta por bairro exige o nome do bairro: sobra a lista geral de bairros atendidos
+        assert match(store, "Do you deliver to Brooklyn?") == "delivery_areas"
+        assert match(store, "Do you deliver to Soho?") == "delivery_soho"
+
+
+def test_other_questions_use_the_normal_flow():
+    """Perguntas sobre produtos ou pedidos não passam do limiar (seguem para o roteamento e o LLM)."""
+    with tempfile.TemporaryDirectory() as path:
+        store = create_store(path)
+        assert match(store, "Is the cappuccino lactose-free?") is None
+        assert match(store, "I want two lattes please") is None
+        assert store.stats()["misses"] == 2
+
+
+if __name__ == "__main__":
+    for test in [test_entries_filled_from_source_files,
+                 test_canonical_questions_hit,
+                 test_unknown_area_never_gets_a_yes,
+                 test_other_questions_use_the_normal_flow]:
+        test()
+        print(f"✅ {test.__name__}")
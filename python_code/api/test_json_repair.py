@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Testes do reparo local das saídas JSON dos agentes e da extração do campo em streaming (agents/json_repair.py).
+Não acessam a rede.
+
+Executar:
+    python -m pytest test_json_repair.py
+"""
+
+import json
+
+from agents.json_repair import JsonFieldStreamer, repair_json_output
+
+
+def repair(text):
+    output, was_valid = repair_json_output(text)
+    assert output is not None and not was_valid, text
+    return json.loads(output)
+
+
+def test_valid_json_is_returned_unchanged():
+    """Um JSON válido volta como está; listas em formato de string viram listas."""
+    text = '{"decision": "allowed", "message": ""}'
+    assert repair_json_output(text) == (text, True)
+    assert repair('{"recommendation_type": "apriori", "parameters": "[\'Latte\']"}')["parameters"] == ["Latte"]
+    assert repair_json_output("") == (None, False)
+    assert repair_json_output("Desculpe, não entendi.") == (None, False)
+
+
+def test_fences_and_surrounding_prose():
+    """Code fences e texto antes/depois do objeto são removidos."""
+    assert repair('```json\n{"decision": "allowed"}\n```') == {"decision": "allowed"}
+    assert repair('Here is the output:\n{"decision": "not allowed", "message": "Sorry"}\nHope it helps!') == {
+        "decision": "not allowed", "message": "Sorry"}
+
+
+def test_trailing_commas_and_single_quotes():
+    """Vírgulas sobrando e aspas simples (literal Python, True/None) são corrigidas."""
+    assert repair('{"decision": "allowed", "order": [{"item": "Latte", "quantity": 1,},],}') == {
+        "decision": "allowed", "order": [{"item": "Latte", "quantity": 1}]}
+    assert repair("{'decision': 'allowed', 'message': None, 'step number': 2}") == {
+        "decision": "allowed", "message": None, "step number": 2}
+    assert repair('{decision: "allowed", message: true}') == {"decision": "allowed", "message": True}
+
+
+def test_string_contents_are_preserved():
+    """Quebras de linha dentro das strings não levam ao LLM, e ", }" dentro de uma string não é alterado."""
+    assert repair('{"response": "Your order:\n- 1 Latte\n- 1 Croissant"}') == {
+        "response": "Your order:\n- 1 Latte\n- 1 Croissant"}
+    assert repair('{"response": "Use {a, } and [b, ]", "order": [1, 2,],}') == {
+        "response": "Use {a, } and [b, ]", "order": [1, 2]}
+    assert repair('{"message": "It\'s a {test, }",}') == {"message": "It's a {test, }"}
+
+
+def test_streamer_extracts_partial_field():
+    """O texto do campo chega em partes, com escapes decodificados (mesmo divididos entre pedaços)."""
+    streamer = JsonFieldStreamer("response")
+    chunks = ['{"chain of thought": "respo', 'nse: no", "order": [{"item": "La',
+              'tte"}], "resp', 'onse": "Ol', 'á!\\', 'n\\u00e', '9 \\"ok\\"', ' \\ud83d', '\\ude00"', ', "step number": 1}']
+    output = [streamer.feed(chunk) for chunk in chunks]
+    assert output[:3] == ["", "", ""]
+    assert "".join(output) == 'Olá!\né "ok" 😀'
+    assert output[-1] == ""
+    assert streamer.done
+    # Campo com o mesmo nome dentro de um objeto aninhado não é extraído
+    streamer = JsonFieldStreamer("response")
+    assert streamer.feed('{"order": {"response": "x"}, "response": "y"}') == "y"
+
+
+if __name__ == "__main__":
+    for test in [test_valid_json_is_returned_unchanged,
+                 test_fences_and_surrounding_prose,
+                 test_trailing_commas_and_single_quotes,
+                 test_string_contents_are_preserved,
+                 test_streamer_extracts_partial_field]:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Teste de paridade do backend de embeddings ONNX int8 (EMBEDDING_BACKEND=onnx) com o PyTorch
+(SentenceTransformer) nos textos do índice da cafeteria (produtos, About Us e menu).
+
+Requer o modelo exportado com export_onnx_embedding.py (em EMBEDDING_ONNX_PATH ou api/onnx_embedding_model)
+e o modelo original disponível localmente; caso contrário, o teste é ignorado (skip).
+
+Executar:
+    python -m pytest test_onnx_embedding.py
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from agents.embedding_model import DEFAULT_ONNX_PATH, EMBEDDING_CONFIG_FILE, OnnxEmbeddingModel
+from vector_index_builder import iter_documents
+
+ONNX_PATH = os.getenv("EMBEDDING_ONNX_PATH") or DEFAULT_ONNX_PATH
+
+# Perguntas usadas para comparar a ordem dos resultados da busca
+QUESTIONS = [
+    "Is Cappuccino lactose-free?",
+    "What are the ingredients of the almond croissant?",
+    "Where is the coffee shop located?",
+    "Which syrups do you have?",
+    "What are your opening hours?",
+]
+
+
+def load_models():
+    """Carrega o modelo ONNX int8 e o SentenceTransformer que foi exportado (ou pula o teste)."""
+    pytest.importorskip("onnxruntime")
+    if not os.path.exists(os.path.join(ONNX_PATH, EMBEDDING_CONFIG_FILE)):
+        pytest.skip(f"modelo ONNX não exportado em {ONNX_PATH}")
+    with open(os.path.join(ONNX_PATH, EMBEDDING_CONFIG_FILE), "r", encoding="utf-8") as file:
+        model_name = json.load(file)["model_name"]
+    sentence_transformers = pytest.importorskip("sentence_transformers")
+    try:
+        torch_model = sentence_transformers.SentenceTransformer(
+            model_name, device="cpu")
+    except Exception as e:
+        pytest.skip(f"modelo {model_name} indisponível: {e}")
+    return OnnxEmbeddingModel(ONNX_PATH), torch_model
+
+
+def normalize(embeddings):
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def test_embeddings_match_torch_on_product_corpus():
+    """Os embeddings int8 têm a mesma dimensão e similaridade de cosseno >= 0.99 com os do PyTorch."""
+    onnx_model, torch_model = load_models()
+    texts = [text for _, text in iter_documents()]
+
+    expected = torch_model.encode(texts, convert_to_numpy=True)
+    actual = onnx_model.encode(texts)
+
+    assert actual.shape == expected.shape
+    similarities = (normalize(expected) * normalize(actual)).sum(axis=1)
+    assert similarities.min() >= 0.99, f"cosseno mínimo {similarities.min():.4f}"
+
+
+def test_retrieval_matches_torch():
+    """A busca no índice devolve os mesmos documentos mais próximos com os dois backends."""
+    onnx_model, torch_model = load_models()
+    texts = [text for _, text in iter_documents()]
+
+    torch_corpus = normalize(torch_model.encode(texts))
+    onnx_corpus = normalize(onnx_model.encode(texts))
+    for question in QUESTIONS:
+        torch_scores = torch_corpus @ normalize(torch_model.encode([question]))[0]
+        onnx_scores = onnx_corpus @ normalize(onnx_model.encode([question]))[0]
+        # Mesmo documento mais próximo, e os 2 primeiros (top_k do Details Agent) iguais como conjunto
+        assert np.argmax(torch_scores) == np.argmax(onnx_scores), question
+        assert set(np.argsort(-torch_scores)[:2]) == set(np.argsort(-onnx_scores)[:2]), question
+
+
+if __name__ == "__main__":
+    for test in [test_embeddings_match_torch_on_product_corpus,
+                 test_retrieval_matches_torch]:
+        test()
+        print(f"✅ {test.__name__}")
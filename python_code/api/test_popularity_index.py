@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Testes dos rankings de popularidade do Recommendation Agent (agents/popularity_index.py).
+O resultado é comparado com o método anterior (filtro + ordenação da tabela com pandas a cada consulta);
+não acessam a rede.
+
+Executar:
+    python -m pytest test_popularity_index.py
+"""
+
+import itertools
+import os
+
+import pandas as pd
+
+from agents.popularity_index import PopularityIndex
+
+POPULARITY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "recommendation_objects", "popularity_recommendation.csv")
+
+
+# Método anterior (RecommendationAgent.get_popular_recommendation), usado como referência
+def legacy_popular_recommendation(popular_recommendations, product_categories=None, top_k=5):
+    recommendations_df = popular_recommendations
+    if isinstance(product_categories, str):
+        product_categories = [product_categories]
+    if product_categories is not None:
+        recommendations_df = popular_recommendations[popular_recommendations['product_category'].isin(
+            product_categories)]
+    recommendations_df = recommendations_df.sort_values(
+        'number_of_transactions', ascending=False)
+    if recommendations_df.shape[0] == 0:
+        return []
+    return recommendations_df['product'].tolist()[:top_k]
+
+
+def test_same_result_as_previous_method():
+    """Todas as combinações de até 3 categorias (e sem categoria) dão o mesmo resultado do método anterior."""
+    popular_recommendations = pd.read_csv(POPULARITY_PATH)
+    index = PopularityIndex.from_file(POPULARITY_PATH)
+    categories = index.categories + ["Unknown category"]
+    for top_k in (1, 3, 5, 50):
+        assert index.recommend(None, top_k) == legacy_popular_recommendation(
+            popular_recommendations, None, top_k)
+        for size in (0, 1, 2, 3):
+            for combination in itertools.permutations(categories, size):
+                assert index.recommend(list(combination), top_k) == legacy_popular_recommendation(
+                    popular_recommendations, list(combination), top_k), combination
+
+
+def test_ties_keep_file_order():
+    """Empates no número de transações mantêm a ordem do arquivo, também na intercalação de categorias."""
+    index = PopularityIndex([
+        ("Latte", "Coffee", 10),
+        ("Croissant", "Bakery", 20),
+        ("Cappuccino", "Coffee", 20),
+        ("Scone", "Bakery", 10),
+    ])
+    assert index.recommend() == ["Croissant", "Cappuccino", "Latte", "Scone"]
+    assert index.recommend(["Coffee", "Bakery"]) == ["Croissant", "Cappuccino", "Latte", "Scone"]
+    assert index.recommend(["Coffee", "Coffee"], top_k=1) == ["Cappuccino"]
+    assert index.categories == ["Coffee", "Bakery"]
+
+
+if __name__ == "__main__":
+    for test in [test_same_result_as_previous_method,
+                 test_ties_keep_file_order]:
+        test()
+        print(f"✅ {test.__name__}")
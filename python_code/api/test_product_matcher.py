@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Testes do caminho rápido de produtos do Details Agent (agents/product_matcher.py).
+Usam o products.json do repositório; não acessam a rede nem carregam o modelo de embeddings.
+
+Executar:
+    python -m pytest test_product_matcher.py
+"""
+
+from agents.product_matcher import ProductMatcher
+from vector_index_builder import DEFAULT_PRODUCTS_PATH, iter_documents
+
+
+def create_matcher():
+    return ProductMatcher.from_file(DEFAULT_PRODUCTS_PATH)
+
+
+def test_matches_names_and_variants():
+    """Nomes em qualquer caixa, plural, hífen e apelidos levam ao produto certo."""
+    matcher = create_matcher()
+    assert matcher.match("Is the cappuccino lactose-free?") == ["Cappuccino"]
+    assert matcher.match("Do you have LATTES?") == ["Latte"]
+    assert matcher.match("How much is the sugar-free vanilla syrup?") == [
+        "Sugar Free Vanilla syrup"]
+    assert matcher.match("Do you sell caramel syrup?") == ["Carmel syrup"]
+    assert matcher.match("Is the hot chocolate sweet?") == ["Dark chocolate"]
+
+
+def test_longest_name_wins():
+    """"Almond Croissant" não é confundido com "Croissant" (nem "Chocolate syrup" com "Chocolate")."""
+    matcher = create_matcher()
+    assert matcher.match("What's in the almond croissant?") == ["Almond Croissant"]
+    assert matcher.match("chocolate syrup or chocolate croissant?") == [
+        "Chocolate syrup", "Chocolate Croissant"]
+    assert matcher.match("Do you have a croissant?") == ["Croissant"]
+    # Palavras dentro de outras palavras não contam
+    assert matcher.match("Is it lattering?") == []
+
+
+def test_category_plural_matches_every_product():
+    """"Croissants" é uma categoria: leva a todos os croissants e, por serem mais de 2, à busca vetorial."""
+    matcher = create_matcher()
+    assert matcher.match("What croissants do you have?") == [
+        "Croissant", "Chocolate Croissant", "Almond Croissant"]
+    assert matcher.lookup("What croissants do you have?") is None
+    # Plural de um nome que não aparece em outros nomes continua no caminho rápido
+    assert matcher.match("Do you have LATTES?") == ["Latte"]
+    assert matcher.lookup("How much are the almond croissants?") is not None
+
+
+def test_open_ended_questions_use_retrieval():
+    """Sem produto citado, ou com produtos demais, o caminho rápido devolve None."""
+    matcher = create_matcher()
+    assert matcher.lookup("Where is the coffee shop located?") is None
+    assert matcher.lookup("Latte, cappuccino or croissant: which is cheaper?") is None
+    assert matcher.stats()["misses"] == 2
+    assert matcher.stats()["hits"] == 0
+
+
+def test_lookup_returns_indexed_documents():
+    """O documento do caminho rápido é o mesmo texto indexado no armazenamento vetorial."""
+    matcher = create_matcher()
+    indexed = {text for _, text in iter_documents(warn_duplicates=False)}
+    documents = matcher.lookup("Is the cappuccino lactose-free?")
+    assert len(documents) == 1
+    assert documents[0] in indexed
+    assert documents[0].startswith("Cappuccino : ")
+
+    stats = matcher.stats()
+    assert stats["hits"] == 1
+    assert stats["product_hits"] == {"Cappuccino": 1}
+
+
+if __name__ == "__main__":
+    for test in [test_matches_names_and_variants,
+                 test_longest_name_wins,
+                 test_category_plural_matches_every_product,
+                 test_open_ended_questions_use_retrieval,
+                 test_lookup_returns_indexed_documents]:
+        test()
+        print(f"✅ {test.__name__}")
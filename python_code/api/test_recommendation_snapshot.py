@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Testes dos snapshots versionados das recomendações e da recarga sem reiniciar a API
+(agents/recommendation_snapshot.py e RecommendationAgent.refresh). Não acessam a rede.
+
+Executar:
+    python -m pytest test_recommendation_snapshot.py
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+from agents.recommendation_agent import RecommendationAgent
+from agents.recommendation_snapshot import (APRIORI_FILE, POPULARITY_FILE, SNAPSHOTS_DIR, RecommendationSnapshot,
+                                            publish_snapshot, read_snapshot_manifest)
+
+OBJECTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recommendation_objects")
+APRIORI = {
+    "Latte": [{"product": "Croissant", "product_category": "Bakery", "confidence": 0.5}],
+    "Croissant": [{"product": "Latte", "product_category": "Coffee", "confidence": 1.0}],
+}
+POPULARITY = [("Croissant", "Bakery", 2), ("Latte", "Coffee", 5)]
+
+
+# Agente com uma cópia dos arquivos do repositório em `path` (sem ponteiro: snapshot inicial)
+def create_agent(path):
+    for name in (APRIORI_FILE, POPULARITY_FILE):
+        shutil.copy(os.path.join(OBJECTS_PATH, name), path)
+    return RecommendationAgent(os.path.join(path, APRIORI_FILE), os.path.join(path, POPULARITY_FILE),
+                               client=object())
+
+
+def test_publish_versions_and_prune():
+    """Cada publicação cria uma pasta de versão e troca o ponteiro; só as versões mais recentes ficam em disco."""
+    with tempfile.TemporaryDirectory() as path:
+        for version in range(1, 5):
+            assert publish_snapshot(path, APRIORI, POPULARITY, keep=2) == version
+        manifest = read_snapshot_manifest(path)
+        assert manifest["version"] == 4 and manifest["directory"] == os.path.join(SNAPSHOTS_DIR, "v000004")
+        assert sorted(os.listdir(os.path.join(path, SNAPSHOTS_DIR))) == ["v000003", "v000004"]
+        snapshot = RecommendationSnapshot.load(path)
+        assert snapshot.version == 4 and snapshot.products == ["Croissant", "Latte"]
+        assert snapshot.apriori_index.recommend(["Latte"]) == ["Croissant"]
+
+
+def test_refresh_swaps_snapshot():
+    """Uma nova versão é ativada na verificação; quem guardou o snapshot anterior continua com os mesmos dados."""
+    with tempfile.TemporaryDirectory() as path:
+        agent = create_agent(path)
+        previous = agent.snapshot
+        assert previous.version is None
+        assert agent.refresh() is False  # nada publicado
+
+        publish_snapshot(path, APRIORI, POPULARITY, source="incremental")
+        assert agent.refresh() is True
+        assert agent.snapshot.version == 1 and agent.snapshot.source == "incremental"
+        assert agent.get_popular_recommendation() == ["Latte", "Croissant"]
+        # Snapshot da requisição em andamento: mesma versão de antes
+        assert agent.get_popular_recommendation(snapshot=previous) == previous.popularity_index.recommend()
+        assert len(previous.products) > len(agent.snapshot.products)
+        assert agent.snapshot_stats()["active"]["version"] == 1
+
+
+def test_invalid_snapshot_keeps_active_version():
+    """Um snapshot inválido (hash que não confere ou regras fora do ranking) não é ativado nem recarregado em loop."""
+    with tempfile.TemporaryDirectory() as path:
+        agent = create_agent(path)
+        publish_snapshot(path, APRIORI, POPULARITY)
+        assert agent.refresh() is True
+
+        publish_snapshot(path, APRIORI, POPULARITY)
+        with open(os.path.join(path, SNAPSHOTS_DIR, "v000002", POPULARITY_FILE), "a") as file:
+            file.write("Scone,Bakery,1\n")
+        assert agent.refresh() is False
+        assert agent.snapshot.version == 1
+        assert agent.refresh() is False  # mesmo ponteiro: não tenta de novo
+        stats = agent.snapshot_stats()
+        assert stats["failures"] == 1 and "hash" in stats["last_error"]
+
+        rules = dict(APRIORI, Mocha=[{"product": "Latte", "product_category": "Coffee", "confidence": 0.4}])
+        publish_snapshot(path, rules, POPULARITY)
+        assert agent.refresh() is False
+        assert agent.snapshot.version == 1 and "Mocha" in agent.snapshot_stats()["last_error"]
+
+        publish_snapshot(path, APRIORI, POPULARITY)
+        assert agent.refresh() is True
+        assert agent.snapshot.version == 4
+        with open(os.path.join(path, "snapshot.json")) as file:
+            assert json.load(file)["version"] == 4
+
+
+if __name__ == "__main__":
+    for test in [test_publish_versions_and_prune,
+                 test_refresh_swaps_snapshot,
+                 test_invalid_snapshot_keeps_active_version]:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Testes do treinamento offline das recomendações (recommendation_training.py).
+Usam os recibos do repositório e recibos sintéticos pequenos; não acessam a rede.
+
+Executar:
+    python -m pytest test_recommendation_training.py
+"""
+
+import csv
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from recommendation_training import (APRIORI_FILE, BASKET_COLUMNS, DEFAULT_OUTPUT_PATH, POPULARITY_FILE,
+                                     ProductCatalog, count_shard, get_first_seen, load_baskets,
+                                     load_partitioned_baskets, mine_frequent_itemsets, train)
+
+RECEIPT_COLUMNS = BASKET_COLUMNS + ["sales_outlet_id", "transaction_date", "product_id", "quantity"]
+CATALOG = [
+    (1, "Latte Rg", "Coffee"),
+    (2, "Latte Lg", "Coffee"),
+    (3, "Croissant", "Bakery"),
+    (4, "Ginger Scone", "Bakery"),
+    (5, "Chai Rg", "Tea"),  # fora do menu
+]
+
+
+def write_files(path, receipts):
+    with open(os.path.join(path, "product.csv"), "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["product_id", "product_category", "product"])
+        writer.writerows((product_id, category, name) for product_id, name, category in CATALOG)
+    with open(os.path.join(path, "products.json"), "w") as file:
+        for name in ["Latte", "Croissant", "Ginger Scone"]:
+            file.write(json.dumps({"name": name}) + "\n")
+    with open(os.path.join(path, "receipts.csv"), "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(RECEIPT_COLUMNS)
+        for transaction_id, customer_id, product_id in receipts:
+            writer.writerow([transaction_id, customer_id, 3, "2019-04-01", product_id, 1])
+
+
+def train_files(path, **kwargs):
+    return train(os.path.join(path, "receipts.csv"), os.path.join(path, "product.csv"),
+                 os.path.join(path, "products.json"), os.path.join(path, "output"), **kwargs)
+
+
+def test_rules_and_popularity():
+    """Tamanhos removidos, produtos fora do menu ignorados, cestas de um item descartadas; confiança = suporte(AB) / suporte(A)."""
+    receipts = [
+        (1, 10, 1), (1, 10, 3),  # Latte + Croissant
+        (2, 10, 2), (2, 10, 3),  # Latte (Lg) + Croissant
+        (3, 11, 1), (3, 11, 4),  # Latte + Ginger Scone
+        (4, 12, 3), (4, 12, 5),  # Croissant + Chai (fora do menu): cesta de um item, descartada
+        (5, 12, 1), (5, 12, 2),  # Latte Rg + Latte Lg: duas linhas, um item
+    ]
+    with tempfile.TemporaryDirectory() as path:
+        write_files(path, receipts)
+        stats = train_files(path, min_support=0.2, chunk_size=3)
+        assert stats["baskets"] == 4
+        with open(os.path.join(path, "output", POPULARITY_FILE)) as file:
+            assert list(csv.reader(file)) == [
+                ["product", "product_category", "number_of_transactions"],
+                ["Croissant", "Bakery", "2"],
+                ["Ginger Scone", "Bakery", "1"],
+                ["Latte", "Coffee", "5"],
+            ]
+        with open(os.path.join(path, "output", APRIORI_FILE)) as file:
+            rules = json.load(file)
+        # Latte em 4 cestas, Latte + Croissant em 2: confiança 0.5 (lift = 0.5 / 0.5 = 1)
+        assert rules["Latte"][0] == {"product": "Croissant", "product_category": "Bakery", "confidence": 0.5}
+        assert rules["Croissant"] == [{"product": "Latte", "product_category": "Coffee", "confidence": 1.0}]
+        assert not any(name.endswith(".tmp") for name in os.listdir(os.path.join(path, "output")))
+
+
+def test_process_pool_matches_single_process():
+    """A contagem em fatias com vários processos (com ou sem limite de fatias em andamento) dá o mesmo suporte."""
+    receipts = [(transaction_id, 0, product_id)
+                for transaction_id in range(300)
+                for product_id in (1, 3, 4)[:2 + transaction_id % 2]]
+    with tempfile.TemporaryDirectory() as path:
+        write_files(path, receipts)
+        catalog = ProductCatalog.from_file(os.path.join(path, "product.csv"), ["Latte", "Croissant", "Ginger Scone"])
+        baskets = load_baskets(os.path.join(path, "receipts.csv"), catalog, chunk_size=50)
+        single = mine_frequent_itemsets(baskets, min_support=0.1, shard_size=1000)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            sharded = mine_frequent_itemsets(baskets, min_support=0.1, executor=executor, shard_size=37)
+            # Janela de uma fatia em andamento por vez: mesmo resultado
+            windowed = mine_frequent_itemsets(baskets, min_support=0.1, executor=executor, shard_size=37,
+                                              max_pending=1)
+        assert sharded == single
+        assert windowed == single
+        assert single[(0, 1, 2)] == 0.5
+
+
+def test_partitions_match_in_memory_baskets():
+    """Cestas em partições no disco (inclusive partições vazias): mesmo suporte, mesmos totais e mesma ordem de
+    primeira aparição dos produtos que as cestas montadas em memória."""
+    receipts = [(transaction_id, transaction_id % 7, product_id)
+                for transaction_id in range(200)
+                for product_id in (3, 1, 4, 2, 5)[transaction_id % 3:2 + transaction_id % 4]]
+    with tempfile.TemporaryDirectory() as path:
+        write_files(path, receipts)
+        catalog = ProductCatalog.from_file(os.path.join(path, "product.csv"), ["Latte", "Croissant", "Ginger Scone"])
+        baskets = load_baskets(os.path.join(path, "receipts.csv"), catalog, chunk_size=50)
+        expected = mine_frequent_itemsets(baskets, min_support=0.01, shard_size=1000)
+        first_seen = get_first_seen(baskets, catalog)
+        for partitions in (1, 5, 500):
+            with tempfile.TemporaryDirectory() as folder:
+                partitioned = load_partitioned_baskets(os.path.join(path, "receipts.csv"), catalog, folder,
+                                                       partitions, chunk_size=50)
+                assert mine_frequent_itemsets(partitioned, min_support=0.01, shard_size=13) == expected
+            assert partitioned.n_baskets == baskets.n_baskets
+            assert partitioned.line_items == len(baskets.product_ids)
+            assert partitioned.product_counts.tolist() == np.bincount(
+                baskets.product_ids, minlength=len(catalog.product_items)).tolist()
+            assert np.argsort(partitioned.first_seen, kind="stable").tolist() == np.argsort(
+                first_seen, kind="stable").tolist()
+
+
+def test_count_shard_batches():
+    """Conjuntos de 3 itens contados em lotes de qualquer tamanho: mesmo resultado do lote calculado pela memória."""
+    indptr = np.array([0, 3, 5, 8, 10])
+    indices = np.array([0, 1, 2, 0, 2, 1, 2, 3, 0, 3])
+    columns = np.arange(4)
+    candidates = np.array([[0, 1, 2], [0, 2, 3], [1, 2, 3], [0, 1, 3]])
+    expected = count_shard(indptr, indices, columns, candidates)
+    assert expected.tolist() == [1, 0, 1, 0]
+    for batch_size in (1, 3):
+        assert count_shard(indptr, indices, columns, candidates, batch_size).tolist() == expected.tolist()
+
+
+def test_reproduces_notebook_artifacts():
+    """Com os recibos do repositório, os arquivos do notebook são reproduzidos (empates de confiança em ordem fixa)."""
+    with tempfile.TemporaryDirectory() as path:
+        train(output_path=path)
+        with open(os.path.join(path, POPULARITY_FILE)) as file, \
+                open(os.path.join(DEFAULT_OUTPUT_PATH, POPULARITY_FILE)) as expected:
+            assert file.read() == expected.read()
+        with open(os.path.join(path, APRIORI_FILE)) as file, \
+                open(os.path.join(DEFAULT_OUTPUT_PATH, APRIORI_FILE)) as expected:
+            rules, expected_rules = json.load(file), json.load(expected)
+    assert rules.keys() == expected_rules.keys()
+    for antecedent, antecedent_rules in expected_rules.items():
+        assert sorted(map(json.dumps, rules[antecedent])) == sorted(map(json.dumps, antecedent_rules))
+        assert [rule["confidence"] for rule in rules[antecedent]] == [
+            rule["confidence"] for rule in antecedent_rules]
+
+
+if __name__ == "__main__":
+    for test in [test_rules_and_popularity,
+                 test_process_pool_matches_single_process,
+                 test_partitions_match_in_memory_baskets,
+                 test_count_shard_batches,
+                 test_reproduces_notebook_artifacts]:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Testes da atualização incremental das recomendações (recommendation_updater.py).
+Usam os recibos do repositório; não acessam a rede.
+
+Executar:
+    python -m pytest test_recommendation_updater.py
+"""
+
+import csv
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from agents.recommendation_snapshot import read_snapshot_version
+from recommendation_training import (APRIORI_FILE, DEFAULT_RECEIPTS_PATH, POPULARITY_FILE, ProductCatalog,
+                                     load_menu, train)
+from recommendation_updater import RecommendationCounters, update_state
+
+
+def create_counters():
+    return RecommendationCounters(ProductCatalog.from_file(menu=load_menu()))
+
+
+def read_receipts():
+    with open(DEFAULT_RECEIPTS_PATH, "r", newline="") as file:
+        return list(csv.DictReader(file))
+
+
+def test_counters_match_full_training():
+    """Contadores montados a partir do histórico publicam os mesmos arquivos do treinamento (regras entre pares)."""
+    counters = create_counters()
+    counters.ingest_file(DEFAULT_RECEIPTS_PATH)
+    with tempfile.TemporaryDirectory() as path:
+        train(output_path=os.path.join(path, "training"), max_length=2)
+        assert counters.publish(os.path.join(path, "incremental")) == 1
+        with open(os.path.join(path, "training", POPULARITY_FILE)) as expected, \
+                open(os.path.join(path, "incremental", POPULARITY_FILE)) as file:
+            assert file.read() == expected.read()
+        with open(os.path.join(path, "training", APRIORI_FILE)) as expected, \
+                open(os.path.join(path, "incremental", APRIORI_FILE)) as file:
+            assert json.load(file) == json.load(expected)
+
+
+def test_incremental_batches_match_single_pass():
+    """Dois lotes (com o estado salvo e recarregado entre eles) dão os mesmos contadores e regras de um lote só."""
+    rows = read_receipts()
+    first_batch = [row for row in rows if int(row["transaction_id"]) % 2 == 0]
+    second_batch = [row for row in rows if int(row["transaction_id"]) % 2 == 1]
+    single = create_counters()
+    single.ingest_rows(rows)
+
+    counters = create_counters()
+    counters.ingest_rows(first_batch)
+    with tempfile.TemporaryDirectory() as path:
+        counters.save(path)
+        counters = RecommendationCounters.load(path)
+    stats = counters.ingest_rows(second_batch)
+    assert stats["baskets"] > 0 and stats["affected_antecedents"] > 0
+    assert counters.n_baskets == single.n_baskets
+    assert (counters.pair_keys == single.pair_keys).all()
+    assert (counters.pair_counts == single.pair_counts).all()
+    # Antecedentes afetados recalculados: mesmo resultado de recalcular tudo
+    assert counters.apriori_recommendations() == single.apriori_recommendations()
+
+
+def test_publish_bumps_snapshot_version():
+    """Cada publicação incrementa a versão do snapshot; um lote só com produtos fora do menu não afeta regras."""
+    counters = create_counters()
+    counters.ingest_rows(read_receipts()[:5000])
+    with tempfile.TemporaryDirectory() as path:
+        assert counters.publish(path) == 1
+        stats = counters.ingest_rows([
+            {"transaction_id": 1, "customer_id": 7, "transaction_date": "2019-05-01", "product_id": 1},
+            {"transaction_id": 1, "customer_id": 7, "transaction_date": "2019-05-01", "product_id": 2},
+        ])
+        assert stats == {"baskets": 0, "line_items": 0, "affected_antecedents": 0}
+        assert counters.publish(path) == 2
+        assert read_snapshot_version(path) == 2
+
+
+# Lotes de um processo: cada um é somado ao estado compartilhado (carregar -> somar -> salvar -> publicar)
+def ingest_batches(path, batches):
+    return [update_state(lambda counters: counters.ingest_rows(batch), os.path.join(path, "state"),
+                         os.path.join(path, "output"))[2] for batch in batches]
+
+
+def test_concurrent_updaters_share_state():
+    """Dois processos atualizando o mesmo estado: nenhum lote se perde e cada publicação recebe uma versão própria."""
+    rows = read_receipts()
+    single = create_counters()
+    single.ingest_rows(rows)
+    batches = [[row for row in rows if int(row["transaction_id"]) % 32 == index] for index in range(32)]
+    with tempfile.TemporaryDirectory() as path:
+        create_counters().save(os.path.join(path, "state"))
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            versions = list(executor.map(ingest_batches, [path, path], [batches[0::2], batches[1::2]]))
+        assert sorted(versions[0] + versions[1]) == list(range(1, 33))
+        assert read_snapshot_version(os.path.join(path, "output")) == 32
+        counters = RecommendationCounters.load(os.path.join(path, "state"))
+    assert counters.n_baskets == single.n_baskets
+    assert (counters.pair_counts == single.pair_counts).all()
+    assert (counters.product_counts == single.product_counts).all()
+
+
+if __name__ == "__main__":
+    for test in [test_counters_match_full_training,
+                 test_incremental_batches_match_single_pass,
+                 test_publish_bumps_snapshot_version,
+                 test_concurrent_updaters_share_state]:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Testes do cache semântico de roteamento (agents/semantic_cache.py). Usam vetores fixos no lugar dos embeddings
+e não acessam a rede.
+
+Executar:
+    python -m pytest test_semantic_cache.py
+"""
+
+import numpy as np
+
+from agents.semantic_cache import SemanticRoutingCache
+
+
+def vector(*values):
+    embedding = np.asarray(values, dtype=np.float32)
+    return embedding / np.linalg.norm(embedding)
+
+
+def test_lookup_is_scoped_by_previous_agent():
+    """A mesma mensagem só reaproveita a decisão tomada depois do mesmo agente."""
+    cache = SemanticRoutingCache(embedding_client=None, threshold=0.9)
+    yes = vector(1, 0, 0)
+    cache.add(yes, "recommendation_agent", context="recommendation_agent")
+
+    assert cache.lookup(yes, "recommendation_agent") == ("recommendation_agent", 1.0)
+    assert cache.lookup(yes, "details_agent") is None
+    assert cache.lookup(yes) is None  # primeira mensagem da conversa
+
+    cache.add(yes, "details_agent", context="details_agent")
+    assert cache.lookup(yes, "details_agent")[0] == "details_agent"
+    assert cache.lookup(yes, "recommendation_agent")[0] == "recommendation_agent"
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 2
+
+
+def test_eviction_and_clear():
+    """Com a matriz cheia, a linha menos usada é substituída; clear esquece linhas e contextos."""
+    cache = SemanticRoutingCache(embedding_client=None, threshold=0.9, capacity=2)
+    cache.add(vector(1, 0, 0), "a")
+    cache.add(vector(0, 1, 0), "b")
+    assert cache.lookup(vector(1, 0, 0))[0] == "a"
+    cache.add(vector(0, 0, 1), "c")  # substitui "b"
+
+    assert cache.lookup(vector(0, 1, 0)) is None
+    assert cache.lookup(vector(0, 0, 1))[0] == "c"
+    assert cache.stats()["evictions"] == 1
+
+    cache.clear()
+    assert cache.lookup(vector(1, 0, 0)) is None and cache.stats()["size"] == 0
+
+
+if __name__ == "__main__":
+    for test in [test_lookup_is_scoped_by_previous_agent,
+                 test_eviction_and_clear]:
+        test()
+        print(f"✅ {test.__name__}")
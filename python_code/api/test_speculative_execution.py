@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Testes da execução especulativa do AgentController (SPECULATIVE_EXECUTION): o roteamento usa o Guard Agent e o
+Classification Agent contra o LLM falso (fake_llm.py); os agentes de resposta são falsos para observar o cancelamento.
+Não acessam a rede.
+
+Executar:
+    python -m pytest test_speculative_execution.py
+"""
+
+import asyncio
+import os
+
+# O cliente AsyncOpenAI exige uma chave, mesmo que o LLM seja falso
+os.environ.setdefault("OPENROUTER_API_KEY", "fake-key")
+
+from agents import GuardAgent, ClassificationAgent  # noqa: E402
+from agent_controller import AgentController  # noqa: E402
+from fake_llm import FakeLLM  # noqa: E402
+
+AGENT_NAMES = ["details_agent", "order_taking_agent", "recommendation_agent"]
+
+
+# Agente de resposta falso: responde depois de `latency` segundos e registra chamadas concluídas e canceladas
+class FakeAgent():
+    def __init__(self, name, latency):
+        self.name = name
+        self.latency = latency
+        self.calls = 0
+        self.completed = 0
+        self.cancelled = 0
+
+    async def get_response(self, messages):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        self.completed += 1
+        return {"role": "assistant", "content": f"Resposta do {self.name}", "memory": {"agent": self.name}}
+
+
+# AgentController com roteamento paralelo no LLM falso e execução especulativa ativada
+# (como em benchmark_async.py, o DetailsAgent real não é instanciado)
+def build_controller(fake_llm, latencies):
+    controller = AgentController.__new__(AgentController)
+    controller.routing_mode = "separate"
+    controller.parallel_routing = True
+    controller.speculative_execution = True
+    controller.semantic_cache = None
+    controller.speculation_stats = {"speculations": 0, "hits": 0, "misses": 0,
+                                    "guard_rejections": 0, "wasted_calls": 0}
+    controller.llm_client = fake_llm.client()
+    controller.guard_agent = GuardAgent(use_cache=False, client=controller.llm_client)
+    controller.classification_agent = ClassificationAgent(use_cache=False, client=controller.llm_client)
+    controller.agent_dict = {name: FakeAgent(name, latencies.get(name, 0.0)) for name in AGENT_NAMES}
+    return controller
+
+
+# Conversa em que a última resposta foi do Order Taking Agent (previsão: order_taking_agent)
+def build_input(message):
+    return {"input": {"messages": [
+        {"role": "user", "content": "Oi"},
+        {"role": "assistant", "content": "O que deseja pedir?",
+         "memory": {"agent": "order_taking_agent", "order": []}},
+        {"role": "user", "content": message},
+    ]}}
+
+
+def test_prediction_hit_commits_speculative_result():
+    """Previsão confirmada pelo classificador: o resultado especulativo é devolvido, sem uma 2ª execução."""
+    controller = build_controller(FakeLLM(latency=0.05), {"order_taking_agent": 0.01})
+
+    response = asyncio.run(controller.get_response(build_input("Eu gostaria de um latte")))
+
+    agent = controller.agent_dict["order_taking_agent"]
+    assert response["memory"]["agent"] == "order_taking_agent"
+    assert agent.calls == 1 and agent.completed == 1
+    stats = controller.speculation_stats
+    assert stats["speculations"] == 1 and stats["hits"] == 1
+    assert stats["misses"] == 0 and stats["wasted_calls"] == 0
+
+
+def test_prediction_miss_cancels_speculative_task():
+    """Previsão errada: a execução especulativa é cancelada e o agente escolhido responde."""
+    controller = build_controller(FakeLLM(latency=0.05), {"order_taking_agent": 5.0})
+
+    response = asyncio.run(controller.get_response(build_input("Onde fica a cafeteria?")))
+
+    assert response["memory"]["agent"] == "details_agent"
+    predicted = controller.agent_dict["order_taking_agent"]
+    assert predicted.cancelled == 1 and predicted.completed == 0
+    assert controller.agent_dict["details_agent"].completed == 1
+    stats = controller.speculation_stats
+    assert stats["speculations"] == 1 and stats["misses"] == 1
+    assert stats["wasted_calls"] == 1 and stats["hits"] == 0
+
+
+def test_guard_rejection_cancels_speculative_task():
+    """Mensagem bloqueada pelo Guard Agent: a execução especulativa é cancelada e nenhum agente responde."""
+    controller = build_controller(FakeLLM(latency=0.05), {"order_taking_agent": 5.0})
+
+    response = asyncio.run(controller.get_response(build_input("Quem ganhou o jogo de futebol?")))
+
+    assert response is None
+    assert controller.agent_dict["order_taking_agent"].cancelled == 1
+    assert all(agent.completed == 0 for agent in controller.agent_dict.values())
+    stats = controller.speculation_stats
+    assert stats["guard_rejections"] == 1 and stats["wasted_calls"] == 1
+    assert stats["hits"] == 0 and stats["misses"] == 0
+
+
+def test_no_prediction_without_history():
+    """Sem resposta anterior do assistente não há previsão: nada é executado de forma especulativa."""
+    controller = build_controller(FakeLLM(latency=0), {})
+
+    response = asyncio.run(controller.get_response(
+        {"input": {"messages": [{"role": "user", "content": "Eu gostaria de um latte"}]}}))
+
+    assert response["memory"]["agent"] == "order_taking_agent"
+    assert controller.speculation_stats["speculations"] == 0
+
+
+if __name__ == "__main__":
+    for test in [test_prediction_hit_commits_speculative_result,
+                 test_prediction_miss_cancels_speculative_task,
+                 test_guard_rejection_cancels_speculative_task,
+                 test_no_prediction_without_history]:
+        test()
+        print(f"✅ {test.__name__}")
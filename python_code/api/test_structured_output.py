@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Testes do modo de saída estruturada (STRUCTURED_OUTPUT) contra um LLM falso local
+compatível com a API da OpenAI (fake_llm.py). Não acessam a rede.
+
+Executar:
+    python -m pytest test_structured_output.py
+"""
+
+import asyncio
+import json
+import os
+
+import httpx
+
+# O cliente AsyncOpenAI exige uma chave, mesmo que o LLM seja falso
+os.environ.setdefault("OPENROUTER_API_KEY", "fake-key")
+
+from agents import GuardAgent, ClassificationAgent, OrderTakingAgent  # noqa: E402
+from agents.utils import structured_output_stats, structured_output_unsupported  # noqa: E402
+from fake_llm import FakeLLM, default_responder  # noqa: E402
+
+
+def create_agent(agent_class, fake_llm, *args):
+    """Cria um agente no modo de saída estruturada usando o LLM falso."""
+    agent = agent_class(*args)
+    agent.client = fake_llm.client()
+    agent.structured_output = True
+    return agent
+
+
+def test_guard_agent_sends_response_format():
+    """O Guard Agent envia o JSON schema com enum na decisão e não faz a verificação extra do JSON."""
+    structured_output_unsupported.clear()
+    fake_llm = FakeLLM(latency=0)
+    agent = create_agent(GuardAgent, fake_llm)
+
+    response = asyncio.run(agent.get_response(
+        [{"role": "user", "content": "Eu gostaria de um latte"}]))
+
+    assert response["memory"]["guard_decision"] == "allowed"
+    assert fake_llm.calls == 1  # sem chamada de reparo de JSON
+    json_schema = fake_llm.requests[0]["response_format"]["json_schema"]
+    assert json_schema["name"] == "guard_agent"
+    assert json_schema["schema"]["properties"]["decision"]["enum"] == [
+        "allowed", "not allowed"]
+
+
+def test_classification_agent_structured_decision():
+    """O Classification Agent interpreta a decisão diretamente da saída estruturada."""
+    structured_output_unsupported.clear()
+    fake_llm = FakeLLM(latency=0)
+    agent = create_agent(ClassificationAgent, fake_llm)
+
+    response = asyncio.run(agent.get_response(
+        [{"role": "user", "content": "O que você me recomenda?"}]))
+
+    assert response["memory"]["classification_decision"] == "recommendation_agent"
+    assert fake_llm.calls == 1
+
+
+def test_order_taking_agent_structured_order():
+    """O Order Taking Agent recebe o pedido como lista pela saída estruturada."""
+    structured_output_unsupported.clear()
+    fake_llm = FakeLLM(latency=0)
+    agent = create_agent(OrderTakingAgent, fake_llm, None)
+
+    response = asyncio.run(agent.get_response(
+        [{"role": "user", "content": "Eu gostaria de um latte"}]))
+
+    assert response["memory"]["order"] == [
+        {"item": "Latte", "quantity": 1, "price": 4.75}]
+    assert response["content"] == "Anotei um Latte. Deseja mais alguma coisa?"
+    assert fake_llm.requests[0]["response_format"]["json_schema"]["name"] == "order_taking_agent"
+
+
+def test_fallback_when_backend_rejects_response_format():
+    """Se o backend rejeitar o response_format, o agente usa o caminho normal e não tenta de novo."""
+    structured_output_unsupported.clear()
+    fake_llm = FakeLLM(latency=0, supports_response_format=False)
+    agent = create_agent(GuardAgent, fake_llm)
+    messages = [{"role": "user", "content": "Qual é o horário de funcionamento?"}]
+
+    response = asyncio.run(agent.get_response(messages))
+    assert response["memory"]["guard_decision"] == "allowed"
+    # 1ª chamada com response_format (erro 400) + 1 chamada normal
+    assert fake_llm.calls == 2
+    assert "response_format" not in fake_llm.requests[1]
+
+    # O backend fica marcado como sem suporte: nenhuma nova tentativa com response_format
+    asyncio.run(agent.get_response(
+        [{"role": "user", "content": "Onde fica a cafeteria?"}]))
+    assert fake_llm.calls == 3
+    assert "response_format" not in fake_llm.requests[2]
+
+
+def test_other_request_errors_do_not_disable_structured_output():
+    """Um erro 400 que não fala de response_format usa o caminho normal só naquela chamada."""
+    structured_output_unsupported.clear()
+
+    class FlakyLLM(FakeLLM):
+        async def handle(self, request):
+            if self.calls == 0:
+                self.calls += 1
+                self.requests.append(json.loads(request.content))
+                return httpx.Response(400, json={"error": {
+                    "message": "maximum context length exceeded", "type": "invalid_request_error"}})
+            return await super().handle(request)
+
+    fake_llm = FlakyLLM(latency=0)
+    agent = create_agent(GuardAgent, fake_llm)
+    messages = [{"role": "user", "content": "Eu gostaria de um latte"}]
+
+    assert asyncio.run(agent.get_response(messages))["memory"]["guard_decision"] == "allowed"
+    assert "response_format" not in fake_llm.requests[1]
+    assert not structured_output_unsupported
+    asyncio.run(agent.get_response(messages))
+    assert "response_format" in fake_llm.requests[2]
+
+
+def test_response_outside_schema_falls_back():
+    """Uma resposta sem chave obrigatória ou com valor fora do enum não conta como saída estruturada."""
+    structured_output_unsupported.clear()
+    outputs = iter([
+        {"chain of thought": "...", "message": ""},  # sem "decision"
+        {"chain of thought": "...", "decision": "menu_agent", "message": ""},  # fora do enum
+    ])
+
+    # Backend que aceita o response_format mas o ignora: saídas inválidas só nas chamadas estruturadas
+    def responder(messages):
+        if "response_format" in fake_llm.requests[-1]:
+            return json.dumps(next(outputs))
+        return default_responder(messages)
+
+    fake_llm = FakeLLM(latency=0, responder=responder)
+    agent = create_agent(ClassificationAgent, fake_llm)
+    messages = [{"role": "user", "content": "O que você me recomenda?"}]
+    for _ in range(2):
+        fallback = structured_output_stats["fallback"]
+        response = asyncio.run(agent.get_response(messages))
+        assert response["memory"]["classification_decision"] == "recommendation_agent"
+        assert structured_output_stats["fallback"] == fallback + 1
+    assert not structured_output_unsupported
+
+
+if __name__ == "__main__":
+    for test in [test_guard_agent_sends_response_format,
+                 test_classification_agent_structured_decision,
+                 test_order_taking_agent_structured_order,
+                 test_fallback_when_backend_rejects_response_format,
+                 test_other_request_errors_do_not_disable_structured_output,
+                 test_response_outside_schema_falls_back]:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Testes do armazenamento vetorial local (agents/vector_store.py), da construção incremental do índice
+(vector_index_builder.py) e do cache de resultados da busca do Details Agent (agents/retrieval_cache.py).
+Não acessam a rede: usam embeddings sintéticos e um índice do Pinecone falso.
+
+Executar:
+    python -m pytest test_vector_store.py
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+
+from agents.details_agent import DetailsAgent
+from agents.vector_store import (LocalVectorStore, PineconeIndexVersion, PineconeVectorStore, create_vector_store,
+                                 normalize_embeddings, read_index_version, read_pinecone_index_version)
+from vector_index_builder import (DEFAULT_ABOUT_US_PATH, DEFAULT_MENU_PATH, DEFAULT_PRODUCTS_PATH, PINECONE_NAMESPACE,
+                                  iter_documents, sync_local_index, sync_pinecone_index)
+
+
+class FakeEmbeddingClient():
+    """Cliente de embeddings falso: vetor determinístico a partir das palavras do texto."""
+
+    def __init__(self, dimension=32):
+        self.dimension = dimension
+        self.encoded = 0  # número de textos processados
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.encoded += len(texts)
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                embeddings[row, sum(map(ord, word)) % self.dimension] += 1.0
+        return embeddings
+
+
+def create_store(path, size=50, dimension=16, seed=0):
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((size, dimension)).astype(np.float32)
+    store = LocalVectorStore.save(
+        path,
+        ids=[f"doc-{i}" for i in range(size)],
+        embeddings=embeddings,
+        metadata=[{"text": f"texto {i}"} for i in range(size)],
+    )
+    return store, embeddings
+
+
+def test_query_matches_brute_force():
+    """O top-k (argpartition) é igual à ordenação completa por similaridade de cosseno."""
+    with tempfile.TemporaryDirectory() as path:
+        store, embeddings = create_store(path)
+        normalized = embeddings / \
+            np.linalg.norm(embeddings, axis=1, keepdims=True)
+        query = np.random.default_rng(1).standard_normal(16)
+
+        result = store.query(query * 3.0, top_k=5)  # a escala da consulta não importa
+
+        expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+        assert [match["id"] for match in result["matches"]] == [
+            f"doc-{i}" for i in expected]
+        scores = [match["score"] for match in result["matches"]]
+        assert scores == sorted(scores, reverse=True)
+        assert result["matches"][0]["metadata"] == {
+            "text": f"texto {expected[0]}"}
+        del store
+
+
+def test_saved_store_is_memory_mapped():
+    """O armazenamento salvo é recarregado com mmap e encontra o próprio vetor com similaridade 1."""
+    with tempfile.TemporaryDirectory() as path:
+        _, embeddings = create_store(path)
+        store = LocalVectorStore(path)
+
+        assert isinstance(store.embeddings, np.memmap)
+        assert len(store) == 50
+        result = store.query(embeddings[7], top_k=1)
+        assert result["matches"][0]["id"] == "doc-7"
+        assert abs(result["matches"][0]["score"] - 1.0) < 1e-5
+        del store
+
+
+def test_top_k_larger_than_store():
+    """Com top_k maior que o índice, todos os documentos são retornados."""
+    with tempfile.TemporaryDirectory() as path:
+        store, _ = create_store(path, size=3)
+        assert len(store.query(np.ones(16), top_k=10)["matches"]) == 3
+        del store
+
+
+def test_build_local_index_from_products():
+    """O índice local é construído a partir dos mesmos textos do notebook (produtos, About Us e menu)."""
+    documents = list(iter_documents())
+    ids = [document_id for document_id, _ in documents]
+    assert "Cappuccino " in ids
+    assert len(documents) == len(set(ids))
+    assert all(text.isascii() for _, text in documents)
+
+    with tempfile.TemporaryDirectory() as path:
+        embedding_client = FakeEmbeddingClient()
+        stats = sync_local_index(embedding_client, path, batch_size=4)
+        assert stats == {"total": len(documents), "embedded": len(documents),
+                         "reused": 0, "deleted": 0}
+        store = LocalVectorStore(path)
+        assert len(store) == len(documents)
+
+        query = embedding_client.encode([documents[0][1]])[0]
+        assert store.query(query, top_k=1)["matches"][0]["id"] == documents[0][0]
+        del store
+
+
+def copy_sources(folder):
+    """Copia os arquivos de origem para `folder` (para serem alterados no teste)."""
+    sources = {}
+    for name, source in [("products_path", DEFAULT_PRODUCTS_PATH), ("about_us_path", DEFAULT_ABOUT_US_PATH),
+                         ("menu_path", DEFAULT_MENU_PATH)]:
+        sources[name] = os.path.join(folder, os.path.basename(source))
+        shutil.copy(source, sources[name])
+    return sources
+
+
+def edit_products(products_path):
+    """Altera o preço do primeiro produto, remove o segundo e adiciona um produto novo."""
+    with open(products_path, "r", encoding="utf-8") as file:
+        products = [json.loads(line) for line in file if line.strip()]
+    products[0]["price"] = 9.99
+    new_product = dict(products[1], name="Pumpkin Latte")
+    products = [products[0]] + products[2:] + [new_product]
+    with open(products_path, "w", encoding="utf-8") as file:
+        file.write("\n".join(json.dumps(product) for product in products))
+    return products
+
+
+def test_incremental_local_update():
+    """Só os documentos novos ou alterados são recalculados; os removidos saem do índice."""
+    with tempfile.TemporaryDirectory() as folder:
+        sources = copy_sources(folder)
+        path = os.path.join(folder, "index")
+        embedding_client = FakeEmbeddingClient()
+        total = sync_local_index(embedding_client, path, batch_size=4, **sources)["total"]
+
+        # Sem alterações: nada é recalculado
+        embedding_client.encoded = 0
+        stats = sync_local_index(embedding_client, path, batch_size=4, **sources)
+        assert stats == {"total": total, "embedded": 0, "reused": total, "deleted": 0}
+        assert embedding_client.encoded == 0
+
+        products = edit_products(sources["products_path"])
+        stats = sync_local_index(embedding_client, path, batch_size=4, workers=3, **sources)
+        assert stats == {"total": total, "embedded": 2, "reused": total - 2, "deleted": 1}
+        assert embedding_client.encoded == 2
+
+        # O índice atualizado é igual a um índice construído do zero
+        rebuilt_path = os.path.join(folder, "rebuilt")
+        sync_local_index(FakeEmbeddingClient(), rebuilt_path, **sources)
+        store, rebuilt = LocalVectorStore(path), LocalVectorStore(rebuilt_path)
+        assert store.ids == rebuilt.ids
+        assert store.hashes == rebuilt.hashes
+        assert np.allclose(store.embeddings, rebuilt.embeddings)
+        assert "Pumpkin Latte " in store.ids
+        assert products[0]["name"] + " " in store.ids
+        del store, rebuilt
+
+
+class FakePineconeIndex():
+    """Índice do Pinecone falso: guarda os vetores de cada namespace em um dicionário."""
+
+    def __init__(self, dimension=32):
+        self.dimension = dimension
+        self.namespaces = {}
+        self.upserted = 0
+
+    # Vetores do namespace dos documentos
+    @property
+    def vectors(self):
+        return self.namespaces.setdefault(PINECONE_NAMESPACE, {})
+
+    def list(self, namespace):
+        yield list(self.namespaces.get(namespace, {}))
+
+    def upsert(self, vectors, namespace):
+        self.upserted += len(vectors)
+        self.namespaces.setdefault(namespace, {}).update({vector["id"]: vector for vector in vectors})
+
+    def delete(self, ids, namespace):
+        for vector_id in ids:
+            self.namespaces.get(namespace, {}).pop(vector_id, None)
+
+    def fetch(self, ids, namespace):
+        vectors = self.namespaces.get(namespace, {})
+        return SimpleNamespace(vectors={vector_id: SimpleNamespace(metadata=vectors[vector_id].get("metadata"))
+                                        for vector_id in ids if vector_id in vectors})
+
+    def describe_index_stats(self):
+        return {"dimension": self.dimension}
+
+    def query(self, namespace, vector, top_k, include_values, include_metadata):
+        vectors = list(self.namespaces.get(namespace, {}).values())
+        scores = normalize_embeddings([item["values"] for item in vectors]) @ normalize_embeddings(vector)
+        return {"matches": [{"id": vectors[row]["id"], "score": float(scores[row]), "metadata": vectors[row]["metadata"]}
+                            for row in np.argsort(-scores)[:top_k]]}
+
+
+# PineconeVectorStore sobre o índice falso (sem criar o cliente do Pinecone)
+def create_fake_pinecone_store(index, version_refresh_interval=30.0):
+    store = PineconeVectorStore.__new__(PineconeVectorStore)
+    store.index = index
+    store.namespace = PINECONE_NAMESPACE
+    store.index_version = PineconeIndexVersion(index, PINECONE_NAMESPACE, version_refresh_interval)
+    return store
+
+
+def test_incremental_pinecone_update():
+    """Com o manifesto de hashes, apenas a diferença é enviada ao Pinecone."""
+    with tempfile.TemporaryDirectory() as folder:
+        sources = copy_sources(folder)
+        manifest_path = os.path.join(folder, "manifest.json")
+        index = FakePineconeIndex()
+        index.vectors["documento antigo"] = {"id": "documento antigo"}  # criado pelo notebook
+
+        stats = sync_pinecone_index(FakeEmbeddingClient(), index, manifest_path,
+                                    batch_size=4, **sources)
+        total = stats["total"]
+        assert stats == {"total": total, "embedded": total, "reused": 0, "deleted": 1}
+        assert len(index.vectors) == total
+
+        edit_products(sources["products_path"])
+        index.upserted = 0
+        stats = sync_pinecone_index(FakeEmbeddingClient(), index, manifest_path,
+                                    batch_size=4, **sources)
+        assert stats == {"total": total, "embedded": 2, "reused": total - 2, "deleted": 1}
+        assert index.upserted == 3  # 2 documentos + registro da versão do índice
+        assert len(index.vectors) == total
+
+
+def test_index_version_bumped_only_on_changes():
+    """A versão do índice muda quando o conteúdo muda (local e Pinecone), e só nesse caso."""
+    with tempfile.TemporaryDirectory() as folder:
+        sources = copy_sources(folder)
+        path = os.path.join(folder, "index")
+        manifest_path = os.path.join(folder, "pinecone", "manifest.json")
+        index = FakePineconeIndex()
+
+        for _ in range(2):
+            sync_local_index(FakeEmbeddingClient(), path, **sources)
+            sync_pinecone_index(FakeEmbeddingClient(), index, manifest_path, **sources)
+            assert read_index_version(path) == 1
+            assert read_pinecone_index_version(index, PINECONE_NAMESPACE) == 1
+
+        # O registro de versão fica fora do namespace dos documentos
+        assert "index_version" not in index.vectors
+
+        edit_products(sources["products_path"])
+        sync_local_index(FakeEmbeddingClient(), path, **sources)
+        sync_pinecone_index(FakeEmbeddingClient(), index, manifest_path, **sources)
+        assert read_index_version(path) == 2
+        assert read_pinecone_index_version(index, PINECONE_NAMESPACE) == 2
+
+
+def test_retrieval_cache_invalidated_by_new_version():
+    """Buscas repetidas vêm do cache; depois de atualizar o índice, o contexto novo é usado."""
+    with tempfile.TemporaryDirectory() as folder:
+        sources = copy_sources(folder)
+        path = os.path.join(folder, "index")
+        embedding_client = FakeEmbeddingClient()
+        sync_local_index(embedding_client, path, **sources)
+        first_id, first_text = next(iter_documents(**sources))
+        query = embedding_client.encode([first_text])[0]
+
+        environ = dict(os.environ)
+        os.environ.update({"VECTOR_STORE_BACKEND": "local", "VECTOR_STORE_PATH": path,
+                           "RETRIEVAL_CACHE_ENABLED": "true"})
+        try:
+            details_agent = DetailsAgent(client=object())
+            result = details_agent.get_closest_result(query)
+            assert result["matches"][0]["id"] == first_id
+            assert details_agent.get_closest_result(query) is result
+            assert details_agent.retrieval_cache.stats()["hits"] == 1
+
+            # Menu alterado: o índice ganha uma nova versão e o armazenamento é recarregado
+            edit_products(sources["products_path"])
+            sync_local_index(embedding_client, path, **sources)
+            result = details_agent.get_closest_result(query)
+            assert "Price: 9.99" in result["matches"][0]["metadata"]["text"]
+            assert details_agent.retrieval_cache.stats()["hits"] == 1
+            assert details_agent.vector_store.version == read_index_version(path)
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+
+
+def test_pinecone_version_is_shared_and_refreshed():
+    """Com o Pinecone, a versão vem do registro no índice: a atualização feita por outra máquina invalida o cache
+    depois do intervalo de releitura; sem registro (ou com falha na leitura), o cache não é usado."""
+    with tempfile.TemporaryDirectory() as folder:
+        sources = copy_sources(folder)
+        manifest_path = os.path.join(folder, "manifest.json")
+        index = FakePineconeIndex()
+        embedding_client = FakeEmbeddingClient()
+        first_id, first_text = next(iter_documents(**sources))
+        query = embedding_client.encode([first_text])[0]
+
+        environ = dict(os.environ)
+        os.environ.update({"VECTOR_STORE_BACKEND": "pinecone", "RETRIEVAL_CACHE_ENABLED": "true"})
+        try:
+            details_agent = DetailsAgent(client=object())
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+        assert details_agent.retrieval_cache is not None
+        details_agent.vector_store = create_fake_pinecone_store(index, version_refresh_interval=0)
+
+        # Índice sem registro de versão (criado pelo notebook): sem cache
+        index.vectors["documento antigo"] = {"id": "documento antigo", "values": query.tolist(),
+                                              "metadata": {"text": "antigo"}}
+        details_agent.get_closest_result(query)
+        assert details_agent.retrieval_cache.stats()["size"] == 0
+
+        sync_pinecone_index(embedding_client, index, manifest_path, **sources)
+        result = details_agent.get_closest_result(query)
+        assert result["matches"][0]["id"] == first_id
+        assert details_agent.get_closest_result(query) is result
+
+        # Outra máquina atualiza o índice: a nova versão é lida na próxima consulta (intervalo 0)
+        edit_products(sources["products_path"])
+        sync_pinecone_index(embedding_client, index, manifest_path, **sources)
+        assert details_agent.vector_store.version == 2
+        assert details_agent.get_closest_result(query) is not result
+
+    # Dentro do intervalo, a versão anterior é usada sem consultar o Pinecone; falhas na leitura: versão desconhecida
+    index = FakePineconeIndex()
+    store = create_fake_pinecone_store(index, version_refresh_interval=60)
+    assert store.version is None
+    index.upsert([{"id": "index_version", "values": [1.0], "metadata": {"version": 5}}],
+                 namespace=PINECONE_NAMESPACE + "__meta")
+    assert store.version is None
+    store.index_version.next_refresh = 0.0
+    assert store.version == 5
+
+    def fail(**kwargs):
+        raise ConnectionError("Pinecone indisponível")
+    index.fetch = fail
+    store.index_version.next_refresh = 0.0
+    assert store.version is None
+
+
+def test_invalid_backend():
+    """Um backend desconhecido gera ValueError."""
+    try:
+        create_vector_store("faiss")
+    except ValueError:
+        return
+    raise AssertionError("ValueError esperado")
+
+
+if __name__ == "__main__":
+    for test in [test_query_matches_brute_force,
+                 test_saved_store_is_memory_mapped,
+                 test_top_k_larger_than_store,
+                 test_build_local_index_from_products,
+                 test_incremental_local_update,
+                 test_incremental_pinecone_update,
+                 test_index_version_bumped_only_on_changes,
+                 test_retrieval_cache_invalidated_by_new_version,
+                 test_pinecone_version_is_shared_and_refreshed,
+                 test_invalid_backend]:
+        test()
+        print(f"✅ {test.__name__}")
@@ -4,6 +4,7 @@ Script para testar a API usando o arquivo test_input.json
 (similar ao comportamento do Runpod)
 """
 
+import asyncio
 import requests
 import json
 import sys
@@ -126,7 +127,7 @@ def test_direct_agent_controller():
 
         # Chamar método get_response diretamente
         print("🚀 Executando get_response...")
-        response = agent_controller.get_response(test_data)
+        response = asyncio.run(agent_controller.get_response(test_data))
 
         print("📥 Resposta do AgentController:")
         if response:
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Construção e atualização incremental do índice vetorial do Details Agent (substitui o notebook
+build_vector_database.ipynb). Lê os mesmos textos do notebook (produtos, seção "About Us" e itens do menu),
+calcula um hash do conteúdo de cada documento e só recalcula os embeddings dos documentos novos ou alterados.
+Depois, envia apenas a diferença ao destino: documentos novos/alterados são gravados (upsert) e
+documentos que deixaram de existir são removidos.
+
+Sempre que o conteúdo muda, a versão do índice é incrementada (local: index_version.json, em --output; Pinecone:
+registro no namespace <namespace>__meta do próprio índice): a API descarta os resultados de busca em cache e
+recarrega o armazenamento local.
+
+Destinos:
+- local: armazenamento local (VECTOR_STORE_BACKEND=local), em --output
+- pinecone: índice PINECONE_INDEX_NAME (namespace ns1); os hashes enviados ficam em um manifesto local
+
+Os documentos são lidos em streaming e os embeddings são calculados em lotes (--batch-size), com até
+--workers lotes em paralelo; a memória usada não cresce com o tamanho do catálogo (exceto ids e hashes).
+
+Uso:
+    python vector_index_builder.py
+    python vector_index_builder.py --target all --batch-size 64 --workers 4
+    python vector_index_builder.py --target pinecone --full   # recalcular todos os embeddings
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import dotenv
+import numpy as np
+
+from agents.context_assembler import chunk_text, create_token_counter
+from agents.embedding_model import create_embedding_model
+from agents.product_matcher import format_product_document, to_ascii
+from agents.vector_store import (DEFAULT_LOCAL_PATH, EMBEDDINGS_FILE, METADATA_FILE,
+                                 LocalVectorStore, bump_index_version, bump_pinecone_index_version,
+                                 normalize_embeddings, read_index_version, read_pinecone_index_version)
+
+dotenv.load_dotenv()
+
+# Arquivos de origem (pasta products/ na raiz do repositório)
+PRODUCTS_FOLDER = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "..", "products")
+DEFAULT_PRODUCTS_PATH = os.path.join(PRODUCTS_FOLDER, "products.json")
+DEFAULT_ABOUT_US_PATH = os.path.join(
+    PRODUCTS_FOLDER, "Merry's_way_about_us.txt")
+DEFAULT_MENU_PATH = os.path.join(PRODUCTS_FOLDER, "menu_items_text.txt")
+
+# Tamanho máximo (tokens) dos trechos dos textos longos ("About Us" e menu); 0: um documento por texto (formato do notebook)
+DEFAULT_CHUNK_TOKENS = int(os.getenv("INDEX_CHUNK_TOKENS", "128"))
+
+# Namespace do Pinecone usado pelo Details Agent
+PINECONE_NAMESPACE = "ns1"
+# Número máximo de ids por requisição de remoção ao Pinecone
+PINECONE_DELETE_BATCH_SIZE = 1000
+
+
+# Gerador com os documentos do índice: (id, texto), lidos em streaming
+# O id é o título do texto (parte antes do primeiro ":"), como no notebook. Ids repetidos: mantém o primeiro
+# Com `chunk_tokens`, a seção "About Us" e o menu são divididos em trechos ("<título> (part N):\n<trecho>"),
+# contados com `token_counter` (padrão: create_token_counter())
+def iter_documents(products_path=DEFAULT_PRODUCTS_PATH, about_us_path=DEFAULT_ABOUT_US_PATH,
+                   menu_path=DEFAULT_MENU_PATH, warn_duplicates=True, chunk_tokens=DEFAULT_CHUNK_TOKENS,
+                   token_counter=None):
+    if chunk_tokens and token_counter is None:
+        token_counter = create_token_counter()
+
+    def iter_texts():
+        # Produtos (JSON lines): nome, descrição, ingredientes, preço e avaliação
+        with open(products_path, "r", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                # Mesmo texto usado pelo caminho rápido do Details Agent (agents/product_matcher.py)
+                yield format_product_document(json.loads(line))
+        # Seção "About Us" e itens do menu: (título, texto)
+        for title, notebook_title, path in [
+                ("Coffee shop Marry's Way About Section", "Coffee shop Marry's Way About Section", about_us_path),
+                ("Menu Items", "Menu Items:", menu_path)]:
+            with open(path, "r", encoding="utf-8") as file:
+                text = file.read()
+            if not chunk_tokens:
+                yield str((notebook_title, text))
+                continue
+            for number, chunk in enumerate(chunk_text(text, token_counter, chunk_tokens), start=1):
+                yield f"{title} (part {number}):\n{chunk}"
+
+    seen_ids = set()
+    for text in iter_texts():
+        text = to_ascii(text)
+        document_id = text.split(":")[0]
+        if document_id in seen_ids:
+            if warn_duplicates:
+                print(f"Aviso: id repetido ignorado: {document_id!r}")
+            continue
+        seen_ids.add(document_id)
+        yield document_id, text
+
+
+# Função para calcular o hash do conteúdo de um documento
+# Inclui o nome do modelo de embeddings: se o modelo mudar, todos os documentos são recalculados
+def content_hash(text, model_name):
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+# Gerador para agrupar itens em lotes de `size`
+def iter_batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Gerador para calcular os embeddings de lotes de documentos em paralelo
+# `batches`: lotes de (chave, texto). Produz (lote, embeddings normalizados) na ordem dos lotes
+# No máximo 2 * `workers` lotes ficam em andamento ao mesmo tempo (memória limitada)
+def embed_batches(embedding_client, batches, workers=2):
+    def encode(batch):
+        return normalize_embeddings(embedding_client.encode(
+            [text for _, text in batch], batch_size=len(batch), convert_to_numpy=True))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append((batch, executor.submit(encode, batch)))
+            if len(pending) >= 2 * workers:
+                batch, future = pending.popleft()
+                yield batch, future.result()
+        while pending:
+            batch, future = pending.popleft()
+            yield batch, future.result()
+
+
+# Função para atualizar o armazenamento local em `output_path`
+# Embeddings de documentos inalterados são copiados do armazenamento atual; os demais são recalculados
+# Os novos arquivos são escritos em streaming (matriz em um .npy mapeado em memória) e trocados no final
+def sync_local_index(embedding_client, output_path=DEFAULT_LOCAL_PATH, model_name=None, batch_size=64,
+                     workers=2, full=False, **sources):
+    model_name = model_name or os.getenv("EMBEDDING_MODEL_NAME")
+
+    # Armazenamento atual: id -> (linha, hash)
+    current = None
+    current_rows = {}
+    if LocalVectorStore.exists(output_path):
+        current = np.load(os.path.join(
+            output_path, EMBEDDINGS_FILE), mmap_mode="r")
+        for row, record in enumerate(LocalVectorStore.iter_records(output_path)):
+            current_rows[record["id"]] = (row, record.get("hash"))
+
+    # 1ª passagem: hash de cada documento e linha reaproveitável do armazenamento atual (ou None)
+    plan = []
+    for document_id, text in iter_documents(**sources):
+        document_hash = content_hash(text, model_name)
+        row, current_hash = current_rows.get(document_id, (None, None))
+        reusable = not full and row is not None and current_hash == document_hash
+        plan.append((document_hash, row if reusable else None))
+    new_ids = set()
+    stats = {"total": len(plan), "embedded": 0, "reused": 0, "deleted": 0}
+    if not plan:
+        raise ValueError("Nenhum documento encontrado para indexar")
+
+    os.makedirs(output_path, exist_ok=True)
+    embeddings_tmp = os.path.join(output_path, EMBEDDINGS_FILE + ".tmp")
+    metadata_tmp = os.path.join(output_path, METADATA_FILE + ".tmp")
+    matrix = None  # alocada quando a dimensão dos embeddings é conhecida
+
+    def allocate(dimension):
+        return np.lib.format.open_memmap(embeddings_tmp, mode="w+", dtype=np.float32,
+                                         shape=(len(plan), dimension))
+
+    # Reaproveitar linhas: a dimensão é a do armazenamento atual
+    if any(row is not None for _, row in plan):
+        matrix = allocate(current.shape[1])
+
+    # 2ª passagem (gerador): escreve os metadados, copia as linhas reaproveitadas e produz os documentos a recalcular
+    def iter_documents_to_embed(metadata_file):
+        for position, (document_id, text) in enumerate(iter_documents(warn_duplicates=False, **sources)):
+            document_hash, row = plan[position]
+            new_ids.add(document_id)
+            metadata_file.write(json.dumps({"id": document_id, "hash": document_hash,
+                                            "metadata": {"text": text}}, ensure_ascii=False) + "\n")
+            if row is not None:
+                matrix[position] = current[row]
+                stats["reused"] += 1
+            else:
+                yield position, text
+
+    with open(metadata_tmp, "w", encoding="utf-8") as metadata_file:
+        batches = iter_batches(
+            iter_documents_to_embed(metadata_file), batch_size)
+        for batch, embeddings in embed_batches(embedding_client, batches, workers):
+            if matrix is None:
+                matrix = allocate(embeddings.shape[1])
+            matrix[[position for position, _ in batch]] = embeddings
+            stats["embedded"] += len(batch)
+
+    matrix.flush()
+    del matrix, current  # fechar os mmaps antes de trocar os arquivos
+    os.replace(embeddings_tmp, os.path.join(output_path, EMBEDDINGS_FILE))
+    os.replace(metadata_tmp, os.path.join(output_path, METADATA_FILE))
+    stats["deleted"] = len(set(current_rows) - new_ids)
+    # Nova versão do índice (depois de trocar os arquivos): o cache de resultados da API deixa de ser usado
+    if has_changes(stats) or read_index_version(output_path) is None:
+        bump_index_version(output_path)
+    return stats
+
+
+# Função para verificar se uma atualização mudou o conteúdo do índice
+def has_changes(stats):
+    return stats["embedded"] > 0 or stats["deleted"] > 0
+
+
+# Função para ler o manifesto do Pinecone (id -> hash dos documentos enviados)
+def load_manifest(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+# Função para salvar o manifesto do Pinecone (arquivo temporário + renomear)
+def save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+# Função para atualizar o índice do Pinecone
+# Sem manifesto (1ª execução), os ids atuais do namespace são listados para remover os que não existem mais
+# Se o conteúdo mudar, a versão registrada no próprio índice é incrementada (lida por todas as réplicas da API)
+def sync_pinecone_index(embedding_client, index, manifest_path, namespace=PINECONE_NAMESPACE, model_name=None,
+                        batch_size=64, workers=2, full=False, **sources):
+    model_name = model_name or os.getenv("EMBEDDING_MODEL_NAME")
+
+    manifest = load_manifest(manifest_path)
+    if manifest is None:
+        manifest = {}
+        try:
+            for ids in index.list(namespace=namespace):
+                manifest.update({document_id: None for document_id in ids})
+        except Exception as e:
+            print(f"Aviso: não foi possível listar os ids do namespace {namespace}: {e}")
+
+    new_manifest = {}
+    stats = {"total": 0, "embedded": 0, "reused": 0, "deleted": 0}
+
+    # Documentos novos ou alterados (os demais já estão no índice)
+    def iter_documents_to_embed():
+        for document_id, text in iter_documents(**sources):
+            document_hash = content_hash(text, model_name)
+            new_manifest[document_id] = document_hash
+            stats["total"] += 1
+            if not full and manifest.get(document_id) == document_hash:
+                stats["reused"] += 1
+                continue
+            yield document_id, text
+
+    batches = iter_batches(iter_documents_to_embed(), batch_size)
+    for batch, embeddings in embed_batches(embedding_client, batches, workers):
+        index.upsert(vectors=[{
+            "id": document_id,
+            "values": embedding.tolist(),
+            "metadata": {"text": text},
+        } for (document_id, text), embedding in zip(batch, embeddings)], namespace=namespace)
+        stats["embedded"] += len(batch)
+
+    # Remover documentos que não existem mais
+    deleted_ids = [document_id for document_id in manifest
+                   if document_id not in new_manifest]
+    for ids in iter_batches(deleted_ids, PINECONE_DELETE_BATCH_SIZE):
+        index.delete(ids=ids, namespace=namespace)
+    stats["deleted"] = len(deleted_ids)
+
+    save_manifest(manifest_path, new_manifest)
+    if has_changes(stats) or read_pinecone_index_version(index, namespace) is None:
+        bump_pinecone_index_version(index, namespace)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["local", "pinecone", "all"], default="local",
+                        help="destino do índice (padrão: local)")
+    parser.add_argument("--products", default=DEFAULT_PRODUCTS_PATH)
+    parser.add_argument("--about-us", default=DEFAULT_ABOUT_US_PATH)
+    parser.add_argument("--menu", default=DEFAULT_MENU_PATH)
+    parser.add_argument("--output", default=os.getenv("VECTOR_STORE_PATH") or DEFAULT_LOCAL_PATH,
+                        help="diretório do armazenamento local")
+    parser.add_argument("--manifest", default=None,
+                        help="manifesto (id -> hash) do Pinecone (padrão: <output>/pinecone_<índice>_<namespace>.json)")
+    parser.add_argument("--chunk-tokens", type=int, default=DEFAULT_CHUNK_TOKENS,
+                        help="tamanho máximo dos trechos dos textos longos em tokens (0: sem divisão)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=2,
+                        help="lotes de embeddings calculados em paralelo")
+    parser.add_argument("--full", action="store_true",
+                        help="recalcular os embeddings de todos os documentos")
+    args = parser.parse_args()
+
+    sources = {"products_path": args.products, "about_us_path": args.about_us,
+               "menu_path": args.menu, "chunk_tokens": args.chunk_tokens}
+    options = {"batch_size": args.batch_size,
+               "workers": args.workers, "full": args.full}
+
+    embedding_client = create_embedding_model()
+
+    if args.target in ("local", "all"):
+        start = time.perf_counter()
+        stats = sync_local_index(
+            embedding_client, args.output, **options, **sources)
+        print(f"✅ local ({args.output}): {stats} ({time.perf_counter() - start:.1f}s) | "
+              f"versão do índice: {read_index_version(args.output)}")
+
+    if args.target in ("pinecone", "all"):
+        from pinecone import Pinecone
+        index_name = os.getenv("PINECONE_INDEX_NAME")
+        index = Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(index_name)
+        manifest_path = args.manifest or os.path.join(
+            args.output, f"pinecone_{index_name}_{PINECONE_NAMESPACE}.json")
+        start = time.perf_counter()
+        stats = sync_pinecone_index(
+            embedding_client, index, manifest_path, **options, **sources)
+        print(f"✅ pinecone ({index_name}/{PINECONE_NAMESPACE}): {stats} "
+              f"({time.perf_counter() - start:.1f}s) | "
+              f"versão do índice: {read_pinecone_index_version(index, PINECONE_NAMESPACE)}")
+
+
+if __name__ == "__main__":
+    main()